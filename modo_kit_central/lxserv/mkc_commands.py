@@ -1,8 +1,15 @@
+import os
+from typing import TYPE_CHECKING
+
 import lx
 
+# Only the lightweight modules are imported when Modo registers the commands,
+# Qt, the stylesheet and the database are loaded when a command first runs.
 from mkc.command import MKCCommand
-from mkc.gui import KitCentralWindow
-from mkc.prefs import DATA, KIT
+from mkc.prefs import DATA, KIT, Launcher
+
+if TYPE_CHECKING:
+    from mkc.update import UpdateResult
 
 
 class MKCLauncherCMD(MKCCommand):
@@ -30,10 +37,84 @@ class MKCLauncherCMD(MKCCommand):
             msg: The commands message object
             flags: The int result of cmd_Flags()
         """
-        if DATA.mkc_window:
-            DATA.mkc_window.show()
-        else:
-            DATA.mkc_window = KitCentralWindow()
+        # Shows the prewarmed or previously closed window, only building one if there is none.
+        from mkc.launcher import show_window
+        show_window()
 
 
 lx.bless(MKCLauncherCMD, KIT.CMD_LAUNCHER)
+
+
+class MKCPrewarmCMD(MKCCommand):
+    """Command run on startup to build the Kit Central window in the background, if MKC_PREWARM is set."""
+
+    def cmd_Flags(self) -> int:
+        """Modo Override: Set the internal flags of the command.
+
+        Returns:
+            The quiet flag
+        """
+        return lx.symbol.fCMD_QUIET
+
+    def basic_Execute(self, msg: lx.object.Message, flags: int):
+        """Modo Override: Schedules the window to be built once Modo is idle.
+
+        Args:
+            msg: The commands message object
+            flags: The int result of cmd_Flags()
+        """
+        # Nothing is imported unless prewarming is enabled, so startup isn't slowed down by default.
+        if Launcher.ENV_PREWARM not in os.environ or DATA.mkc_window:
+            return
+        from mkc.launcher import prewarm_window
+        prewarm_window()
+
+
+lx.bless(MKCPrewarmCMD, KIT.CMD_PREWARM)
+
+
+class MKCUpdateCMD(MKCCommand):
+    """Command to update Modo Kit Central to the latest release in the background."""
+
+    def cmd_Flags(self) -> int:
+        """Modo Override: Set the internal flags of the command.
+
+        Returns:
+            The quiet flag
+        """
+        return lx.symbol.fCMD_QUIET
+
+    @staticmethod
+    def on_finished(result: 'UpdateResult') -> None:
+        """Reports the finished update.
+
+        Args:
+            result: The installed version and the files that changed.
+        """
+        if result.changed:
+            lx.out(f"{KIT.NICE_NAME} updated to v{result.version}: {len(result.updated)} files updated, "
+                   f"{len(result.removed)} removed. Restart Modo to load the update.")
+        else:
+            lx.out(f"{KIT.NICE_NAME} is up to date.")
+
+    @staticmethod
+    def on_failed(error: str) -> None:
+        """Reports the failed update.
+
+        Args:
+            error: The error message.
+        """
+        lx.out(f"{KIT.NICE_NAME} update failed: {error}")
+
+    def basic_Execute(self, msg: lx.object.Message, flags: int):
+        """Modo Override: Starts the update without blocking Modo.
+
+        Args:
+            msg: The commands message object
+            flags: The int result of cmd_Flags()
+        """
+        from mkc.update import start_update
+        start_update(self.on_finished, self.on_failed)
+
+
+lx.bless(MKCUpdateCMD, KIT.CMD_UPDATE)
@@ -1,47 +1,461 @@
-from typing import List
+import json
+import re
 import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import fields
+from pathlib import Path
+from itertools import chain
+from typing import Iterator, List, Optional, Sequence, Tuple
 
-from .prefs import Paths, AuthorData, QueryData
+from .prefs import Paths, Database, AddOnData, AuthorData, KitData, QueryData
+from .perf import count, span, timed
 
 
-def search_kits(search_text: str) -> List[int]:
-    """Searches the database for the given search text.
+class DatabaseConnection:
+    """Read-only connection manager for the kits database.
+
+    Each thread gets its own connection which is opened once and reused. Statements are cached per connection,
+    so the constant queries in QueryData are only prepared once, and the file is memory mapped, so typing a search
+    doesn't read from disk once its pages were loaded. A connection is reopened only when the identity
+    of the database file changes, e.g. when the file is replaced by a newer catalog.
+    """
+
+    def __init__(self, cached_statements: int = 64, mmap_size: int = Database.MMAP_SIZE) -> None:
+        """Initialization of the connection manager.
+
+        Args:
+            cached_statements: The number of prepared statements to cache per connection.
+            mmap_size: The most bytes of the database to memory map, 0 to read it without mapping.
+        """
+        self.cached_statements = cached_statements
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+
+    @staticmethod
+    def identity(path: Path) -> Tuple[str, int, int, int, int]:
+        """Gets a value that changes whenever the database file is replaced or modified.
+
+        Args:
+            path: The path to the database file.
+
+        Returns:
+            identity: The path, device, inode, size and modification time of the file.
+        """
+        stat = path.stat()
+        return path.as_posix(), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def connect(self, path: Path) -> sqlite3.Connection:
+        """Opens the database in read-only, immutable mode.
+
+        Args:
+            path: The path to the database file.
+
+        Returns:
+            connection: The new connection.
+        """
+        uri = f"{path.as_uri()}?mode=ro&immutable=1"
+        connection = sqlite3.connect(uri, uri=True, cached_statements=self.cached_statements)
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        return connection
+
+    def get(self) -> sqlite3.Connection:
+        """Gets the connection for the current thread, opening it if needed.
+
+        Returns:
+            connection: The open connection to Paths.DATABASE.
+        """
+        identity = self.identity(Paths.DATABASE)
+        connection: Optional[sqlite3.Connection] = getattr(self._local, "connection", None)
+
+        if connection is None or self._local.identity != identity:
+            # The file changed on disk, so the old connection is stale.
+            if connection is not None:
+                connection.close()
+            connection = self.connect(Paths.DATABASE)
+            self._local.connection = connection
+            self._local.identity = identity
+
+        return connection
+
+    def close(self) -> None:
+        """Closes the connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+            self._local.identity = None
+
+
+# Shared connection manager for all database calls.
+CONNECTION = DatabaseConnection()
+
+
+# Word characters, the underscore separates words like in the unicode61 tokenizer.
+WORD = re.compile(r"[^\W_]+")
+# Maps every ascii character that separates words to a space, to split plain ascii text without a regex.
+ASCII_SEPARATORS = bytes(code if chr(code).isalnum() else 32 for code in range(256))
+# Words of every comma separated term of a search.
+SearchTerms = Tuple[Tuple[str, ...], ...]
+
+
+def fold(text: str) -> str:
+    """Lowercases text and removes diacritics, the way the unicode61 tokenizer of the index does.
 
     Args:
-        search_text: The text to search for.
+        text: The text to fold.
+
+    Returns:
+        text: The folded text.
+    """
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return text
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Splits text into folded words.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        words: The words of the text.
+    """
+    text = fold(text)
+    if text.isascii():
+        return tuple(text.encode().translate(ASCII_SEPARATORS).decode().split())
+    return tuple(WORD.findall(text))
+
+
+def parse_terms(search_text: str) -> SearchTerms:
+    """Normalizes the user search text into its terms.
+
+    Args:
+        search_text: The comma separated terms to parse.
+
+    Returns:
+        terms: The words of every term that has any, searches with the same terms have the same results.
     """
-    # Split the search text into individual terms.
-    search_terms = [s.strip() for s in search_text.split(",")]
+    # Only keep word characters so user input can't break the FTS5 syntax.
+    return tuple(words for words in map(tokenize, search_text.split(",")) if words)
 
-    # Generate the search query for all terms.
-    query = QueryData.SelectKits
-    params = []
 
-    for term in search_terms:
-        query += QueryData.SearchTerm
-        # For every '?' in the query, add the search term to the params.
-        params.extend([f"%{term}%"] * QueryData.SearchTerm.count("?"))
+def build_match(search_text: str) -> str:
+    """Converts the user search text into an FTS5 match expression.
 
-    with sqlite3.connect(Paths.DATABASE) as connection:
-        cursor = connection.cursor()
-        # Search all fields in kits table for the search text.
-        cursor.execute(query, params)
-        # Get id of all matching kits and remap from 1-indexed to 0-indexed.
-        return [kit[0] - 1 for kit in cursor.fetchall()]
+    Each comma separated term becomes a prefix phrase and all terms must match.
+
+    Args:
+        search_text: The text to convert.
+
+    Returns:
+        match: The FTS5 match expression, empty if there is nothing to search for.
+    """
+    return terms_match(parse_terms(search_text))
 
 
-def get_kits() -> List[tuple]:
+def terms_match(terms: SearchTerms) -> str:
+    """Converts normalized search terms into an FTS5 match expression.
+
+    Args:
+        terms: The words of every term.
+
+    Returns:
+        match: The FTS5 match expression, empty if there are no terms.
+    """
+    # Match each term as a phrase with the last word as a prefix.
+    return " AND ".join(f'"{" ".join(words)}" *' for words in terms)
+
+
+def term_implies(term: Tuple[str, ...], parent: Tuple[str, ...]) -> bool:
+    """Checks if every kit matching a term also matches the parent term, e.g. "mesh" implies "me".
+
+    Args:
+        term: The words of the term.
+        parent: The words of the parent term.
+
+    Returns:
+        True if the term starts with the same words as the parent and its last word extends the parent's last word.
+    """
+    last = len(parent) - 1
+    return len(term) > last and term[:last] == parent[:last] and term[last].startswith(parent[last])
+
+
+class SearchCache:
+    """Least recently used cache of search results by normalized terms.
+
+    A search that extends a cached search, e.g. typing "mesh" after "mes", can only match a subset of its kits,
+    so only those kits are searched and ranked again instead of the whole index. They are ranked by bm25 like any
+    other search, since it weighs the terms of the search and not the ones it extends.
+    """
+
+    def __init__(self, size: int = 128, narrow_limit: int = 2000, id_limit: int = 250000) -> None:
+        """Initialization of the search cache.
+
+        Args:
+            size: The number of searches to keep.
+            narrow_limit: The most kits a cached search may have to narrow it, larger ones are searched again.
+            id_limit: The number of kit ids to keep over all cached searches, the most recent search is always kept.
+        """
+        self.size = size
+        self.narrow_limit = narrow_limit
+        self.id_limit = id_limit
+        self.lock = threading.Lock()
+        self.identity: Optional[tuple] = None
+        # Ranked kit ids by terms, the most recently used last, as arrays of 4 bytes per id instead of int objects.
+        self.results: 'OrderedDict[SearchTerms, array]' = OrderedDict()
+        # Number of kit ids over all cached searches.
+        self.cached_ids = 0
+
+    def validate(self, identity: tuple) -> None:
+        """Clears the cache if the database changed since the results were cached.
+
+        Args:
+            identity: The current identity of the database file.
+        """
+        with self.lock:
+            if identity != self.identity:
+                self.reset()
+                self.identity = identity
+
+    def get(self, terms: SearchTerms) -> Optional[array]:
+        """Gets the results of a search, narrowing the smallest cached search it extends if it isn't cached.
+
+        Args:
+            terms: The normalized search terms.
+
+        Returns:
+            kit_ids: The ranked kit ids or None if the database has to be searched.
+        """
+        with self.lock:
+            kit_ids = self.results.get(terms)
+            if kit_ids is not None:
+                self.results.move_to_end(terms)
+                count("db.search_cache_hit")
+                return kit_ids
+
+            parent = None
+            for parent_terms, parent_ids in self.results.items():
+                # Every kit of the search is in the parent if each parent term is implied by a term of the search.
+                if parent_terms and all(any(term_implies(term, p) for term in terms) for p in parent_terms):
+                    if parent is None or len(parent_ids) < len(parent):
+                        parent = parent_ids
+            # The ids of a larger search would cost more to pass to the database than searching it again.
+            if parent is None or len(parent) > self.narrow_limit:
+                return None
+
+            kit_ids = self.rank(terms, parent) if parent else array("I")
+            count("db.search_cache_narrowed")
+            self.insert(terms, kit_ids)
+            return kit_ids
+
+    @staticmethod
+    def rank(terms: SearchTerms, kit_ids: Sequence[int]) -> array:
+        """Searches and ranks a subset of the kits the way a search of the database ranks them.
+
+        Args:
+            terms: The normalized search terms.
+            kit_ids: The ids of the kits to search.
+
+        Returns:
+            kit_ids: The ids of the matching kits ordered by relevance.
+        """
+        cursor = CONNECTION.get().cursor()
+        cursor.execute(QueryData.RankKits, [terms_match(terms), json.dumps(kit_ids.tolist())])
+        return array("I", (kit_id for kit_id, in cursor))
+
+    def put(self, terms: SearchTerms, kit_ids: array) -> None:
+        """Caches the results of a search.
+
+        Args:
+            terms: The normalized search terms.
+            kit_ids: The ranked kit ids.
+        """
+        with self.lock:
+            self.insert(terms, kit_ids)
+
+    def insert(self, terms: SearchTerms, kit_ids: array) -> None:
+        """Adds results and evicts the least recently used ones over the size or the id limit.
+
+        Args:
+            terms: The normalized search terms.
+            kit_ids: The ranked kit ids.
+        """
+        previous = self.results.pop(terms, None)
+        if previous is not None:
+            self.cached_ids -= len(previous)
+        self.results[terms] = kit_ids
+        self.cached_ids += len(kit_ids)
+        # Evict by count and by total ids, so a large catalog can't fill the cache with full result lists.
+        while len(self.results) > self.size or (self.cached_ids > self.id_limit and len(self.results) > 1):
+            _, evicted = self.results.popitem(last=False)
+            self.cached_ids -= len(evicted)
+
+    def reset(self) -> None:
+        """Removes all cached results, the lock must be held."""
+        self.results.clear()
+        self.cached_ids = 0
+
+    def clear(self) -> None:
+        """Removes all cached results."""
+        with self.lock:
+            self.reset()
+
+
+# Shared cache of the results of search_kits.
+SEARCH_CACHE = SearchCache()
+
+
+@timed("db.search_kits")
+def search_kits(search_text: str) -> Sequence[int]:
+    """Searches the database for the given search text.
+
+    Searches are cached, repeating a search or extending a cached one doesn't search the database again.
+
+    Args:
+        search_text: The text to search for.
+
+    Returns:
+        kit_ids: The ids of all matching kits as an array of unsigned ints, ordered by relevance.
+    """
+    terms = parse_terms(search_text)
+    # A replaced database has other kits, so its cached results are stale.
+    SEARCH_CACHE.validate(CONNECTION.identity(Paths.DATABASE))
+    kit_ids = SEARCH_CACHE.get(terms)
+    if kit_ids is None:
+        cursor = CONNECTION.get().cursor()
+        if terms:
+            # Search the full-text index and rank the results with bm25.
+            cursor.execute(QueryData.SearchKits, [build_match(search_text)])
+        else:
+            # Nothing to search for, so every kit matches.
+            cursor.execute(QueryData.SelectKitIds)
+        # Get the stable database id of all matching kits, without holding every row at once.
+        kit_ids = array("I", (kit_id for kit_id, in cursor))
+        SEARCH_CACHE.put(terms, kit_ids)
+    # Copy, so callers can't change the cached results.
+    return array("I", kit_ids)
+
+
+@timed("db.get_kits")
+def get_kits() -> List[KitData]:
     """Gets all kits from the database.
 
     Returns:
         kits: A list of all kits in the database.
     """
-    with sqlite3.connect(Paths.DATABASE) as connection:
-        cursor = connection.cursor()
-        cursor.execute(QueryData.SelectKits)
-        return cursor.fetchall()
+    cursor = CONNECTION.get().cursor()
+    cursor.row_factory = KitData.from_row
+    cursor.execute(QueryData.SelectKits)
+    return cursor.fetchall()
+
+
+@timed("db.count_kits")
+def count_kits() -> int:
+    """Counts the kits in the database.
+
+    Returns:
+        count: The number of kits.
+    """
+    cursor = CONNECTION.get().cursor()
+    cursor.execute(QueryData.CountKits)
+    return cursor.fetchone()[0]
+
+
+def iter_pages(query: str, args: List, page_size: int, after_id: int = 0) -> Iterator[List[KitData]]:
+    """Reads the kits of a query in pages, ordered by kit id.
+
+    Every page starts after the last kit id of the previous one, so reading a page costs the same however far
+    the reader got, and only the rows of the current page are in memory.
+
+    Args:
+        query: The query selecting the kit columns, taking the args, the id to start after and the page size as
+            its last parameters.
+        args: The parameters of the query before the id to start after.
+        page_size: The number of kits per page.
+        after_id: The kit id to start after.
+
+    Returns:
+        pages: The non-empty pages of kits, read on demand.
+    """
+    while True:
+        with span("db.page"):
+            cursor = CONNECTION.get().cursor()
+            cursor.row_factory = KitData.from_row
+            cursor.execute(query, [*args, after_id, page_size])
+            kits = cursor.fetchall()
+        if kits:
+            yield kits
+        if len(kits) < page_size:
+            return
+        after_id = kits[-1].id
+
+
+def iter_kits(page_size: int = Database.PAGE_SIZE) -> Iterator[List[KitData]]:
+    """Gets all kits from the database, one page at a time.
+
+    Args:
+        page_size: The number of kits per page.
+
+    Returns:
+        pages: The pages of kits, ordered by id.
+    """
+    return iter_pages(QueryData.SelectKitsPage, [], page_size)
+
+
+def iter_author_kits(author: str, page_size: int = Database.PAGE_SIZE, after_id: int = 0) -> Iterator[List[KitData]]:
+    """Gets the kits of the given author from the database, one page at a time.
+
+    Args:
+        author: The author's name to get the kits of.
+        page_size: The number of kits per page.
+        after_id: The kit id to start after.
+
+    Returns:
+        pages: The pages of kits, ordered by id.
+    """
+    return iter_pages(QueryData.SelectKitsByAuthorPage, [author], page_size, after_id)
+
+
+@timed("db.get_kits_by_id")
+def get_kits_by_id(kit_ids: List[int]) -> List[KitData]:
+    """Gets the given kits from the database.
+
+    Args:
+        kit_ids: The ids of the kits.
+
+    Returns:
+        kits: The kits in the order of the ids, ids that aren't in the database are skipped.
+    """
+    cursor = CONNECTION.get().cursor()
+    cursor.row_factory = KitData.from_row
+    cursor.execute(QueryData.SelectKitsById, [json.dumps(kit_ids)])
+    kits = {kit.id: kit for kit in cursor.fetchall()}
+    return [kits[kit_id] for kit_id in kit_ids if kit_id in kits]
+
+
+@timed("db.get_add_ons")
+def get_add_ons(kit_id: int) -> List[AddOnData]:
+    """Gets the add-ons of a kit from the database.
+
+    Args:
+        kit_id: The id of the kit.
+
+    Returns:
+        add_ons: The add-ons of the kit, ordered by name.
+    """
+    cursor = CONNECTION.get().cursor()
+    cursor.row_factory = AddOnData.from_row
+    cursor.execute(QueryData.SelectAddOns, [kit_id])
+    return cursor.fetchall()
 
 
+@timed("db.get_author")
 def get_author(author: str) -> AuthorData:
     """Gets the author data from the database.
 
@@ -51,15 +465,14 @@ def get_author(author: str) -> AuthorData:
     Returns:
         author_data: The author's data class.
     """
-    search_params = [f"%{author}%"]
+    cursor = CONNECTION.get().cursor()
+    cursor.row_factory = AuthorData.from_row
+    cursor.execute(QueryData.SelectAuthor, [author])
+    return cursor.fetchone()
 
-    with sqlite3.connect(Paths.DATABASE) as connection:
-        cursor = connection.cursor()
-        cursor.execute(QueryData.SelectAuthor, search_params)
-        return AuthorData(*cursor.fetchone())
 
-
-def get_author_kits(author: str) -> List[tuple]:
+@timed("db.get_author_kits")
+def get_author_kits(author: str) -> List[KitData]:
     """Gets all kits from the database by the given author.
 
     Args:
@@ -68,7 +481,100 @@ def get_author_kits(author: str) -> List[tuple]:
     Returns:
         kits: A list of all kits by the author.
     """
-    with sqlite3.connect(Paths.DATABASE) as connection:
-        cursor = connection.cursor()
-        cursor.execute(QueryData.SelectKitsByAuthor, [author])
-        return cursor.fetchall()
+    cursor = CONNECTION.get().cursor()
+    cursor.row_factory = KitData.from_row
+    cursor.execute(QueryData.SelectKitsByAuthor, [author])
+    return cursor.fetchall()
+
+
+@timed("db.get_author_page")
+def get_author_page(
+        author: str, page_size: int = Database.PAGE_SIZE
+) -> Optional[Tuple[AuthorData, Iterator[List[KitData]]]]:
+    """Gets the author data and the first page of their kits from the database in a single query.
+
+    Args:
+        author: The author's name to get data for.
+        page_size: The number of kits per page.
+
+    Returns:
+        author_data: The author's data class.
+        pages: The pages of kits by the author, the first is already read and the others are read on demand.
+        None if the author isn't in the database.
+    """
+    cursor = CONNECTION.get().cursor()
+    cursor.execute(QueryData.SelectAuthorPage, [author, page_size])
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    # Every row starts with the author columns, followed by the columns of one kit.
+    author_columns = len(fields(AuthorData))
+    author_data = AuthorData.from_row(cursor, rows[0][:author_columns])
+    # An author without kits still returns one row, with all kit columns NULL.
+    kits = [KitData.from_row(cursor, row[author_columns:]) for row in rows if row[author_columns] is not None]
+    if len(kits) < page_size:
+        # The first page already holds every kit.
+        return author_data, iter([kits] if kits else [])
+
+    return author_data, chain([kits], iter_author_kits(author, page_size, kits[-1].id))
+
+
+def read_packed_image(query: str, name: str) -> Optional[tuple]:
+    """Reads a row of the images packed into Paths.IMAGE_DATABASE at build time.
+
+    The file is only opened for the read, so a kit update can replace it while the kit runs.
+
+    Args:
+        query: The query selecting the columns of an image by name.
+        name: The path of the image relative to the resources' directory.
+
+    Returns:
+        row: The columns of the image or None if it isn't packed.
+    """
+    if not Paths.IMAGE_DATABASE.exists():
+        # The kit was built without packed images.
+        return None
+    connection = sqlite3.connect(f"{Paths.IMAGE_DATABASE.as_uri()}?mode=ro", uri=True)
+    try:
+        return connection.execute(query, [name]).fetchone()
+    finally:
+        connection.close()
+
+
+@timed("db.get_image")
+def get_image(name: str) -> Optional[bytes]:
+    """Gets an image that was packed at build time.
+
+    Args:
+        name: The path of the image relative to the resources' directory.
+
+    Returns:
+        data: The encoded image data or None if the image isn't packed.
+    """
+    image = read_packed_image(QueryData.SelectImage, name)
+    return image[0] if image else None
+
+
+@timed("db.get_image_size")
+def get_image_size(name: str) -> Optional[Tuple[int, int]]:
+    """Gets the size of an image that was packed at build time, without reading the image.
+
+    Args:
+        name: The path of the image relative to the resources' directory.
+
+    Returns:
+        size: The width and height of the image or None if the image isn't packed.
+    """
+    return read_packed_image(QueryData.SelectImageSize, name)
+
+
+def has_image(name: str) -> bool:
+    """Checks if an image was packed at build time.
+
+    Args:
+        name: The path of the image relative to the resources' directory.
+
+    Returns:
+        True if the image is packed.
+    """
+    return get_image_size(name) is not None
@@ -1,33 +1,56 @@
 try:
-    from PySide6.QtCore import Qt
-    from PySide6.QtGui import QCloseEvent, QPixmap
+    from PySide6.QtCore import Qt, QTimer
+    from PySide6.QtGui import QCloseEvent, QHideEvent, QShowEvent, QPixmap, QKeySequence, QShortcut
     from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout, QTabBar, QLabel
 except ImportError:
     # Fallback to PySide2 if PySide6 is not available
-    from PySide2.QtCore import Qt
-    from PySide2.QtGui import QCloseEvent, QPixmap
-    from PySide2.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout, QTabBar, QLabel
+    from PySide2.QtCore import Qt, QTimer
+    from PySide2.QtGui import QCloseEvent, QHideEvent, QShowEvent, QPixmap, QKeySequence
+    from PySide2.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout, QTabBar, QLabel, QShortcut
 
 # Kit imports
-from .prefs import Text, KEYS, DATA, Paths
-from .widgets import KitsTab, Banner
+from .prefs import Text, KEYS, DATA, Paths, Launcher, Perf
+from .utils import load_stylesheet
+from .database import CONNECTION
+from .images import get_pixmap_cache
+from .perf import ENABLED, count, timed
+from .widgets import KitsTab, Banner, PerfTab
+from .sync import SyncResult, apply_pending, get_catalog_url, start_sync
 
 
 class KitCentralWindow(QMainWindow):
     """The core window for Modo Kit Central."""
 
-    def __init__(self) -> None:
-        """Initialization of the Kit Central Window."""
+    @timed("widget.KitCentralWindow")
+    def __init__(self, show: bool = True) -> None:
+        """Initialization of the Kit Central Window.
+
+        Args:
+            show: Show the window once it is built, False to build it in the background and show it later.
+        """
         super(KitCentralWindow, self).__init__(None)
+        # Drops the heavy children once the window has been hidden for a while.
+        self.trim_timer = QTimer(self)
+        self.trim_timer.setSingleShot(True)
+        self.trim_timer.setInterval(Launcher.TRIM_AFTER)
+        self.trim_timer.timeout.connect(self.trim)
+        # A catalog that couldn't replace the open database is swapped in before anything connects to it.
+        apply_pending()
         # Build the UI
         self._build_window()
         self._build_ui()
         self._build_tabs()
         # Display the UI
-        self.show()
+        if show:
+            self.show()
+        # Look for a newer catalog without blocking the UI.
+        self._sync_catalog()
 
     def _build_window(self) -> None:
         """Sets up the main window properties."""
+        # The stylesheet is only read from disk when the first window is built.
+        if not DATA.CSS:
+            load_stylesheet()
         self.setStyleSheet(DATA.CSS)
         self.setWindowTitle(Text.title)
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
@@ -63,16 +86,94 @@ class KitCentralWindow(QMainWindow):
         self.tabs.tabBar().setTabButton(0, QTabBar.RightSide, None)
         # Remove close button on macOS
         self.tabs.tabBar().setTabButton(0, QTabBar.LeftSide, None)
+        # Hidden performance tab, only there when instrumentation is enabled.
+        self.tab_perf = None
+        if ENABLED:
+            self._build_perf_tab()
+
+    def _build_perf_tab(self) -> None:
+        """Adds the hidden performance tab and the shortcut toggling it."""
+        self.tab_perf = PerfTab()
+        index = self.tabs.addTab(self.tab_perf, KEYS.PERF)
+        self.tabs.tabBar().setTabButton(index, QTabBar.RightSide, None)
+        self.tabs.tabBar().setTabButton(index, QTabBar.LeftSide, None)
+        self.tabs.setTabVisible(index, False)
+        self.perf_shortcut = QShortcut(QKeySequence(Perf.SHORTCUT), self)
+        self.perf_shortcut.activated.connect(self.toggle_perf_tab)
+
+    def toggle_perf_tab(self) -> None:
+        """Shows the performance tab and switches to it, or hides it again."""
+        index = self.tabs.indexOf(self.tab_perf)
+        visible = not self.tabs.isTabVisible(index)
+        self.tabs.setTabVisible(index, visible)
+        if visible:
+            self.tabs.setCurrentIndex(index)
+
+    def _sync_catalog(self) -> None:
+        """Syncs the kits database in the background, if a catalog url is configured."""
+        if get_catalog_url():
+            start_sync(self.on_catalog_synced, self.on_catalog_sync_failed)
+
+    def on_catalog_synced(self, result: SyncResult) -> None:
+        """Reloads the kits once a newer catalog replaced the database.
+
+        Args:
+            result: The catalog version and how it was updated.
+        """
+        self.tabs.setTabToolTip(self.tabs.indexOf(self.tab_kits), "")
+        if result.changed:
+            self.tab_kits.reload_kits()
+
+    def on_catalog_sync_failed(self, error: str) -> None:
+        """Shows why the catalog sync failed on the kits tab, the installed catalog is still used.
+
+        Args:
+            error: The error message.
+        """
+        count("sync.failed")
+        self.tabs.setTabToolTip(self.tabs.indexOf(self.tab_kits), Text.sync_failed.format(error=error))
 
     def closeEvent(self, event: QCloseEvent) -> None:
         """PySide method: Handle closing the UI
 
+        Notes:
+            The window is only hidden, the launcher shows the same window again.
+
         Args:
             event: The close event from the Window.
         """
-        self.close()
         event.accept()
 
+    def showEvent(self, event: QShowEvent) -> None:
+        """PySide method: Keeps the children of a shown window.
+
+        Args:
+            event: The show event from the Window.
+        """
+        self.trim_timer.stop()
+        super(KitCentralWindow, self).showEvent(event)
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        """PySide method: Trims the window if it stays hidden.
+
+        Args:
+            event: The hide event from the Window.
+        """
+        self.trim_timer.start()
+        super(KitCentralWindow, self).hideEvent(event)
+
+    def trim(self) -> None:
+        """Frees the memory of a hidden window, everything dropped is rebuilt on demand once it is shown again."""
+        if self.isVisible():
+            return
+        # Close the author tabs, the core tab is kept.
+        for index in reversed(range(1, self.tabs.count())):
+            self.tab_close(index)
+        # Delete the details of expanded kits.
+        self.tab_kits.kit_view.collapse_all()
+        get_pixmap_cache().clear()
+        CONNECTION.close()
+
     def tab_close(self, index: int) -> None:
         """Handle closing extra tabs.
 
@@ -84,7 +185,7 @@ class KitCentralWindow(QMainWindow):
             return
         # Ge the widget attached to the tab
         tab_widget = self.tabs.widget(index)
-        if tab_widget is not None:
+        if tab_widget is not None and tab_widget is not self.tab_perf:
             # Remove tab from tab widget
             self.tabs.removeTab(index)
             # Destroy widget as it's no longer needed.
@@ -0,0 +1,263 @@
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from PySide6.QtCore import Qt, QObject, QThreadPool, QSize
+    from PySide6.QtGui import QImage, QImageReader, QPixmap
+except ImportError:
+    # Fallback to PySide2 if PySide6 is not available
+    from PySide2.QtCore import Qt, QObject, QThreadPool, QSize
+    from PySide2.QtGui import QImage, QImageReader, QPixmap
+
+from .prefs import Paths
+from .database import get_image, get_image_size
+from .perf import count, timed
+from .workers import Worker
+
+# Cache key of an image: its path and the width and height it is scaled to, 0 keeps the aspect ratio.
+ImageKey = Tuple[str, int, int]
+
+
+def resource_name(path: Path) -> Optional[str]:
+    """Gets the name an image is packed into the images database with.
+
+    Args:
+        path: The path of the image.
+
+    Returns:
+        name: The path relative to the resources' directory or None if it is outside of it.
+    """
+    try:
+        return path.relative_to(Paths.RESOURCES).as_posix()
+    except ValueError:
+        return None
+
+
+def packed_image(path: Path) -> Optional[bytes]:
+    """Gets the data of an image packed into the images database.
+
+    Args:
+        path: The path of the image.
+
+    Returns:
+        data: The encoded image data or None if the image isn't packed.
+    """
+    name = resource_name(path)
+    return get_image(name) if name else None
+
+
+@timed("pixmap.load")
+def load_image(key: ImageKey) -> Tuple[ImageKey, QImage]:
+    """Decodes and scales an image, safe to call off the GUI thread.
+
+    Args:
+        key: The path of the image and the size to scale it to.
+
+    Returns:
+        The key and the decoded image, which is null if the image could not be read.
+    """
+    path, width, height = key
+    # Images packed into the database are already scaled to their display size.
+    data = packed_image(Path(path))
+    image = QImage.fromData(data) if data else QImage(path)
+
+    if image.isNull():
+        return key, image
+    if width and height:
+        image = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    elif width and image.width() != width:
+        image = image.scaledToWidth(width, Qt.SmoothTransformation)
+    elif height and image.height() != height:
+        image = image.scaledToHeight(height, Qt.SmoothTransformation)
+
+    return key, image
+
+
+def scaled_size(path: Path, width: int = 0, height: int = 0) -> QSize:
+    """Gets the size an image will have once scaled, without decoding the image.
+
+    Args:
+        path: The path of the image.
+        width: The width to scale to, 0 to keep the aspect ratio.
+        height: The height to scale to, 0 to keep the aspect ratio.
+
+    Returns:
+        size: The scaled size, invalid if the image doesn't exist or could not be read.
+    """
+    # Packed images are stored with their size, so the image data is only read once it is loaded.
+    name = resource_name(path)
+    packed = get_image_size(name) if name else None
+    size = QSize(*packed) if packed else QImageReader(path.as_posix()).size()
+    if not size.isValid() or size.isEmpty():
+        return size
+    if width and height:
+        return size.scaled(width, height, Qt.KeepAspectRatio)
+    if width:
+        return QSize(width, round(size.height() * width / size.width()))
+    if height:
+        return QSize(round(size.width() * height / size.height()), height)
+    return size
+
+
+class PixmapCache(QObject):
+    """Process-wide LRU cache of decoded and pre-scaled pixmaps.
+
+    Pixmaps are keyed by path and target size and evicted, least recently used first, once their total size
+    exceeds the byte budget. Cache misses are decoded to a QImage on a worker thread and converted to a pixmap
+    on the GUI thread when delivered, so the same image is never decoded twice while it stays cached.
+    """
+
+    def __init__(self, budget: int = 32 * 1024 * 1024, parent: QObject = None) -> None:
+        """Initialization of the pixmap cache.
+
+        Args:
+            budget: The maximum number of bytes of pixmap data to keep.
+            parent: The parent object.
+        """
+        super(PixmapCache, self).__init__(parent)
+        self.budget = budget
+        self.size = 0
+        self.pixmaps: 'OrderedDict[ImageKey, QPixmap]' = OrderedDict()
+        # Callbacks waiting on images that are being decoded.
+        self.pending: Dict[ImageKey, List[Callable[[QPixmap], None]]] = {}
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+    @staticmethod
+    def key(path: Path, width: int = 0, height: int = 0) -> ImageKey:
+        """Gets the cache key for an image.
+
+        Args:
+            path: The path of the image.
+            width: The width to scale to, 0 to keep the aspect ratio.
+            height: The height to scale to, 0 to keep the aspect ratio.
+
+        Returns:
+            key: The cache key.
+        """
+        return path.as_posix(), width, height
+
+    @staticmethod
+    def cost(pixmap: QPixmap) -> int:
+        """Gets the number of bytes a pixmap holds.
+
+        Args:
+            pixmap: The pixmap to measure.
+
+        Returns:
+            The size of the pixmap data in bytes.
+        """
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def get(self, path: Path, width: int = 0, height: int = 0) -> Optional[QPixmap]:
+        """Gets a cached pixmap without loading it.
+
+        Args:
+            path: The path of the image.
+            width: The width to scale to, 0 to keep the aspect ratio.
+            height: The height to scale to, 0 to keep the aspect ratio.
+
+        Returns:
+            pixmap: The cached pixmap or None on a cache miss.
+        """
+        key = self.key(path, width, height)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def request(self, path: Path, callback: Callable[[QPixmap], None], width: int = 0, height: int = 0) -> None:
+        """Delivers a pixmap to the callback, right away if cached or once decoded in the background.
+
+        Args:
+            path: The path of the image.
+            callback: The function to call with the pixmap, on the GUI thread.
+            width: The width to scale to, 0 to keep the aspect ratio.
+            height: The height to scale to, 0 to keep the aspect ratio.
+        """
+        pixmap = self.get(path, width, height)
+        if pixmap is not None:
+            count("pixmap.cache_hit")
+            callback(pixmap)
+            return
+
+        count("pixmap.cache_miss")
+        key = self.key(path, width, height)
+        if key in self.pending:
+            # Already decoding, wait for the same result.
+            self.pending[key].append(callback)
+            return
+
+        self.pending[key] = [callback]
+        worker = Worker(load_image, key)
+        worker.signals.finished.connect(self.on_loaded)
+        worker.signals.failed.connect(partial(self.on_failed, key))
+        self.pool.start(worker)
+
+    def on_loaded(self, result: Tuple[ImageKey, QImage]) -> None:
+        """Converts a decoded image to a pixmap, caches it and delivers it.
+
+        Args:
+            result: The key and the decoded image.
+        """
+        key, image = result
+        pixmap = QPixmap.fromImage(image)
+        if not pixmap.isNull():
+            self.insert(key, pixmap)
+
+        for callback in self.pending.pop(key, []):
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                # The widget waiting on the image was deleted before it finished loading.
+                pass
+
+    def on_failed(self, key: ImageKey, error: str) -> None:
+        """Drops the callbacks of an image that could not be loaded, so it is loaded again on the next request.
+
+        Args:
+            key: The cache key.
+            error: The error message.
+        """
+        count("pixmap.failed")
+        self.pending.pop(key, None)
+
+    def insert(self, key: ImageKey, pixmap: QPixmap) -> None:
+        """Adds a pixmap to the cache and evicts the least recently used ones over budget.
+
+        Args:
+            key: The cache key.
+            pixmap: The pixmap to cache.
+        """
+        if key in self.pixmaps:
+            self.size -= self.cost(self.pixmaps.pop(key))
+        self.pixmaps[key] = pixmap
+        self.size += self.cost(pixmap)
+
+        # Always keep the newest pixmap, even if it is larger than the budget on its own.
+        while self.size > self.budget and len(self.pixmaps) > 1:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.size -= self.cost(evicted)
+
+    def clear(self) -> None:
+        """Removes all cached pixmaps."""
+        self.pixmaps.clear()
+        self.size = 0
+
+
+_pixmap_cache: Optional[PixmapCache] = None
+
+
+def get_pixmap_cache() -> PixmapCache:
+    """Gets the shared pixmap cache, creating it on first use.
+
+    Returns:
+        pixmap_cache: The process-wide pixmap cache.
+    """
+    global _pixmap_cache
+
+    if _pixmap_cache is None:
+        _pixmap_cache = PixmapCache()
+    return _pixmap_cache
@@ -0,0 +1,306 @@
+import os
+import shutil
+import tempfile
+from hashlib import sha256
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from xml.etree import ElementTree
+from zipfile import BadZipFile, ZipFile
+
+try:
+    from PySide6.QtCore import QObject, QThreadPool, Signal
+except ImportError:
+    # Fallback to PySide2 if PySide6 is not available
+    from PySide2.QtCore import QObject, QThreadPool, Signal
+
+from .prefs import Paths, Install, KitData
+from .update import HttpClient, kit_path
+from .workers import Worker
+
+
+class InstallError(Exception):
+    """Raised when a kit can't be downloaded or installed, any previous install of the kit is left untouched."""
+
+
+def get_kits_dir() -> Path:
+    """Gets the folder kits are installed to.
+
+    Returns:
+        kits_dir: The MKC_KITS_PATH environment variable if set, otherwise the folder Kit Central is installed in.
+    """
+    return Path(os.environ.get(Install.ENV_KITS, Paths.KITS))
+
+
+def download(
+        url: str, target: Path, digest: str, progress: Callable[[int, int], None] = None,
+        chunk_size: int = 64 * 1024
+) -> None:
+    """Streams a download to disk, hashing it on the way.
+
+    Args:
+        url: The url to download.
+        target: The file to write to.
+        digest: The sha256 the download must have.
+        progress: Called with the received and total number of bytes, the total is 0 if unknown.
+        chunk_size: The number of bytes to read at a time.
+    """
+    client = HttpClient()
+    try:
+        response = client.get(url)
+        if response.status != 200:
+            response.read()
+            raise InstallError(f"Could not download {url}: HTTP {response.status}")
+
+        total = int(response.getheader("Content-Length") or 0)
+        received = reported = 0
+        file_hash = sha256()
+        with target.open('wb') as file:
+            while chunk := response.read(chunk_size):
+                file_hash.update(chunk)
+                file.write(chunk)
+                received += len(chunk)
+                # Report about every percent, not every chunk, so the UI isn't flooded with signals.
+                if progress and received - reported >= max(total // 100, chunk_size):
+                    progress(received, total)
+                    reported = received
+        if progress:
+            progress(received, total)
+    finally:
+        client.close()
+
+    if file_hash.hexdigest() != digest.lower():
+        raise InstallError(f"Download doesn't match its sha256: {url}")
+
+
+def archive_sources(archive: ZipFile) -> List[Tuple[str, str]]:
+    """Gets the files to extract from an LPK or zip and where to extract them to.
+
+    An LPK lists its files and their targets in index.xml, a zip is extracted as is.
+
+    Args:
+        archive: The downloaded archive.
+
+    Returns:
+        sources: The archive member and its target path relative to the kits folder, for every file.
+    """
+    members = [info.filename for info in archive.infolist() if not info.is_dir()]
+    if "index.xml" not in members:
+        return [(member, member) for member in members]
+
+    # Modo looks up the sources case-insensitively.
+    by_name = {member.lower(): member for member in members}
+    with archive.open("index.xml") as index_file:
+        index = ElementTree.parse(index_file)
+
+    sources = []
+    for source in index.iter("source"):
+        member = by_name.get((source.text or "").strip().lower())
+        if member is None:
+            raise InstallError(f"File listed in index.xml is missing: {source.text}")
+        sources.append((member, source.get("target", "").replace("\\", "/")))
+    return sources
+
+
+def extract(archive_path: Path, stage_dir: Path) -> List[str]:
+    """Extracts an archive one file at a time, without reading whole files into memory.
+
+    Args:
+        archive_path: The downloaded LPK or zip.
+        stage_dir: The folder to extract into.
+
+    Returns:
+        kits: The top level folders that were extracted, one per kit.
+    """
+    kits = set()
+    try:
+        with ZipFile(archive_path) as archive:
+            for member, target in archive_sources(archive):
+                target_path = kit_path(stage_dir, target)
+                if len(target_path.relative_to(stage_dir).parts) < 2:
+                    raise InstallError(f"File is not inside a kit folder: {target}")
+                kits.add(target_path.relative_to(stage_dir).parts[0])
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                with archive.open(member) as source, target_path.open('wb') as file:
+                    shutil.copyfileobj(source, file)
+    except BadZipFile as error:
+        raise InstallError(f"Invalid archive: {error}") from error
+
+    return sorted(kits)
+
+
+def swap_kits(kits: List[str], stage_dir: Path, kits_dir: Path) -> None:
+    """Moves the extracted kits into the kits folder, putting the previous installs back if any move fails.
+
+    Args:
+        kits: The extracted kit folders.
+        stage_dir: The folder the kits were extracted to, in the kits folder.
+        kits_dir: The folder kits are installed to.
+    """
+    backup_dir = stage_dir / ".previous"
+    backup_dir.mkdir()
+    backed_up: List[str] = []
+    swapped: List[str] = []
+
+    try:
+        for kit in kits:
+            if (kits_dir / kit).exists():
+                os.replace(kits_dir / kit, backup_dir / kit)
+                backed_up.append(kit)
+            os.replace(stage_dir / kit, kits_dir / kit)
+            swapped.append(kit)
+    except OSError as error:
+        for kit in swapped:
+            shutil.rmtree(kits_dir / kit, ignore_errors=True)
+        for kit in backed_up:
+            os.replace(backup_dir / kit, kits_dir / kit)
+        raise InstallError(f"Could not install {', '.join(kits)}: {error}") from error
+
+
+def install_kit(
+        url: str, digest: str, kits_dir: Path = None, progress: Callable[[int, int], None] = None
+) -> List[Path]:
+    """Downloads, verifies and installs a kit.
+
+    The archive is downloaded to a temporary file and extracted into a temporary folder, both in the kits folder,
+    so the kits can be moved into place without copying once everything succeeded.
+
+    Args:
+        url: The url of the LPK or zip.
+        digest: The sha256 of the archive.
+        kits_dir: The folder to install to, defaults to get_kits_dir().
+        progress: Called with the received and total number of bytes of the download.
+
+    Returns:
+        installed: The installed kit folders.
+    """
+    if not digest:
+        raise InstallError(f"No sha256 to verify the download: {url}")
+    kits_dir = kits_dir or get_kits_dir()
+    kits_dir.mkdir(parents=True, exist_ok=True)
+    suffix = PurePosixPath(urlsplit(url).path).suffix or ".zip"
+
+    file_handle, archive_name = tempfile.mkstemp(suffix=f"{suffix}.download", prefix=".mkc_", dir=kits_dir)
+    os.close(file_handle)
+    archive_path = Path(archive_name)
+    stage_dir = Path(tempfile.mkdtemp(suffix=".install", prefix=".mkc_", dir=kits_dir))
+    try:
+        download(url, archive_path, digest, progress)
+        kits = extract(archive_path, stage_dir)
+        if not kits:
+            raise InstallError(f"No kit in the archive: {url}")
+        swap_kits(kits, stage_dir, kits_dir)
+        return [kits_dir / kit for kit in kits]
+    finally:
+        archive_path.unlink(missing_ok=True)
+        shutil.rmtree(stage_dir, ignore_errors=True)
+
+
+class InstallService(QObject):
+    """Installs kits on a bounded thread pool and reports their progress by kit name."""
+    progress = Signal(str, int, int)
+    finished = Signal(str, list)
+    failed = Signal(str, str)
+
+    def __init__(self, max_installs: int = Install.MAX_INSTALLS, parent: QObject = None) -> None:
+        """Initialization of the install service.
+
+        Args:
+            max_installs: The maximum number of kits downloaded at the same time, more are queued.
+            parent: The parent object.
+        """
+        super(InstallService, self).__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_installs)
+        # Received and total bytes of every queued or running install, by kit name.
+        self.installs: Dict[str, Tuple[int, int]] = {}
+        # Kit name of every running install, by the signals of its worker.
+        self.workers: Dict[QObject, str] = {}
+
+    def is_installing(self, kit_name: str) -> bool:
+        """Checks if a kit is queued or being installed.
+
+        Args:
+            kit_name: The name of the kit.
+
+        Returns:
+            True if the kit is queued or being installed.
+        """
+        return kit_name in self.installs
+
+    def state(self, kit_name: str) -> Optional[Tuple[int, int]]:
+        """Gets the progress of an install.
+
+        Args:
+            kit_name: The name of the kit.
+
+        Returns:
+            The received and total bytes or None if the kit isn't being installed.
+        """
+        return self.installs.get(kit_name)
+
+    def install(self, kit_data: KitData) -> None:
+        """Queues a kit to be installed, unless it is already.
+
+        Args:
+            kit_data: The kit to install.
+        """
+        if self.is_installing(kit_data.name):
+            return
+
+        self.installs[kit_data.name] = (0, 0)
+        worker = Worker(install_kit, kit_data.download, kit_data.sha256)
+        worker.kwargs["progress"] = worker.signals.progress.emit
+        # Slots are methods of the service, so results are delivered even if the widget that queued it is deleted.
+        self.workers[worker.signals] = kit_data.name
+        worker.signals.progress.connect(self.on_progress)
+        worker.signals.finished.connect(self.on_finished)
+        worker.signals.failed.connect(self.on_failed)
+        self.pool.start(worker)
+
+    def on_progress(self, received: int, total: int) -> None:
+        """Forwards the progress of an install.
+
+        Args:
+            received: The number of bytes downloaded.
+            total: The size of the download, 0 if unknown.
+        """
+        kit_name = self.workers[self.sender()]
+        self.installs[kit_name] = (received, total)
+        self.progress.emit(kit_name, received, total)
+
+    def on_finished(self, installed: List[Path]) -> None:
+        """Reports an installed kit.
+
+        Args:
+            installed: The installed kit folders.
+        """
+        kit_name = self.workers.pop(self.sender())
+        self.installs.pop(kit_name, None)
+        self.finished.emit(kit_name, installed)
+
+    def on_failed(self, error: str) -> None:
+        """Reports a failed install.
+
+        Args:
+            error: The error message.
+        """
+        kit_name = self.workers.pop(self.sender())
+        self.installs.pop(kit_name, None)
+        self.failed.emit(kit_name, error)
+
+
+_install_service: Optional[InstallService] = None
+
+
+def get_install_service() -> InstallService:
+    """Gets the shared install service, creating it on first use.
+
+    Returns:
+        install_service: The process-wide install service.
+    """
+    global _install_service
+
+    if _install_service is None:
+        _install_service = InstallService()
+    return _install_service
@@ -0,0 +1,78 @@
+from typing import TYPE_CHECKING
+
+try:
+    from PySide6.QtCore import QTimer
+except ImportError:
+    # Fallback to PySide2 if PySide6 is not available
+    from PySide2.QtCore import QTimer
+
+from .prefs import DATA, Launcher
+
+if TYPE_CHECKING:
+    from .gui import KitCentralWindow
+
+
+def show_window() -> 'KitCentralWindow':
+    """Shows the Kit Central window, only building it if there is no window to reuse.
+
+    Returns:
+        window: The shown window.
+    """
+    # The window module pulls in the widgets and the database, so it is only imported once a window is needed.
+    from .gui import KitCentralWindow
+
+    if DATA.mkc_window is None:
+        DATA.mkc_window = KitCentralWindow()
+    else:
+        DATA.mkc_window.show()
+        DATA.mkc_window.raise_()
+        DATA.mkc_window.activateWindow()
+    return DATA.mkc_window
+
+
+def build_hidden_window() -> None:
+    """Builds the window without showing it, unless it was opened in the meantime."""
+    if DATA.mkc_window is not None:
+        return
+
+    from .gui import KitCentralWindow
+    DATA.mkc_window = KitCentralWindow(show=False)
+    render_when_loaded()
+
+
+def render_when_loaded(polls: int = Launcher.RENDER_POLLS) -> None:
+    """Renders the hidden window once the images it requested are delivered.
+
+    A banner arriving later would change the layout again, so the render waits for the pixmaps. They are decoded on
+    the pixmap cache's threads, so the GUI thread keeps handling events while they load, and a slow image only
+    delays the render up to the given number of checks.
+
+    Args:
+        polls: The number of checks left before rendering without the missing images.
+    """
+    from .images import get_pixmap_cache
+
+    if get_pixmap_cache().pending and polls:
+        QTimer.singleShot(Launcher.RENDER_POLL, lambda: render_when_loaded(polls - 1))
+    else:
+        render_hidden_window()
+
+
+def render_hidden_window() -> None:
+    """Renders the hidden window off-screen, so showing it doesn't polish, lay out and paint every widget first."""
+    window = DATA.mkc_window
+    if window is not None and not window.isVisible():
+        window.grab()
+        # The kit list only lays out its rows once it has its size, so render again to paint the rows.
+        window.tab_kits.kit_view.doItemsLayout()
+        window.grab()
+
+
+def prewarm_window(delay: int = Launcher.PREWARM_DELAY) -> None:
+    """Builds the window hidden once the application is idle, so opening it only has to show it.
+
+    Args:
+        delay: Milliseconds to wait before building, so startup isn't slowed down.
+    """
+    # A zero timer only fires once the event queue is empty, so the build waits for the application to be idle.
+    QTimer.singleShot(delay, lambda: QTimer.singleShot(0, build_hidden_window))
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Callable, ContextManager, Deque, Dict, List
+
+from .prefs import Perf
+
+# Instrumentation is decided once at import, so disabled timers are the undecorated functions.
+ENABLED = Perf.ENV in os.environ
+
+
+def clock() -> int:
+    """Gets a monotonic timestamp for timing.
+
+    Returns:
+        The current time in microseconds.
+    """
+    return time.perf_counter_ns() // 1000
+
+
+class Histogram:
+    """Latency histogram with power of two buckets in microseconds."""
+
+    def __init__(self) -> None:
+        """Initialization of the histogram."""
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        # Number of samples by bucket, bucket n holds the durations from 2^(n-1) up to 2^n microseconds.
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, duration: int) -> None:
+        """Adds a sample.
+
+        Args:
+            duration: The duration in microseconds.
+        """
+        self.min = duration if not self.count else min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.count += 1
+        self.total += duration
+        bucket = duration.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> int:
+        """Estimates a percentile from the buckets.
+
+        Args:
+            fraction: The percentile as a fraction, e.g. 0.95.
+
+        Returns:
+            The upper bound in microseconds of the bucket holding the percentile.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """Gets the histogram as json data.
+
+        Returns:
+            data: The count, total, min, max, mean and p50/p95 in microseconds and the bucket counts.
+        """
+        return {
+            "count": self.count, "total_us": self.total, "min_us": self.min, "max_us": self.max,
+            "mean_us": self.total // self.count if self.count else 0,
+            "p50_us": self.percentile(0.5), "p95_us": self.percentile(0.95),
+            "buckets": {f"<{1 << bucket}us": count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class Recorder:
+    """Thread-safe store of the counters, histograms and recent trace events."""
+
+    def __init__(self, max_events: int = Perf.MAX_EVENTS) -> None:
+        """Initialization of the recorder.
+
+        Args:
+            max_events: The number of trace events to keep, the oldest are dropped first.
+        """
+        self.lock = threading.Lock()
+        self.start = clock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.events: Deque[tuple] = deque(maxlen=max_events)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increments a counter.
+
+        Args:
+            name: The name of the counter.
+            value: The amount to add.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, name: str, start: int, end: int) -> None:
+        """Records a timed call in its histogram and the trace.
+
+        Args:
+            name: The name of the timer.
+            start: The clock() the call started at.
+            end: The clock() the call ended at.
+        """
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(end - start)
+            self.events.append((name, start, end - start, threading.get_ident()))
+
+    def reset(self) -> None:
+        """Clears everything recorded so far."""
+        with self.lock:
+            self.start = clock()
+            self.counters.clear()
+            self.histograms.clear()
+            self.events.clear()
+
+    def to_dict(self) -> dict:
+        """Gets the counters and histograms as json data.
+
+        Returns:
+            data: The counters and the histograms by name.
+        """
+        with self.lock:
+            return {
+                "counters": dict(sorted(self.counters.items())),
+                "histograms": {name: self.histograms[name].to_dict() for name in sorted(self.histograms)},
+            }
+
+    def chrome_trace(self) -> dict:
+        """Gets the recorded events in the Chrome trace event format, for chrome://tracing or Perfetto.
+
+        Returns:
+            trace: The complete events of every timed call and the final value of every counter.
+        """
+        pid = os.getpid()
+        with self.lock:
+            events: List[dict] = [
+                {"name": name, "cat": name.split(".")[0], "ph": "X", "ts": start - self.start, "dur": duration,
+                 "pid": pid, "tid": tid}
+                for name, start, duration, tid in self.events
+            ]
+            end = clock() - self.start
+            events.extend(
+                {"name": name, "ph": "C", "ts": end, "pid": pid, "args": {name: value}}
+                for name, value in self.counters.items()
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def report(self) -> str:
+        """Formats the counters and histograms as a plain text table.
+
+        Returns:
+            report: The text of the table.
+        """
+        data = self.to_dict()
+        lines = [f"{'timer':<32}{'count':>7}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, histogram in data["histograms"].items():
+            lines.append(
+                f"{name:<32}{histogram['count']:>7}{histogram['mean_us'] / 1e3:>10.2f}"
+                f"{histogram['p95_us'] / 1e3:>10.2f}{histogram['max_us'] / 1e3:>10.2f}"
+            )
+        lines.append("")
+        lines.append(f"{'counter':<32}{'value':>7}")
+        lines.extend(f"{name:<32}{value:>7}" for name, value in data["counters"].items())
+        return "\n".join(lines)
+
+
+# Shared recorder for all instrumentation.
+RECORDER = Recorder()
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator that records the duration of every call of a function.
+
+    Args:
+        name: The name of the timer, the part before the first dot is its category.
+
+    Returns:
+        decorator: Returns the function itself when instrumentation is disabled, so it costs nothing.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                RECORDER.record(name, start, clock())
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def _span(name: str):
+    """Records the duration of the with block.
+
+    Args:
+        name: The name of the timer.
+    """
+    start = clock()
+    try:
+        yield
+    finally:
+        RECORDER.record(name, start, clock())
+
+
+def span(name: str) -> ContextManager:
+    """Times a with block.
+
+    Args:
+        name: The name of the timer.
+
+    Returns:
+        context: A context manager recording the block, or one that does nothing when instrumentation is disabled.
+    """
+    return _span(name) if ENABLED else nullcontext()
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increments a counter when instrumentation is enabled.
+
+    Args:
+        name: The name of the counter.
+        value: The amount to add.
+    """
+    if ENABLED:
+        RECORDER.count(name, value)
+
+
+def record(name: str, start: int) -> None:
+    """Records a duration that started elsewhere, e.g. when a background result arrives.
+
+    Args:
+        name: The name of the timer.
+        start: The clock() the operation started at.
+    """
+    if ENABLED:
+        RECORDER.record(name, start, clock())
+
+
+def export_json(path: Path) -> None:
+    """Writes the counters and histograms to a json file.
+
+    Args:
+        path: The file to write.
+    """
+    path.write_text(json.dumps(RECORDER.to_dict(), indent=1))
+
+
+def export_chrome_trace(path: Path) -> None:
+    """Writes the recorded calls as a Chrome trace, to open in chrome://tracing or Perfetto.
+
+    Args:
+        path: The file to write.
+    """
+    path.write_text(json.dumps(RECORDER.chrome_trace()))
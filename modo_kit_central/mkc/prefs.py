@@ -1,9 +1,12 @@
 import json
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, TYPE_CHECKING
+from sys import intern
+from typing import Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
+    import sqlite3
     from .gui import KitCentralWindow
 
 
@@ -20,22 +23,93 @@ class Paths:
     KIT_ROOT = Path(__file__).parent.parent.absolute()
     RESOURCES = KIT_ROOT / "resources"
     DATABASE = RESOURCES / "kits.db"
+    # Conditional request headers of the last synced catalog, and a synced catalog waiting to replace the database.
+    CATALOG_STATE = RESOURCES / "kits_sync.json"
+    CATALOG_PENDING = RESOURCES / "kits.db.pending"
+    # Avatars and banners packed at build time, kept apart from the kits database that catalog syncs replace.
+    IMAGE_DATABASE = RESOURCES / "images.db"
     IMAGES = RESOURCES / "images"
     ICON = IMAGES / "icon.png"
     IMAGES_CSS = IMAGES / "css"
     BANNERS = IMAGES / "banners"
     BANNER_MKC = BANNERS / "Modo Kit Central.png"
+    # Kit Central is installed in the user Kits folder, next to the kits it installs.
+    KITS = KIT_ROOT.parent
+    # Updates are downloaded next to the kit, so they can be moved into it without copying.
+    UPDATE_STAGE = KIT_ROOT.parent / f".{KIT_ROOT.name}_update"
 
 
 class Text:
     title = "Modo Kit Central"
     author = "Author: <a href='{}' style='color: white'>{}</a>"
     lbl_link = "<a href='{link}' style='color: white'>{text}</a>"
+    search = "Search {count} kits..."
+    search_failed = "Search failed: {error}"
+    sync_failed = "Catalog sync failed, showing the installed catalog: {error}"
+
+
+class Update:
+    # Url the release manifest and kit files are published at, overridden by the ENV_URL environment variable.
+    URL = ""
+    ENV_URL = "MKC_UPDATE_URL"
+    MANIFEST = "manifest.json"
+    # Manifest name of the kits database, it is only installed when newer than the synced catalog.
+    DATABASE = "resources/kits.db"
+    TIMEOUT = 30
+
+
+class Install:
+    # Folder to install kits to instead of Paths.KITS.
+    ENV_KITS = "MKC_KITS_PATH"
+    # Number of kits downloaded at the same time, more are queued.
+    MAX_INSTALLS = 2
+
+
+class Catalog:
+    # Url newer catalogs are published at, overridden by the ENV_URL environment variable.
+    URL = ""
+    ENV_URL = "MKC_CATALOG_URL"
+    DATABASE = "kits.db"
+    # Row delta from the given catalog version to the published one.
+    DELTA = "kits-delta-{version}.json"
+
+
+class Database:
+    # Kits read per page, lists show the first page right away and read more as they are scrolled.
+    PAGE_SIZE = 50
+    # Kits kept by a list that aren't displayed, so clearing a search shows them again without reading them.
+    KIT_CACHE_SIZE = 1000
+    # Bytes of the database mapped into memory, so searches read its pages without a read from disk per page.
+    # The mapping is shared by every connection and backed by the file instead of the kit's own memory.
+    MMAP_SIZE = 256 * 1024 * 1024
+
+
+class Launcher:
+    # Builds the window hidden once Modo is idle after startup, set to enable.
+    ENV_PREWARM = "MKC_PREWARM"
+    # Milliseconds after startup before the window is prewarmed.
+    PREWARM_DELAY = 5000
+    # Milliseconds between checks if the images of the prewarmed window are decoded, and the number of checks
+    # before it is rendered without them.
+    RENDER_POLL = 50
+    RENDER_POLLS = 20
+    # Milliseconds the window stays hidden before its heavy children are dropped.
+    TRIM_AFTER = 10 * 60 * 1000
+
+
+class Perf:
+    # Records timings of the hot paths and adds the hidden performance tab, set to enable.
+    ENV = "MKC_PERF"
+    # Number of recent calls kept for the trace export.
+    MAX_EVENTS = 20000
+    # Shortcut that shows or hides the performance tab.
+    SHORTCUT = "Ctrl+Shift+P"
 
 
 class KEYS:
     KITS = "kits"
     AUTHORS = "authors"
+    PERF = "perf"
 
 
 class KIT:
@@ -43,11 +117,28 @@ class KIT:
     NAME = "modo_kit_central"
     NICE_NAME = "Modo Kit Central"
     CMD_LAUNCHER = f"{ABV}.launcher"
+    CMD_UPDATE = f"{ABV}.update"
+    CMD_PREWARM = f"{ABV}.prewarm"
 
 
-@dataclass
+@lru_cache(maxsize=4096)
+def split_tags(search: str) -> Tuple[str, ...]:
+    """Splits the comma separated search tags of a kit into interned tags.
+
+    Kits often have the same tags, so the tags of a search string are only split once and shared while cached.
+
+    Args:
+        search: The comma separated search tags of the kit.
+
+    Returns:
+        tags: The tags.
+    """
+    return tuple(map(intern, search.split(",")))
+
+
+@dataclass(frozen=True, slots=True)
 class KitData:
-    """Dataclass for the kit's information."""
+    """Immutable record of the kit's information, created from a database row by from_row."""
     id: int
     name: str
     author: str
@@ -56,32 +147,148 @@ class KitData:
     url: str
     help: str
     installable: bool
-    search: List[str]
+    # The comma separated search tags as stored in the database, split when they are read, see search.
+    search_text: str
+    # Url of the LPK or zip to install and its sha256, set for installable kits.
+    download: Optional[str] = None
+    sha256: Optional[str] = None
+    # Oldest and newest Modo version the kit supports, None if unknown.
+    modo_min: Optional[int] = None
+    modo_max: Optional[int] = None
 
-    # Search will come in as a comma separated string, so we need to convert it to a list.
-    def __post_init__(self) -> None:
-        """Convert the search string to a list."""
-        self.search = self.search.split(",") if self.search else []
+    @property
+    def search(self) -> Tuple[str, ...]:
+        """The search tags of the kit, split once per distinct tags text by split_tags."""
+        return split_tags(self.search_text) if self.search_text else ()
 
+    @classmethod
+    def from_row(cls, cursor: Optional['sqlite3.Cursor'], row: tuple) -> 'KitData':
+        """Row factory creating the kit from the columns of QueryData.KitColumns.
 
-@dataclass
+        Authors repeat across many kits, so they are interned to share a single string. The search tags are only
+        split when they are read, loading a page of kits doesn't need them.
+
+        Args:
+            cursor: The cursor the row was read with, unused.
+            row: The kit columns.
+
+        Returns:
+            kit_data: The kit.
+        """
+        (
+            kit_id, name, author, version, description, url, help_url, installable, search, download, sha256,
+            modo_min, modo_max
+        ) = row
+        return cls(
+            kit_id, name, intern(author) if author else author, version, description, url, help_url,
+            bool(installable), search, download, sha256, modo_min, modo_max
+        )
+
+
+@dataclass(frozen=True, slots=True)
 class AuthorData:
-    """Dataclass for the author's information."""
+    """Immutable record of the author's information, created from a database row by from_row."""
     id: int
     name: str
     avatar: str
     handle: str
-    links: Dict[str, str]
+    # Name and url of the author's links, in the order they are shown.
+    links: Tuple[Tuple[str, str], ...]
+
+    @classmethod
+    def from_row(cls, cursor: Optional['sqlite3.Cursor'], row: tuple) -> 'AuthorData':
+        """Row factory creating the author from the columns of QueryData.AuthorColumns.
+
+        The links are stored as json and parsed here, once per row.
+
+        Args:
+            cursor: The cursor the row was read with, unused.
+            row: The author columns.
+
+        Returns:
+            author_data: The author.
+        """
+        author_id, name, avatar, handle, links = row
+        return cls(author_id, intern(name), avatar, handle, tuple(json.loads(links).items()) if links else ())
+
+
+@dataclass(frozen=True, slots=True)
+class AddOnData:
+    """Immutable record of the information of a kit's add-on."""
+    name: str
+    url: str
+    description: str
+
+    @classmethod
+    def from_row(cls, cursor: Optional['sqlite3.Cursor'], row: tuple) -> 'AddOnData':
+        """Row factory creating the add-on from the columns of QueryData.SelectAddOns.
+
+        Args:
+            cursor: The cursor the row was read with, unused.
+            row: The add-on columns.
 
-    def __post_init__(self):
-        """Convert the links json string to a dictionary."""
-        self.links = json.loads(self.links) if self.links else {}
+        Returns:
+            add_on_data: The add-on.
+        """
+        return cls(*row)
 
 
 @dataclass
 class QueryData:
     """Dataclass for the query data."""
-    SelectKits: str = "SELECT * FROM kits WHERE TRUE"
-    SearchTerm: str = " AND (name LIKE ? OR author LIKE ? OR search LIKE ? OR Description LIKE ?)"
-    SelectAuthor: str = "SELECT * FROM authors WHERE name LIKE ?"
-    SelectKitsByAuthor: str = "SELECT * FROM kits WHERE author = ?"
+    # Columns in the order KitData and AuthorData expect them, with the author name joined by its id.
+    KitColumns: str = (
+        "k.id, k.name, a.name, k.version, k.description, k.url, k.help, k.installable, k.search, k.download, "
+        "k.sha256, k.modo_min, k.modo_max"
+    )
+    AuthorColumns: str = "a.id, a.name, a.avatar, a.handle, a.links"
+    KitsJoin: str = "kits AS k LEFT JOIN authors AS a ON a.id = k.author_id"
+    SelectKits: str = f"SELECT {KitColumns} FROM {KitsJoin} ORDER BY k.id"
+    SelectKitIds: str = "SELECT id FROM kits"
+    CountKits: str = "SELECT count(*) FROM kits"
+    # Pages are read by keyset pagination, the kits after the last id of the previous page.
+    SelectKitsPage: str = f"SELECT {KitColumns} FROM {KitsJoin} WHERE k.id > ? ORDER BY k.id LIMIT ?"
+    # The kits whose ids are given as a json array, in any order.
+    SelectKitsById: str = f"SELECT {KitColumns} FROM {KitsJoin} WHERE k.id IN (SELECT value FROM json_each(?))"
+    # Column weights for bm25 are ordered: name, author, description, search, add-ons. Equal ranks are ordered by
+    # id, so a search ranks its kits the same however they were found.
+    KitsRank: str = "bm25(kits_fts, 10.0, 5.0, 1.0, 2.0, 1.0), rowid"
+    SearchKits: str = f"SELECT rowid FROM kits_fts WHERE kits_fts MATCH ? ORDER BY {KitsRank}"
+    # Searches and ranks the kits whose ids are given as a json array, like SearchKits. The unary plus keeps the ids
+    # from being looked up in the index one by one, they only filter the matches.
+    RankKits: str = (
+        "SELECT rowid FROM kits_fts WHERE kits_fts MATCH ? AND +rowid IN (SELECT value FROM json_each(?)) "
+        f"ORDER BY {KitsRank}"
+    )
+    SelectAuthor: str = f"SELECT {AuthorColumns} FROM authors AS a WHERE a.name = ?"
+    SelectKitsByAuthor: str = f"SELECT {KitColumns} FROM {KitsJoin} WHERE a.name = ? ORDER BY k.id"
+    SelectKitsByAuthorPage: str = (
+        f"SELECT {KitColumns} FROM {KitsJoin} WHERE a.name = ? AND k.id > ? ORDER BY k.id LIMIT ?"
+    )
+    # The author and the first page of their kits in one query, kit columns are NULL if the author has no kits.
+    SelectAuthorPage: str = (
+        f"SELECT {AuthorColumns}, {KitColumns} FROM authors AS a "
+        "LEFT JOIN kits AS k ON k.author_id = a.id WHERE a.name = ? ORDER BY k.id LIMIT ?"
+    )
+    # Add-ons are only read for a single kit, through the add-ons kit_id index.
+    SelectAddOns: str = "SELECT name, url, description FROM add_ons WHERE kit_id = ? ORDER BY name"
+    # The searchable text of a kit's add-ons, in the same form as the build script indexes it.
+    AddOnText: str = "group_concat(name || ' ' || coalesce(description, ''), ' ')"
+    # Keeps the search index in sync when a catalog delta is applied.
+    SelectAuthorKitIds: str = "SELECT id FROM kits WHERE author_id = ?"
+    UnlinkAuthorKits: str = "UPDATE kits SET author_id = NULL WHERE author_id = ?"
+    # Kits referencing an author that isn't in the database.
+    CountDanglingKits: str = (
+        "SELECT count(*) FROM kits AS k LEFT JOIN authors AS a ON a.id = k.author_id "
+        "WHERE k.author_id IS NOT NULL AND a.id IS NULL"
+    )
+    SelectAddOnKitIds: str = "SELECT kit_id FROM add_ons WHERE id = ?"
+    DeleteKitFts: str = "DELETE FROM kits_fts WHERE rowid = ?"
+    InsertKitFts: str = (
+        "INSERT INTO kits_fts (rowid, name, author, description, search, add_ons) "
+        "SELECT k.id, k.name, a.name, k.description, k.search, "
+        f"(SELECT {AddOnText} FROM add_ons WHERE kit_id = k.id) FROM {KitsJoin} WHERE k.id = ?"
+    )
+    # Packed images are read from Paths.IMAGE_DATABASE, their size without reading the image data.
+    SelectImage: str = "SELECT data FROM images WHERE name = ?"
+    SelectImageSize: str = "SELECT width, height FROM images WHERE name = ?"
@@ -0,0 +1,366 @@
+import json
+import os
+import shutil
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urljoin
+
+try:
+    from PySide6.QtCore import QThreadPool
+except ImportError:
+    # Fallback to PySide2 if PySide6 is not available
+    from PySide2.QtCore import QThreadPool
+
+from .prefs import Paths, Catalog, QueryData
+from .update import HttpClient, read_json
+from .workers import Worker
+
+
+class SyncError(Exception):
+    """Raised when a catalog can't be downloaded or is invalid, the installed catalog is left untouched."""
+
+
+@dataclass
+class SyncResult:
+    """Summary of a catalog sync."""
+    version: int
+    # How the catalog was updated: "delta", "full" or "" if it was already current.
+    method: str = ""
+    # Set when the catalog could not replace the open database and is applied on the next sync.
+    pending: bool = False
+
+    @property
+    def changed(self) -> bool:
+        """If the database was replaced."""
+        return bool(self.method) and not self.pending
+
+
+def get_catalog_url() -> Optional[str]:
+    """Gets the url newer catalogs are published at.
+
+    Returns:
+        url: The catalog url, the MKC_CATALOG_URL environment variable takes priority over the preferences.
+            None if catalog sync isn't configured.
+    """
+    url = os.environ.get(Catalog.ENV_URL, Catalog.URL)
+    return url.rstrip("/") + "/" if url else None
+
+
+def catalog_version(database: Path) -> int:
+    """Gets the catalog version of a database.
+
+    Args:
+        database: The database file.
+
+    Returns:
+        version: The user_version of the database, bumped by the builder every time the catalog changes.
+    """
+    connection = sqlite3.connect(f"{database.as_uri()}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def validate_catalog(database: Path) -> int:
+    """Checks that a downloaded database is intact and has every table and column the kit reads.
+
+    Args:
+        database: The database file to check.
+
+    Returns:
+        version: The catalog version of the database.
+    """
+    try:
+        connection = sqlite3.connect(f"{database.as_uri()}?mode=ro", uri=True)
+        try:
+            if connection.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+                raise SyncError("Catalog failed the integrity check.")
+            # Run the queries the kit depends on, a missing table or column raises.
+            connection.execute(f"{QueryData.SelectKits} LIMIT 1").fetchall()
+            connection.execute(QueryData.SelectAuthor, [""]).fetchall()
+            connection.execute(QueryData.SearchKits, ['"kit"']).fetchall()
+            return connection.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError as error:
+        raise SyncError(f"Invalid catalog: {error}") from error
+
+
+def apply_delta(database: Path, delta: dict) -> int:
+    """Applies a row delta to a database in a single transaction.
+
+    The delta holds every author, kit and add-on row that changed since its `from_version`, keyed by id, and the
+    ids of the removed ones:
+        {"from_version": 3, "version": 4, "authors": [{"id": 1, ...}], "kits": [{"id": 7, ...}], "add_ons": [],
+         "removed_authors": [], "removed_kits": [9], "removed_add_ons": [2]}
+
+    Args:
+        database: The writable copy of the database to update.
+        delta: The row delta.
+
+    Returns:
+        version: The catalog version after the delta.
+    """
+    connection = sqlite3.connect(database, isolation_level=None)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("BEGIN")
+        if cursor.execute("PRAGMA user_version").fetchone()[0] != delta["from_version"]:
+            raise SyncError("Catalog delta doesn't apply to the installed catalog.")
+
+        # The index holds the add-on text of every kit, so the kits of removed add-ons need to be reindexed too.
+        kit_ids = set()
+        for add_on_id in delta["removed_add_ons"]:
+            kit_ids.update(kit_id for kit_id, in cursor.execute(QueryData.SelectAddOnKitIds, [add_on_id]))
+        # The kits of removed authors are kept without an author, like the builder does, and reindexed without
+        # the author's name.
+        for author_id in delta["removed_authors"]:
+            kit_ids.update(kit_id for kit_id, in cursor.execute(QueryData.SelectAuthorKitIds, [author_id]))
+            cursor.execute(QueryData.UnlinkAuthorKits, [author_id])
+
+        for table in ("authors", "kits", "add_ons"):
+            # Only write the columns the table has, so the delta can't inject anything else.
+            columns = {column[1] for column in cursor.execute(f"PRAGMA table_info({table})")}
+            removed = [[row_id] for row_id in delta[f"removed_{table}"]]
+            cursor.executemany(f"DELETE FROM {table} WHERE id = ?", removed)
+            for row in delta[table]:
+                if not row.keys() <= columns:
+                    raise SyncError(f"Unknown {table} columns in catalog delta: {sorted(row.keys() - columns)}")
+                names = ", ".join(row)
+                values = ", ".join("?" * len(row))
+                cursor.execute(f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({values})", list(row.values()))
+
+        # Reindex the changed kits, the kits of changed add-ons and the kits of changed authors since the index
+        # holds the author name.
+        kit_ids.update(row["id"] for row in delta["kits"])
+        kit_ids.update(row["kit_id"] for row in delta["add_ons"])
+        for author in delta["authors"]:
+            kit_ids.update(kit_id for kit_id, in cursor.execute(QueryData.SelectAuthorKitIds, [author["id"]]))
+        reindex = [[kit_id] for kit_id in sorted(kit_ids | set(delta["removed_kits"]))]
+        cursor.executemany(QueryData.DeleteKitFts, reindex)
+        cursor.executemany(QueryData.InsertKitFts, reindex)
+        # A kit of the delta may still reference an author that isn't in the catalog.
+        if cursor.execute(QueryData.CountDanglingKits).fetchone()[0]:
+            raise SyncError("Catalog delta references authors that aren't in the catalog.")
+
+        cursor.execute(f"PRAGMA user_version = {int(delta['version'])}")
+        cursor.execute("COMMIT")
+    except (sqlite3.DatabaseError, KeyError, TypeError, AttributeError) as error:
+        cursor.execute("ROLLBACK")
+        raise SyncError(f"Invalid catalog delta: {error}") from error
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+    return delta["version"]
+
+
+def fetch_delta(client: HttpClient, base_url: str, version: int, target: Path) -> bool:
+    """Downloads the delta from a catalog version and applies it to a copy of the database.
+
+    Args:
+        client: The http client.
+        base_url: The catalog url.
+        version: The installed catalog version.
+        target: The temporary file to write the updated database to.
+
+    Returns:
+        True if a delta was published for the version and applied to the target.
+    """
+    response = client.get(urljoin(base_url, Catalog.DELTA.format(version=version)))
+    data = response.read()
+    if response.status == 404:
+        return False
+    if response.status != 200:
+        raise SyncError(f"Could not get the catalog delta: HTTP {response.status}")
+
+    try:
+        delta = json.loads(data)
+    except ValueError as error:
+        raise SyncError(f"Invalid catalog delta: {error}") from error
+    shutil.copyfile(Paths.DATABASE, target)
+    apply_delta(target, delta)
+    return True
+
+
+def fetch_database(client: HttpClient, base_url: str, validators: dict, target: Path) -> bool:
+    """Downloads the full catalog database, unless it didn't change since the last sync.
+
+    Args:
+        client: The http client.
+        base_url: The catalog url.
+        validators: The ETag and Last-Modified of the last downloaded database, updated with the new ones.
+        target: The temporary file to download to.
+
+    Returns:
+        True if the database was downloaded to the target.
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = client.get(urljoin(base_url, Catalog.DATABASE), headers)
+    if response.status == 304:
+        response.read()
+        return False
+    if response.status != 200:
+        response.read()
+        raise SyncError(f"Could not get the catalog: HTTP {response.status}")
+
+    # Stream to disk, the catalog is never held in memory.
+    with target.open('wb') as file:
+        shutil.copyfileobj(response, file)
+
+    validators["etag"] = response.getheader("ETag")
+    validators["last_modified"] = response.getheader("Last-Modified")
+    return True
+
+
+def pending_path(database: Path) -> Path:
+    """Gets the path a catalog waits at until it can replace the database.
+
+    Args:
+        database: The kits database.
+
+    Returns:
+        path: The pending catalog next to the database, Paths.CATALOG_PENDING for Paths.DATABASE.
+    """
+    return database.with_name(f"{database.name}.pending")
+
+
+def replace_database(source: Path, database: Path = None) -> bool:
+    """Atomically replaces the kits database.
+
+    Connections to the old file keep reading it until they notice the new file and reopen. Where the open
+    file can't be replaced, the catalog is kept as pending and swapped in by apply_pending before the next window
+    opens the database.
+
+    Args:
+        source: The validated database, on the same volume as the kits database.
+        database: The kits database to replace, defaults to Paths.DATABASE.
+
+    Returns:
+        True if the database was replaced, False if it is pending.
+    """
+    database = database or Paths.DATABASE
+    try:
+        os.replace(source, database)
+        return True
+    except PermissionError:
+        os.replace(source, pending_path(database))
+        return False
+
+
+def apply_pending(database: Path = None) -> bool:
+    """Swaps in the catalog a sync or kit update left pending.
+
+    Windows can't replace the database while any thread has it open, so the window calls this before it opens the
+    database, the only time no connection holds the file.
+
+    Args:
+        database: The kits database, defaults to Paths.DATABASE.
+
+    Returns:
+        True if a pending catalog replaced the database.
+    """
+    database = database or Paths.DATABASE
+    pending = pending_path(database)
+    if not pending.exists():
+        return False
+    try:
+        # Never go back to an older catalog, e.g. when the database was synced after an update left it pending.
+        if database.exists() and catalog_version(pending) <= catalog_version(database):
+            pending.unlink()
+            return False
+    except sqlite3.DatabaseError:
+        pending.unlink()
+        return False
+    try:
+        os.replace(pending, database)
+    except PermissionError:
+        return False
+    return True
+
+
+def sync_catalog(base_url: str = None, client: HttpClient = None) -> SyncResult:
+    """Updates the kits database to the newest published catalog.
+
+    A delta from the installed catalog version is tried first, the full database is only downloaded when no delta
+    is published for it. Either way the new catalog is built in a temporary file next to the database, validated and
+    then swapped in, so the installed catalog is never partially written.
+
+    Args:
+        base_url: The url catalogs are published at, defaults to get_catalog_url().
+        client: The http client, a new one is created and closed if not given.
+
+    Returns:
+        result: The installed catalog version and how it was updated.
+    """
+    base_url = base_url.rstrip("/") + "/" if base_url else get_catalog_url()
+    if not base_url:
+        raise SyncError(f"No catalog url, set {Catalog.ENV_URL} to the url catalogs are published at.")
+
+    # A catalog that couldn't replace the open database on the last sync.
+    if apply_pending():
+        return SyncResult(version=catalog_version(Paths.DATABASE), method="pending")
+
+    own_client = client is None
+    client = client or HttpClient()
+    version = catalog_version(Paths.DATABASE)
+    validators = read_json(Paths.CATALOG_STATE)
+    # The headers only apply while the database is at least as new as the last download,
+    # e.g. a kit update may have installed an older catalog since.
+    if validators.get("version", version + 1) > version:
+        validators = {}
+    temp_path = Paths.DATABASE.with_name(f"{Paths.DATABASE.name}.download")
+
+    try:
+        if fetch_delta(client, base_url, version, temp_path):
+            method = "delta"
+        elif fetch_database(client, base_url, validators, temp_path):
+            method = "full"
+        else:
+            return SyncResult(version=version)
+
+        new_version = validate_catalog(temp_path)
+        if method == "full":
+            validators["version"] = new_version
+            Paths.CATALOG_STATE.write_text(json.dumps(validators))
+        # Never go back to an older catalog, e.g. when the kit shipped with a newer one.
+        if new_version <= version:
+            return SyncResult(version=version)
+
+        replaced = replace_database(temp_path)
+        return SyncResult(version=new_version, method=method, pending=not replaced)
+    finally:
+        temp_path.unlink(missing_ok=True)
+        if own_client:
+            client.close()
+
+
+def start_sync(
+        on_finished: Callable[[SyncResult], None], on_failed: Callable[[str], None] = None, base_url: str = None
+) -> Worker:
+    """Syncs the catalog on a background thread.
+
+    Args:
+        on_finished: Called with the SyncResult on the calling thread.
+        on_failed: Called with the error message on the calling thread.
+        base_url: The url catalogs are published at, defaults to get_catalog_url().
+
+    Returns:
+        worker: The worker running the sync.
+    """
+    worker = Worker(sync_catalog, base_url)
+    worker.signals.finished.connect(on_finished)
+    if on_failed:
+        worker.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(worker)
+    return worker
@@ -1 +1,408 @@
-# TODO: Add an auto update method for users to easily update to the latest version
+import json
+import os
+import shutil
+import sqlite3
+from dataclasses import dataclass, field
+from hashlib import sha256
+from http.client import HTTPConnection, HTTPSConnection, HTTPResponse, HTTPException
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, quote
+
+try:
+    from PySide6.QtCore import QThreadPool
+except ImportError:
+    # Fallback to PySide2 if PySide6 is not available
+    from PySide2.QtCore import QThreadPool
+
+from .prefs import Paths, Update
+from .workers import Worker
+
+
+class UpdateError(Exception):
+    """Raised when an update can't be downloaded or applied, the installed kit is left untouched."""
+
+
+@dataclass
+class UpdateResult:
+    """Summary of an update."""
+    version: str
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    downloaded: int = 0
+
+    @property
+    def changed(self) -> bool:
+        """If any file was updated or removed."""
+        return bool(self.updated or self.removed)
+
+
+class HttpClient:
+    """Minimal HTTP client that keeps one connection open per host so every file reuses it."""
+
+    def __init__(self, timeout: float = Update.TIMEOUT) -> None:
+        """Initialization of the client.
+
+        Args:
+            timeout: The timeout of every connection in seconds.
+        """
+        self.timeout = timeout
+        self.connections: Dict[Tuple[str, str], HTTPConnection] = {}
+
+    def connection(self, scheme: str, host: str) -> HTTPConnection:
+        """Gets the open connection to a host, opening it if needed.
+
+        Args:
+            scheme: The url scheme, http or https.
+            host: The host and port.
+
+        Returns:
+            connection: The connection to the host.
+        """
+        key = (scheme, host)
+        if key not in self.connections:
+            connection_type = HTTPSConnection if scheme == "https" else HTTPConnection
+            self.connections[key] = connection_type(host, timeout=self.timeout)
+        return self.connections[key]
+
+    def get(self, url: str, headers: Dict[str, str] = None, redirects: int = 5) -> HTTPResponse:
+        """Sends a GET request, following redirects. The response must be read fully before the next request.
+
+        Args:
+            url: The url to request.
+            headers: The request headers.
+            redirects: The maximum number of redirects to follow.
+
+        Returns:
+            response: The response, with its body unread.
+        """
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        key = (parts.scheme, parts.netloc)
+
+        # A kept alive connection may have been closed by the server, retry once on a new connection.
+        for attempt in range(2):
+            connection = self.connection(*key)
+            try:
+                connection.request("GET", path, headers=headers or {})
+                response = connection.getresponse()
+                break
+            except (HTTPException, ConnectionError):
+                connection.close()
+                del self.connections[key]
+                if attempt:
+                    raise
+
+        location = response.getheader("Location")
+        if response.status in (301, 302, 303, 307, 308) and location:
+            response.read()
+            if not redirects:
+                raise UpdateError(f"Too many redirects: {url}")
+            return self.get(urljoin(url, location), headers, redirects - 1)
+
+        return response
+
+    def close(self) -> None:
+        """Closes all connections."""
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+
+def get_update_url() -> str:
+    """Gets the url the release manifest and files are published at.
+
+    Returns:
+        url: The release url, the MKC_UPDATE_URL environment variable takes priority over the preferences.
+    """
+    url = os.environ.get(Update.ENV_URL, Update.URL)
+    if not url:
+        raise UpdateError(f"No update url, set {Update.ENV_URL} to the url of the release.")
+    return url.rstrip("/") + "/"
+
+
+def read_json(path: Path) -> dict:
+    """Reads a json file.
+
+    Args:
+        path: The file to read.
+
+    Returns:
+        data: The json data or an empty dictionary if the file doesn't exist or is invalid.
+    """
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hashes a file in chunks.
+
+    Args:
+        path: The file to hash.
+        chunk_size: The number of bytes to read at a time.
+
+    Returns:
+        The sha256 hex digest of the file.
+    """
+    digest = sha256()
+    with path.open('rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def kit_path(kit_root: Path, name: str) -> Path:
+    """Resolves a relative file name from a manifest or archive inside the kit, refusing names outside of it.
+
+    Args:
+        kit_root: The kit folder.
+        name: The relative path of the file.
+
+    Returns:
+        path: The path of the file in the kit.
+    """
+    relative = PurePosixPath(name.replace("\\", "/"))
+    # Drive letters are refused too, they would escape the kit on Windows.
+    if relative.is_absolute() or not relative.parts or any(part == ".." or ":" in part for part in relative.parts):
+        raise UpdateError(f"Invalid file path: {name}")
+    return kit_root.joinpath(*relative.parts)
+
+
+def is_current(path: Path, info: dict) -> bool:
+    """Checks if an installed file matches the manifest, comparing the size before hashing.
+
+    Args:
+        path: The installed file.
+        info: The size and sha256 of the file in the manifest.
+
+    Returns:
+        True if the file doesn't need to be downloaded.
+    """
+    return path.is_file() and path.stat().st_size == info["size"] and hash_file(path) == info["sha256"]
+
+
+def fetch_manifest(client: HttpClient, base_url: str, validators: dict) -> Optional[bytes]:
+    """Downloads the release manifest, unless it didn't change since the last update.
+
+    Args:
+        client: The http client.
+        base_url: The release url.
+        validators: The ETag and Last-Modified of the last applied manifest, updated with the new ones.
+
+    Returns:
+        The manifest data or None if it is unchanged.
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = client.get(urljoin(base_url, Update.MANIFEST), headers)
+    data = response.read()
+    if response.status == 304:
+        return None
+    if response.status != 200:
+        raise UpdateError(f"Could not get the release manifest: HTTP {response.status}")
+
+    validators["etag"] = response.getheader("ETag")
+    validators["last_modified"] = response.getheader("Last-Modified")
+    return data
+
+
+def download_file(client: HttpClient, url: str, target: Path, info: dict, chunk_size: int = 64 * 1024) -> int:
+    """Streams a file to disk and verifies it against the manifest.
+
+    Args:
+        client: The http client.
+        url: The url of the file.
+        target: The path to download to.
+        info: The size and sha256 of the file in the manifest.
+        chunk_size: The number of bytes to read at a time.
+
+    Returns:
+        size: The number of bytes downloaded.
+    """
+    response = client.get(url)
+    if response.status != 200:
+        response.read()
+        raise UpdateError(f"Could not download {url}: HTTP {response.status}")
+
+    digest = sha256()
+    size = 0
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open('wb') as file:
+        while chunk := response.read(chunk_size):
+            digest.update(chunk)
+            file.write(chunk)
+            size += len(chunk)
+
+    if size != info["size"] or digest.hexdigest() != info["sha256"]:
+        raise UpdateError(f"Downloaded file doesn't match the manifest: {url}")
+    return size
+
+
+def swap_files(kit_root: Path, stage_dir: Path, updated: List[str], removed: List[str]) -> None:
+    """Moves the staged files into the kit, restoring every file if any of them fails.
+
+    The installed files are first moved to a backup folder next to the staged files, so every move is a rename
+    on the same volume. The manifest is swapped last, so the kit only claims the new version once all files are.
+
+    Args:
+        kit_root: The kit folder.
+        stage_dir: The folder the files were downloaded to.
+        updated: The names of the files to replace, with the manifest last.
+        removed: The names of the files to delete.
+    """
+    files_dir = stage_dir / "files"
+    backup_dir = stage_dir / "backup"
+    # Installed files that were moved to the backup and the new files moved into the kit.
+    backed_up: List[str] = []
+    swapped: List[str] = []
+
+    try:
+        for name in removed + updated:
+            installed = kit_path(kit_root, name)
+            if installed.exists():
+                backup = kit_path(backup_dir, name)
+                backup.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(installed, backup)
+                backed_up.append(name)
+        for name in updated:
+            installed = kit_path(kit_root, name)
+            installed.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(kit_path(files_dir, name), installed)
+            swapped.append(name)
+    except OSError as error:
+        # Put the installed kit back the way it was.
+        for name in swapped:
+            kit_path(kit_root, name).unlink()
+        for name in backed_up:
+            os.replace(kit_path(backup_dir, name), kit_path(kit_root, name))
+        raise UpdateError(f"Could not apply the update: {error}") from error
+
+
+def install_catalog(source: Path, database: Path) -> bool:
+    """Installs the kits database of a release, unless the installed catalog is as new, e.g. synced since.
+
+    The database is open while the kit runs, so it isn't swapped with the kit files. It is kept as the pending
+    catalog instead, which the next window swaps in with sync.apply_pending before it opens the database.
+
+    Args:
+        source: The downloaded database, on the same volume as the kit.
+        database: The installed kits database.
+
+    Returns:
+        True if the database is pending, False if the installed catalog is as new.
+    """
+    # Imported here, the catalog sync builds on the http client of this module.
+    from .sync import catalog_version, pending_path
+
+    pending = pending_path(database)
+    installed = [path for path in (database, pending) if path.exists()]
+    try:
+        if installed and catalog_version(source) <= max(map(catalog_version, installed)):
+            return False
+        os.replace(source, pending)
+    except (OSError, sqlite3.DatabaseError) as error:
+        raise UpdateError(f"Could not install the catalog: {error}") from error
+    return True
+
+
+def update_kit(
+        base_url: str = None, kit_root: Path = Paths.KIT_ROOT, stage_dir: Path = Paths.UPDATE_STAGE,
+        client: HttpClient = None
+) -> UpdateResult:
+    """Updates the kit to the released version, only downloading the files that changed.
+
+    Args:
+        base_url: The url the release manifest and files are published at, defaults to get_update_url().
+        kit_root: The installed kit folder.
+        stage_dir: The folder to download to, on the same volume as the kit.
+        client: The http client, a new one is created and closed if not given.
+
+    Returns:
+        result: The installed version and the files that were updated or removed.
+    """
+    base_url = base_url.rstrip("/") + "/" if base_url else get_update_url()
+    own_client = client is None
+    client = client or HttpClient()
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    state_path = stage_dir / "state.json"
+    installed = read_json(kit_root / Update.MANIFEST)
+    validators = read_json(state_path)
+
+    try:
+        manifest_data = fetch_manifest(client, base_url, validators)
+        if manifest_data is None:
+            return UpdateResult(version=installed.get("version", ""))
+        try:
+            manifest = json.loads(manifest_data)
+            files: Dict[str, dict] = manifest["files"]
+        except (ValueError, KeyError, TypeError) as error:
+            raise UpdateError(f"Invalid release manifest: {error}") from error
+
+        result = UpdateResult(version=manifest.get("version", ""))
+        # Start from a clean stage, a previous update may have been interrupted.
+        shutil.rmtree(stage_dir / "files", ignore_errors=True)
+        shutil.rmtree(stage_dir / "backup", ignore_errors=True)
+
+        for name, info in sorted(files.items()):
+            if is_current(kit_path(kit_root, name), info):
+                continue
+            url = urljoin(base_url, quote(name))
+            result.downloaded += download_file(client, url, kit_path(stage_dir / "files", name), info)
+            result.updated.append(name)
+        # Only files the kit installed are removed, anything else in the kit folder is left alone.
+        # The database is never removed, the kit can't run without it.
+        result.removed = sorted(
+            name for name in installed.get("files", {})
+            if name not in files and name != Update.DATABASE and kit_path(kit_root, name).exists()
+        )
+        # The database is installed on its own once the kit files are, see install_catalog.
+        catalog = Update.DATABASE in result.updated
+        if catalog:
+            result.updated.remove(Update.DATABASE)
+
+        if result.changed or installed.get("version") != result.version:
+            (stage_dir / "files").mkdir(exist_ok=True)
+            (stage_dir / "files" / Update.MANIFEST).write_bytes(manifest_data)
+            swap_files(kit_root, stage_dir, result.updated + [Update.MANIFEST], result.removed)
+        if catalog and install_catalog(
+                kit_path(stage_dir / "files", Update.DATABASE), kit_path(kit_root, Update.DATABASE)
+        ):
+            result.updated.append(Update.DATABASE)
+
+        # Only remember the manifest once it is applied, so a failed update is retried.
+        state_path.write_text(json.dumps(validators))
+        return result
+    finally:
+        shutil.rmtree(stage_dir / "files", ignore_errors=True)
+        shutil.rmtree(stage_dir / "backup", ignore_errors=True)
+        if own_client:
+            client.close()
+
+
+def start_update(
+        on_finished: Callable[[UpdateResult], None], on_failed: Callable[[str], None] = None, base_url: str = None
+) -> Worker:
+    """Updates the kit on a background thread.
+
+    Args:
+        on_finished: Called with the UpdateResult on the calling thread.
+        on_failed: Called with the error message on the calling thread.
+        base_url: The url the release manifest and files are published at, defaults to get_update_url().
+
+    Returns:
+        worker: The worker running the update.
+    """
+    worker = Worker(update_kit, base_url)
+    worker.signals.finished.connect(on_finished)
+    if on_failed:
+        worker.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(worker)
+    return worker
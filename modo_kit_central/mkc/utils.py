@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 
 from .prefs import Paths, DATA
+from .database import has_image
 
 
 def load_resource(res_type: str) -> dict:
@@ -55,7 +56,9 @@ def load_avatar(avatar: str) -> Path:
         resource: Path to the avatar file or None if it doesn't exist.
     """
     avatar = avatar if avatar else "profile.png"
-    resource = Paths.RESOURCES / "avatars" / avatar
+    name = f"avatars/{avatar}"
+    resource = Paths.RESOURCES / name
 
-    if resource.exists():
+    # Avatars may be packed into the database at build time instead of shipped as files.
+    if has_image(name) or resource.exists():
         return resource
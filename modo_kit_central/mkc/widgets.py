@@ -1,39 +1,56 @@
-from typing import List
+from collections import OrderedDict
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Set, Tuple
 from pathlib import Path
 
 try:
-    from PySide6.QtGui import QCursor, QDesktopServices, QPixmap, QIcon, QMouseEvent, QPalette, QColor
-    from PySide6.QtCore import Qt, QUrl, QParallelAnimationGroup, QPropertyAnimation, QAbstractAnimation
+    from PySide6.QtGui import QCursor, QDesktopServices, QIcon, QMouseEvent, QPalette, QColor, QPainter, QShowEvent
+    from PySide6.QtCore import (
+        Qt, QUrl, QParallelAnimationGroup, QPropertyAnimation, QAbstractAnimation, QThreadPool, QTimer,
+        QAbstractListModel, QModelIndex, QRect, QSize
+    )
     from PySide6.QtWidgets import (
         QLabel, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QToolButton, QScrollArea, QPlainTextEdit, QSizePolicy,
-        QFrame, QTabWidget, QLineEdit
+        QFrame, QTabWidget, QLineEdit, QListView, QStyledItemDelegate, QStyleOptionViewItem, QStyleOptionToolButton,
+        QStyle, QAbstractItemView, QProgressBar, QFileDialog
     )
 except ImportError:
     # Fallback to PySide2 if PySide6 is not available
-    from PySide2.QtGui import QCursor, QDesktopServices, QPixmap, QIcon, QMouseEvent, QPalette, QColor
-    from PySide2.QtCore import Qt, QUrl, QParallelAnimationGroup, QPropertyAnimation, QAbstractAnimation
+    from PySide2.QtGui import QCursor, QDesktopServices, QIcon, QMouseEvent, QPalette, QColor, QPainter, QShowEvent
+    from PySide2.QtCore import (
+        Qt, QUrl, QParallelAnimationGroup, QPropertyAnimation, QAbstractAnimation, QThreadPool, QTimer,
+        QAbstractListModel, QModelIndex, QRect, QSize
+    )
     from PySide2.QtWidgets import (
         QLabel, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QToolButton, QScrollArea, QPlainTextEdit, QSizePolicy,
-        QFrame, QTabWidget, QLineEdit
+        QFrame, QTabWidget, QLineEdit, QListView, QStyledItemDelegate, QStyleOptionViewItem, QStyleOptionToolButton,
+        QStyle, QAbstractItemView, QProgressBar, QFileDialog
     )
 
-from .prefs import Text, Paths
+from .prefs import Text, Paths, Database
 from .prefs import DATA, KitData, AuthorData
 from .utils import load_avatar
-from .database import search_kits, get_kits, get_author, get_author_kits
+from .database import search_kits, count_kits, iter_kits, get_kits_by_id, get_author_page, get_add_ons
+from .workers import Worker
+from .perf import RECORDER, clock, count, record, timed, export_json, export_chrome_trace
+from .images import get_pixmap_cache, scaled_size
+from .install import get_install_service
 
 
 class KitWidget(QWidget):
     """Class to display the information of a given kit."""
 
-    def __init__(self, kit_data: KitData, show_author: bool = True) -> None:
+    @timed("widget.KitWidget")
+    def __init__(self, kit_data: KitData, show_author: bool = True, parent: QWidget = None) -> None:
         """Class to display the kit information in the main UI.
 
         Args:
             kit_data: The kit data from the database.
             show_author: Whether to show the author information. Default is True.
+            parent: The parent widget.
         """
-        super(KitWidget, self).__init__()
+        super(KitWidget, self).__init__(parent)
         self.kit_data = kit_data
         self.show_author = show_author
         self._build_ui()
@@ -61,23 +78,126 @@ class KitWidget(QWidget):
         self.interactive_layout.setContentsMargins(0, 0, 0, 0)
         self.interactive_layout.addWidget(self.btn_link)
         self.interactive_layout.addWidget(self.btn_help)
+        # Only installable kits can be installed from Kit Central.
+        if self.kit_data.installable:
+            self._add_install()
         # Check if banner is available and add it to the widget.
         self._add_banner()
         # Add all elements to the base layout.
         self.base_layout.addWidget(self.description)
         self.base_layout.addLayout(self.interactive_layout)
-        # Add author information if needed.
-        if self.show_author:
+        # The kit widget is only built when a kit is expanded, so add-ons are only queried then.
+        self._add_add_ons()
+        # Add author information if needed, kits whose author was removed from the catalog have none.
+        if self.show_author and self.kit_data.author:
             self.base_layout.addWidget(self.lbl_author)
             self.lbl_author.setText(
                 Text.author.format(self.kit_data.author, self.kit_data.author))
             self.lbl_author.mousePressEvent = self.open_author
 
+    def _add_add_ons(self) -> None:
+        """Adds a link to each of the kit's add-ons, with the add-on description as tooltip."""
+        add_ons = get_add_ons(self.kit_data.id)
+        if not add_ons:
+            return
+
+        self.add_ons_layout = QHBoxLayout()
+        self.add_ons_layout.setContentsMargins(0, 0, 0, 0)
+        self.add_ons_layout.addWidget(QLabel("Add-ons:"))
+        for add_on in add_ons:
+            link_lbl = QLabel()
+            link_lbl.setText(Text.lbl_link.format(text=add_on.name, link=add_on.url))
+            link_lbl.setOpenExternalLinks(True)
+            link_lbl.setToolTip(add_on.description)
+            self.add_ons_layout.addWidget(link_lbl)
+        self.add_ons_layout.addStretch()
+        self.base_layout.addLayout(self.add_ons_layout)
+
+    def _add_install(self) -> None:
+        """Adds the install button and the progress bar of the install."""
+        self.btn_install = Button("Install")
+        self.install_bar = QProgressBar()
+        self.install_bar.setRange(0, 100)
+        self.install_bar.setTextVisible(False)
+        self.install_bar.hide()
+        self.interactive_layout.addWidget(self.btn_install)
+        self.interactive_layout.addWidget(self.install_bar)
+
+        if not (self.kit_data.download and self.kit_data.sha256):
+            self.btn_install.setEnabled(False)
+            self.btn_install.setToolTip("No download available.")
+            return
+
+        install_service = get_install_service()
+        self.btn_install.clicked.connect(self.install)
+        install_service.progress.connect(self.on_install_progress)
+        install_service.finished.connect(self.on_install_finished)
+        install_service.failed.connect(self.on_install_failed)
+        # The widget is rebuilt when the kit is expanded again, pick up an install that is still running.
+        state = install_service.state(self.kit_data.name)
+        if state:
+            self.on_install_progress(self.kit_data.name, *state)
+
+    def install(self) -> None:
+        """Queues the kit to be installed in the background."""
+        get_install_service().install(self.kit_data)
+        self.on_install_progress(self.kit_data.name, 0, 0)
+
+    def on_install_progress(self, kit_name: str, received: int, total: int) -> None:
+        """Shows the progress of the install.
+
+        Args:
+            kit_name: The name of the kit being installed.
+            received: The number of bytes downloaded.
+            total: The size of the download, 0 if unknown.
+        """
+        if kit_name != self.kit_data.name:
+            return
+        self.btn_install.setEnabled(False)
+        self.btn_install.setText("Installing")
+        self.install_bar.show()
+        if total:
+            self.install_bar.setRange(0, 100)
+            self.install_bar.setValue(received * 100 // total)
+        else:
+            # Unknown size, show a busy indicator.
+            self.install_bar.setRange(0, 0)
+
+    def on_install_finished(self, kit_name: str, installed: List[Path]) -> None:
+        """Shows the kit as installed.
+
+        Args:
+            kit_name: The name of the installed kit.
+            installed: The installed kit folders.
+        """
+        if kit_name != self.kit_data.name:
+            return
+        self.install_bar.hide()
+        self.btn_install.setEnabled(True)
+        self.btn_install.setText("Reinstall")
+        self.btn_install.setToolTip(f"Installed to {', '.join(path.as_posix() for path in installed)}")
+
+    def on_install_failed(self, kit_name: str, error: str) -> None:
+        """Shows the install as failed, so it can be retried.
+
+        Args:
+            kit_name: The name of the kit that failed to install.
+            error: The error message.
+        """
+        if kit_name != self.kit_data.name:
+            return
+        self.install_bar.hide()
+        self.btn_install.setEnabled(True)
+        self.btn_install.setText("Retry")
+        self.btn_install.setToolTip(error)
+
     def _add_banner(self) -> None:
         """Adds a banner to the widget if it exists."""
         banner_image = Paths.BANNERS / f"{self.kit_data.name}.png"
-        if banner_image.exists():
-            self.banner = Banner(image=banner_image)
+        # The size is only valid if the banner exists, so it is only looked up once.
+        size = scaled_size(banner_image, width=Banner.banner_width)
+        if size.isValid():
+            self.banner = Banner(image=banner_image, size=size)
             self.base_layout.addWidget(self.banner)
 
     def _connect_ui(self) -> None:
@@ -96,28 +216,40 @@ class KitWidget(QWidget):
         # Find if Author is already a tab
         author_widget = tab_widget.findChild(QScrollArea, self.kit_data.author)
         if not author_widget:
-            author_data = get_author(self.kit_data.author)
+            # Get the author and the first page of their kits in one query.
+            author_page = get_author_page(self.kit_data.author)
+            if author_page is None:
+                # The author was removed from the catalog, so there is no page to show.
+                return
+            author_data, author_kits = author_page
             # Create new avatar tab
-            author_widget = AuthorTab(author_data)
+            author_widget = AuthorTab(author_data, author_kits)
             tab_widget.addTab(author_widget, self.kit_data.author)
         # Set the tab as active
         tab_widget.setCurrentIndex(tab_widget.indexOf(author_widget))
 
 
 class AuthorTab(QScrollArea):
-    def __init__(self, author_data: AuthorData, parent: QWidget = None) -> None:
+    @timed("widget.AuthorTab")
+    def __init__(self, author_data: AuthorData, author_kits: Iterator[List[KitData]], parent: QWidget = None) -> None:
         """Scroll area that populates with incoming author information.
 
         Args:
             author_data: Data for the given author.
+            author_kits: The pages of kits by the given author, the first is added right away and the others
+                once the tab is scrolled to the end.
             parent: Widget to set as parent.
         """
         super(AuthorTab, self).__init__(parent)
         self.data = author_data
+        self.kits: Optional[Iterator[List[KitData]]] = author_kits
         self.setObjectName(self.data.name)
         self._build_ui()
         self._add_links()
         self._add_kits()
+        # Add the next page when the end is reached, or while the kits don't fill the tab yet.
+        self.verticalScrollBar().valueChanged.connect(self.on_scrolled)
+        self.verticalScrollBar().rangeChanged.connect(self.on_scrolled)
 
     def _build_ui(self) -> None:
         """Builds the UI for the author tab."""
@@ -135,9 +267,9 @@ class AuthorTab(QScrollArea):
         self.avatar = load_avatar(self.data.avatar)
         avatar_lbl = QLabel("test")
         avatar_lbl.setFixedSize(120, 100)
-        # Load and scale avatar.
-        avatar_pix = QPixmap(self.avatar).scaledToHeight(100)
-        avatar_lbl.setPixmap(avatar_pix)
+        # Load and scale avatar through the shared cache.
+        if self.avatar:
+            get_pixmap_cache().request(self.avatar, avatar_lbl.setPixmap, height=100)
         self.base_layout.addWidget(avatar_lbl, alignment=Qt.AlignCenter)
 
         author_lbl = QLabel(self.data.name)
@@ -147,35 +279,46 @@ class AuthorTab(QScrollArea):
 
     def _add_links(self) -> None:
         """Adds all links to the author tab as clickable."""
-        for text, url in self.data.links.items():
+        for text, url in self.data.links:
             link_lbl = QLabel()
             link_lbl.setText(Text.lbl_link.format(text=text, link=url))
             link_lbl.setOpenExternalLinks(True)
             self.links_layout.addWidget(link_lbl)
 
+    def on_scrolled(self) -> None:
+        """Adds the next page of kits once the tab is scrolled to the end."""
+        scroll_bar = self.verticalScrollBar()
+        if self.kits is not None and scroll_bar.value() >= scroll_bar.maximum():
+            self._add_kits()
+
     def _add_kits(self) -> None:
-        """Iterate over the author's kits and add them to the UI."""
-        for authors_kit in get_author_kits(self.data.name):
+        """Add the next page of the author's kits to the UI."""
+        page = next(self.kits, None)
+        if page is None:
+            # Every kit was added.
+            self.kits = None
+            return
+
+        for kit_data in page:
             # Add fold-able element for each kit
-            folder = FoldContainer(name=authors_kit[1], version=authors_kit[3])
-            kit_data = KitData(*authors_kit)
+            folder = FoldContainer(name=kit_data.name, version=kit_data.version)
             # Since we are on the authors tab, don't show the author on each kit.
-            kit_widget = KitWidget(kit_data, show_author=False)
-            folder.set_content(kit_widget)
+            # The kit widget is only built when the folder is first opened.
+            folder.set_content_factory(partial(KitWidget, kit_data, show_author=False))
             self.base_layout.addWidget(folder)
 
 
 class KitsTab(QWidget):
     """Class to display the kits in the main UI."""
 
+    @timed("widget.KitsTab")
     def __init__(self, parent: QWidget = None) -> None:
-        """Scroll area that populates with incoming kit information.
+        """Virtualized list that populates with incoming kit information.
 
         Args:
             parent: Widget to set as parent.
         """
         super(KitsTab, self).__init__(parent)
-        self.kits: List[FoldContainer] = []
         self._ui_setup()
         self._add_kits()
 
@@ -191,31 +334,398 @@ class KitsTab(QWidget):
         self.base_layout.setAlignment(Qt.AlignTop)
         self.base_layout.addWidget(self.search_bar)
         self.base_widget.setLayout(self.base_layout)
-        # Scroll area for kits
-        self.kits_widget = QWidget()
-        self.kits_scroll = QScrollArea()
-        self.kits_scroll.setContentsMargins(0, 0, 0, 0)
-        self.kits_scroll.setWidget(self.kits_widget)
-        self.kits_scroll.setWidgetResizable(True)
-        self.kits_layout = QVBoxLayout()
-        self.kits_layout.setContentsMargins(0, 0, 0, 0)
-        self.kits_layout.setAlignment(Qt.AlignTop)
-        self.kits_scroll.setWidget(self.kits_widget)
-        self.kits_widget.setLayout(self.kits_layout)
+        # List view for kits, only the visible rows are painted.
+        self.kit_model = KitListModel(parent=self)
+        self.kit_view = KitListView()
+        self.kit_view.setModel(self.kit_model)
         # Add Kits to the base layout
-        self.base_layout.addWidget(self.kits_scroll)
+        self.base_layout.addWidget(self.kit_view)
         # Set the base layout as the main layout
         self.setLayout(self.base_layout)
 
     def _add_kits(self) -> None:
-        """Iterate over the kits database table and add the kits to the UI."""
-        for kit in get_kits():
-            # Generate a collapsable container
-            kit_data = KitData(*kit)
-            kit_container = FoldContainer(name=kit_data.name, version=kit_data.version)
-            kit_container.set_content(KitWidget(kit_data))
-            self.kits.append(kit_container)
-            self.kits_layout.addWidget(kit_container)
+        """Load the kits database table into the kit model, the first page is displayed right away."""
+        self.kit_model.set_pages(iter_kits())
+        self.search_bar.search_txt.setPlaceholderText(Text.search.format(count=count_kits()))
+
+    def reload_kits(self) -> None:
+        """Reloads the kits after the database was replaced, keeping the current search."""
+        self._add_kits()
+        if self.search_bar.search_txt.text():
+            self.search_bar.start_search()
+
+
+class KitListModel(QAbstractListModel):
+    """Model exposing the kits to the kit list view.
+
+    Kits are read from the database one page at a time, the view asks for the next page when it is scrolled
+    to the end, so only the kits that were scrolled to are ever read. Kits that searches hid are kept up to the
+    cache size, so typing and clearing a search doesn't read them again, and the least recently read are dropped.
+    """
+    KitRole = Qt.UserRole + 1
+    ExpandedRole = Qt.UserRole + 2
+
+    def __init__(self, pages: Iterator[List[KitData]] = None, parent: QWidget = None,
+                 page_size: int = Database.PAGE_SIZE, cache_size: int = Database.KIT_CACHE_SIZE) -> None:
+        """Initialization of the kit model.
+
+        Args:
+            pages: The pages of kits to display.
+            parent: The parent object.
+            page_size: The number of kits to display per page of search results.
+            cache_size: The number of kits to keep that aren't displayed.
+        """
+        super(KitListModel, self).__init__(parent)
+        self.page_size = page_size
+        self.cache_size = cache_size
+        # Kits read so far by id, least recently read first. Every displayed kit is kept.
+        self.kits: 'OrderedDict[int, KitData]' = OrderedDict()
+        # Kit id displayed at each row, in display order.
+        self.rows: List[int] = []
+        # Ids of the next pages of kits to display, None once every kit is displayed.
+        self.pages: Optional[Iterator[List[int]]] = None
+        # Kit ids that are currently expanded.
+        self.expanded: Set[int] = set()
+        self.set_pages(pages or iter([]))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Qt Override: The number of displayed kits."""
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        """Qt Override: Gets the data of a kit for the given role.
+
+        Args:
+            index: The index of the row.
+            role: The data role to get.
+
+        Returns:
+            The requested data or None if the role isn't handled.
+        """
+        if not index.isValid():
+            return None
+
+        kit_id = self.rows[index.row()]
+        kit_data = self.kits[kit_id]
+
+        if role == Qt.DisplayRole:
+            return "{} ({})".format(kit_data.name, kit_data.version) if kit_data.version else kit_data.name
+        if role == self.KitRole:
+            return kit_data
+        if role == self.ExpandedRole:
+            return kit_id in self.expanded
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """Qt Override: Checks if there are kits left to display."""
+        return not parent.isValid() and self.pages is not None
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        """Qt Override: Displays the next page of kits.
+
+        Args:
+            parent: The parent index, kits have none.
+        """
+        if parent.isValid() or self.pages is None:
+            return
+        kit_ids = next(self.pages, None)
+        if kit_ids is None:
+            self.pages = None
+            return
+
+        row = len(self.rows)
+        self.beginInsertRows(QModelIndex(), row, row + len(kit_ids) - 1)
+        self.rows.extend(kit_ids)
+        self.endInsertRows()
+        self.evict_kits()
+
+    def read_pages(self, pages: Iterator[List[KitData]]) -> Iterator[List[int]]:
+        """Keeps the kits of every page that is read.
+
+        Args:
+            pages: The pages of kits.
+
+        Returns:
+            pages: The ids of the kits of every page.
+        """
+        for page in pages:
+            for kit in page:
+                self.kits[kit.id] = kit
+            yield [kit.id for kit in page]
+
+    def read_kits(self, kit_ids: List[int]) -> List[int]:
+        """Reads the kits that weren't read yet.
+
+        Args:
+            kit_ids: The ids of the kits.
+
+        Returns:
+            kit_ids: The ids of the kits that are in the database.
+        """
+        missing = []
+        for kit_id in kit_ids:
+            if kit_id in self.kits:
+                self.kits.move_to_end(kit_id)
+            else:
+                missing.append(kit_id)
+        if missing:
+            for kit in get_kits_by_id(missing):
+                self.kits[kit.id] = kit
+        return [kit_id for kit_id in kit_ids if kit_id in self.kits]
+
+    def evict_kits(self) -> None:
+        """Drops the least recently read kits that aren't displayed once there are more than the cache size."""
+        excess = len(self.kits) - len(self.rows) - self.cache_size
+        if excess <= 0:
+            return
+        displayed = set(self.rows)
+        hidden = (kit_id for kit_id in self.kits if kit_id not in displayed)
+        for kit_id in list(islice(hidden, excess)):
+            del self.kits[kit_id]
+
+    def result_pages(self, kit_ids: Sequence[int]) -> Iterator[List[int]]:
+        """Splits search results into pages, reading their kits on demand.
+
+        Args:
+            kit_ids: The ids of the kits, in display order.
+
+        Returns:
+            pages: The ids of the kits of every non-empty page.
+        """
+        for start in range(0, len(kit_ids), self.page_size):
+            page = self.read_kits(kit_ids[start:start + self.page_size])
+            if page:
+                yield page
+
+    def set_pages(self, pages: Iterator[List[KitData]]) -> None:
+        """Replaces all kits of the model and displays the first page.
+
+        Args:
+            pages: The pages of kits to display.
+        """
+        self.beginResetModel()
+        self.kits = OrderedDict()
+        self.rows = []
+        self.pages = self.read_pages(pages)
+        self.expanded.clear()
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_results(self, kit_ids: Sequence[int]) -> bool:
+        """Displays only the given kits in the given order.
+
+        Notes:
+            As many kits as are displayed now, or at least a page, are displayed right away, the others once the
+            list is scrolled. The rows are moved as a layout change instead of a reset, so the details of expanded
+            kits that stay displayed are kept, and nothing happens at all if the displayed rows didn't change.
+
+        Args:
+            kit_ids: The database ids of the kits to display, ordered by relevance.
+
+        Returns:
+            True if the displayed rows changed.
+        """
+        displayed = max(len(self.rows), self.page_size)
+        rows = self.read_kits(kit_ids[:displayed])
+        self.pages = self.result_pages(kit_ids[displayed:])
+        if rows == self.rows:
+            return False
+
+        self.layoutAboutToBeChanged.emit()
+        # Move the persistent indexes, e.g. of the details, to the new row of their kit or invalidate them if hidden.
+        new_rows = {kit_id: row for row, kit_id in enumerate(rows)}
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            row = new_rows.get(self.rows[index.row()])
+            new_indexes.append(QModelIndex() if row is None else self.index(row))
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.rows = rows
+        self.layoutChanged.emit()
+        self.evict_kits()
+        return True
+
+    def set_expanded(self, index: QModelIndex, expanded: bool) -> None:
+        """Sets if the kit at the given index is expanded.
+
+        Args:
+            index: The index of the row.
+            expanded: True to expand the kit, False to collapse it.
+        """
+        kit_id = self.rows[index.row()]
+        if expanded:
+            self.expanded.add(kit_id)
+        else:
+            self.expanded.discard(kit_id)
+        self.dataChanged.emit(index, index, [self.ExpandedRole])
+
+    def collapse_all(self) -> None:
+        """Collapses every kit."""
+        self.beginResetModel()
+        self.expanded.clear()
+        self.endResetModel()
+
+    def expanded_rows(self) -> List[int]:
+        """Gets the rows of all displayed kits that are expanded.
+
+        Returns:
+            rows: The expanded rows.
+        """
+        return [row for row, kit_id in enumerate(self.rows) if kit_id in self.expanded]
+
+
+class KitDelegate(QStyledItemDelegate):
+    """Delegate to paint the kit rows and create their details on demand."""
+    header_height = 20
+
+    def __init__(self, view: QListView) -> None:
+        """Initialization of the kit delegate.
+
+        Args:
+            view: The list view the delegate paints for.
+        """
+        super(KitDelegate, self).__init__(view)
+        self.view = view
+        # Never shown, the headers are painted as this button so the stylesheet's QToolButton rules style them like
+        # the fold-able containers.
+        self.header_button = QToolButton(view)
+        self.header_button.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
+        self.header_button.hide()
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        """Qt Override: Paints the header of a kit like a fold-able tool button.
+
+        Args:
+            painter: The painter to paint with.
+            option: The style options of the row.
+            index: The index of the row.
+        """
+        button = self.header_button
+        button_option = QStyleOptionToolButton()
+        button_option.initFrom(button)
+        button_option.rect = QRect(option.rect.left(), option.rect.top(), option.rect.width(), self.header_height)
+        button_option.state = option.state & QStyle.State_MouseOver | QStyle.State_Enabled | QStyle.State_Raised
+        button_option.text = index.data()
+        button_option.toolButtonStyle = Qt.ToolButtonTextBesideIcon
+        button_option.features = QStyleOptionToolButton.Arrow
+        button_option.arrowType = Qt.DownArrow if index.data(KitListModel.ExpandedRole) else Qt.RightArrow
+        button.style().drawComplexControl(QStyle.CC_ToolButton, button_option, painter, button)
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        """Qt Override: Gets the size of a row, including the details when expanded.
+
+        Args:
+            option: The style options of the row.
+            index: The index of the row.
+
+        Returns:
+            The size of the row.
+        """
+        height = self.header_height
+        details = self.view.indexWidget(index)
+        if details is not None:
+            height += details.sizeHint().height()
+        return QSize(self.view.viewport().width(), height)
+
+    def createEditor(self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> QWidget:
+        """Qt Override: Creates the details of a kit when it is expanded.
+
+        Args:
+            parent: The parent of the details widget.
+            option: The style options of the row.
+            index: The index of the row.
+
+        Returns:
+            The kit widget for the row.
+        """
+        return KitWidget(index.data(KitListModel.KitRole), parent=parent)
+
+    def updateEditorGeometry(self, editor: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        """Qt Override: Places the details of a kit below its header.
+
+        Args:
+            editor: The details widget.
+            option: The style options of the row.
+            index: The index of the row.
+        """
+        rect = option.rect
+        header = self.header_height
+        editor.setGeometry(rect.left(), rect.top() + header, rect.width(), rect.height() - header)
+
+    def setEditorData(self, editor: QWidget, index: QModelIndex) -> None:
+        """Qt Override: The details are read-only, so there is no data to set."""
+
+    def setModelData(self, editor: QWidget, model: KitListModel, index: QModelIndex) -> None:
+        """Qt Override: The details are read-only, so there is no data to commit."""
+
+
+class KitListView(QListView):
+    """List view to display the kits, expanding a kit when its header is clicked."""
+
+    def __init__(self, parent: QWidget = None) -> None:
+        """Initialization of the kit list view.
+
+        Args:
+            parent: The parent widget.
+        """
+        super(KitListView, self).__init__(parent)
+        self.setObjectName("KitList")
+        self.delegate = KitDelegate(self)
+        self.setItemDelegate(self.delegate)
+        self.setMouseTracking(True)
+        self.setSpacing(1)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # Lay out rows in batches so the first rows paint before the rest are measured.
+        self.setLayoutMode(QListView.Batched)
+        self.setResizeMode(QListView.Adjust)
+        # Enable the pointer mouse.
+        self.viewport().setCursor(QCursor(Qt.PointingHandCursor))
+        self.clicked.connect(self.toggle)
+
+    def setModel(self, model: KitListModel) -> None:
+        """Qt Override: Sets the model and restores expanded kits whenever it is reset.
+
+        Args:
+            model: The kit model to display.
+        """
+        super(KitListView, self).setModel(model)
+        model.modelReset.connect(self.restore_expanded)
+        # Expanded kits shown again by a search get their details back.
+        model.layoutChanged.connect(self.restore_expanded)
+
+    def toggle(self, index: QModelIndex) -> None:
+        """Expands or collapses the kit at the given index.
+
+        Args:
+            index: The index of the row.
+        """
+        expanded = not index.data(KitListModel.ExpandedRole)
+        self.model().set_expanded(index, expanded)
+
+        if expanded:
+            # The details are only built when a kit is first expanded.
+            self.openPersistentEditor(index)
+        else:
+            self.closePersistentEditor(index)
+        self.delegate.sizeHintChanged.emit(index)
+
+    def collapse_all(self) -> None:
+        """Collapses every kit and deletes the details of the expanded ones."""
+        model = self.model()
+        for row in model.expanded_rows():
+            self.closePersistentEditor(model.index(row))
+        model.collapse_all()
+
+    def restore_expanded(self) -> None:
+        """Rebuilds the details of the expanded kits that are still displayed."""
+        model = self.model()
+        for row in model.expanded_rows():
+            index = model.index(row)
+            self.openPersistentEditor(index)
+            self.delegate.sizeHintChanged.emit(index)
 
 
 class Button(QPushButton):
@@ -237,18 +747,27 @@ class Button(QPushButton):
 
 class Banner(QLabel):
     """Class to display a banner image."""
+    # Width banners are displayed at, the width of the window.
+    banner_width = 512
 
-    def __init__(self, image: Path, parent: QWidget = None) -> None:
+    def __init__(self, image: Path, width: int = banner_width, size: QSize = None, parent: QWidget = None) -> None:
         """Banner class to display a Kit banner.
 
         Args:
             image: The image to display as the banner.
+            width: The width the banner is displayed at.
+            size: The size of the scaled image if it was already looked up, see images.scaled_size.
             parent: The parent widget.
         """
         super(Banner, self).__init__(parent)
         self.setAlignment(Qt.AlignLeft)
         self.setContentsMargins(0, 0, 0, 0)
-        self.setPixmap(QPixmap(image.as_posix()))
+        # Reserve the banner height so the layout doesn't jump once the image is loaded.
+        if size is None:
+            size = scaled_size(image, width=width)
+        if size.isValid():
+            self.setFixedHeight(size.height())
+        get_pixmap_cache().request(image, self.setPixmap, width=width)
         # Remove padding for pixmap
         self.setScaledContents(True)
 
@@ -275,12 +794,15 @@ class FoldContainer(QWidget):
         self.toggle_animation = QParallelAnimationGroup(self)
         self.content_area = QScrollArea(maximumHeight=0, minimumHeight=0)
         self.content = None
+        # Builds the content the first time the container is opened.
+        self.content_factory: Optional[Callable[[], QWidget]] = None
+        # Animation heights are only calculated once the container is opened.
+        self.heights_ready = False
         self.build_ui()
 
     def build_ui(self) -> None:
         """Builds the UI"""
         self.setContentsMargins(0, 0, 0, 0)
-        self.toggle_button.setStyleSheet(DATA.CSS)
         self.toggle_button.setFixedHeight(20)
         self.toggle_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.toggle_button.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
@@ -305,6 +827,9 @@ class FoldContainer(QWidget):
     def on_pressed(self) -> None:
         """Enable animation when user selects the bar."""
         checked = self.toggle_button.isChecked()
+        if not checked:
+            # Opening, so make sure the content exists and the animation knows its size.
+            self.prepare_content()
         self.toggle_button.setArrowType(Qt.DownArrow if not checked else Qt.RightArrow)
         self.toggle_animation.setDirection(self.forward if not checked else self.reverse)
         self.toggle_animation.start()
@@ -331,11 +856,36 @@ class FoldContainer(QWidget):
         self.layout.addWidget(self.content)
         # Set layout as the main content layout
         self.content_area.setLayout(self.layout)
+        # The content changed, so the animation heights need to be recalculated on open.
+        self.heights_ready = False
+
+    def set_content_factory(self, factory: Callable[[], QWidget]) -> None:
+        """Sets a function that builds the containers content the first time it is opened.
+
+        Args:
+            factory: The function returning the widget to set as the core content.
+        """
+        self.content_factory = factory
+
+    @timed("widget.FoldContainer.prepare_content")
+    def prepare_content(self) -> None:
+        """Builds the content from the factory if needed and calculates the animation heights."""
+        if self.content is None and self.content_factory is not None:
+            self.set_content(self.content_factory())
+            self.content_factory = None
+            # Widgets added to a visible container are only shown on the next event loop,
+            # show it now so the layout includes it in the height calculation.
+            self.content.show()
+
+        if self.content is None or self.heights_ready:
+            return
+
         # Calculate the height of the widget when closed.
         self.collapsed_height = self.sizeHint().height() - self.content_area.maximumHeight()
         # Get the current height of the new layout with added content
         content_height = self.layout.sizeHint().height()
         self.animation_setup(content_height)
+        self.heights_ready = True
 
     def animation_setup(self, height: int) -> None:
         # Initialize all added animations with the same values.
@@ -353,6 +903,9 @@ class FoldContainer(QWidget):
 
 
 class KitSearchBar(QWidget):
+    # Time to wait after the last keystroke before searching, in milliseconds.
+    debounce_ms = 150
+
     def __init__(self, kit_tab: KitsTab, parent: QWidget = None):
         """Initialization of the search bar for the kits tab.
 
@@ -362,6 +915,16 @@ class KitSearchBar(QWidget):
         """
         super(KitSearchBar, self).__init__(parent)
         self.kit_tab = kit_tab
+        # Id of the latest search, results of older searches are discarded.
+        self.search_id = 0
+        # Time the latest search started, for the round-trip timing.
+        self.search_started = 0
+        # Searches run one at a time off the GUI thread.
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(1)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.debounce_ms)
 
         # Build the UI
         self._build_ui()
@@ -373,22 +936,143 @@ class KitSearchBar(QWidget):
         self.setLayout(self.base_layout)
         self.search_txt = QLineEdit()
         self.search_txt.setPlaceholderText("Search...")
-        self.setStyleSheet("QLineEdit {background-color: rgb(100, 50, 100); color: rgb(220, 220, 220); }")
+        # Styled by the window stylesheet through its object name.
+        self.search_txt.setObjectName("SearchBar")
         self.base_layout.addWidget(self.search_txt)
-        # Connect search bar to search function.
-        self.search_txt.textChanged.connect(self.search)
+        # Restart the debounce window on every keystroke and search once typing pauses.
+        self.search_txt.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.start_search)
 
-    def search(self, text: str) -> None:
-        """Handles searching the widgets and disabling the ones that do not match.
+    def start_search(self) -> None:
+        """Starts a background search for the current search text."""
+        self.search_id += 1
+        self.search_started = clock()
+        worker = Worker(self.run_search, self.search_id, self.search_txt.text())
+        worker.signals.finished.connect(self.on_search_finished)
+        worker.signals.failed.connect(partial(self.on_search_failed, self.search_id))
+        self.search_pool.start(worker)
+
+    def run_search(self, search_id: int, text: str) -> Tuple[int, Optional[Sequence[int]]]:
+        """Searches the kits on the worker thread.
+
+        Notes:
+            Searches still queued behind a newer one return right away instead of being dropped from the pool,
+            so their worker always delivers its result and is released.
 
         Args:
+            search_id: The id of the search.
             text: The search text.
+
+        Returns:
+            search_id: The id of the search.
+            kit_ids: The matching kit ids, None if the search was skipped because it is out of date.
         """
-        # Get id of all matching kits
-        kit_ids = search_kits(text)
+        if search_id != self.search_id:
+            return search_id, None
+        return search_id, search_kits(text)
 
-        for kit_id, kit in enumerate(self.kit_tab.kits):
-            if kit_id in kit_ids:
-                kit.setVisible(True)
-            else:
-                kit.setVisible(False)
+    def on_search_finished(self, result: Tuple[int, Optional[Sequence[int]]]) -> None:
+        """Applies the results of a background search if it is still the latest one.
+
+        Args:
+            result: The id of the search and the matching kit ids.
+        """
+        search_id, kit_ids = result
+        if search_id == self.search_id and kit_ids is not None:
+            self.search_txt.setToolTip("")
+            self.apply_results(kit_ids)
+            record("search.round_trip", self.search_started)
+        else:
+            count("search.stale")
+
+    def on_search_failed(self, search_id: int, error: str) -> None:
+        """Shows why the latest search failed, the kits of the previous search stay displayed.
+
+        Args:
+            search_id: The id of the search.
+            error: The error message.
+        """
+        count("search.failed")
+        if search_id == self.search_id:
+            self.search_txt.setToolTip(Text.search_failed.format(error=error))
+
+    def apply_results(self, kit_ids: Sequence[int]) -> None:
+        """Shows the matching kits in ranked order and hides the rest.
+
+        Args:
+            kit_ids: The ids of the matching kits, ordered by relevance.
+        """
+        view = self.kit_tab.kit_view
+        # Suspend painting so the view is only updated once, after all rows moved.
+        view.setUpdatesEnabled(False)
+        try:
+            if self.kit_tab.kit_model.set_results(kit_ids):
+                count("search.layout_changed")
+        finally:
+            view.setUpdatesEnabled(True)
+
+
+class PerfTab(QWidget):
+    """Debug tab showing the recorded timings and counters, with exports for deeper analysis."""
+
+    def __init__(self, parent: QWidget = None) -> None:
+        """Initialization of the performance tab.
+
+        Args:
+            parent: Widget to set as parent.
+        """
+        super(PerfTab, self).__init__(parent)
+        self._build_ui()
+
+    def _build_ui(self) -> None:
+        """Builds the report and the buttons of the tab."""
+        self.setContentsMargins(4, 4, 4, 4)
+        self.base_layout = QVBoxLayout()
+        self.base_layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.base_layout)
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.report.setObjectName("PerfReport")
+        self.base_layout.addWidget(self.report)
+
+        self.button_layout = QHBoxLayout()
+        self.base_layout.addLayout(self.button_layout)
+        for text, func in (
+            ("Refresh", self.refresh),
+            ("Reset", self.reset),
+            ("Export JSON", partial(self.export, export_json, "JSON (*.json)")),
+            ("Export Trace", partial(self.export, export_chrome_trace, "Chrome Trace (*.json)")),
+        ):
+            button = QPushButton(text)
+            button.clicked.connect(func)
+            self.button_layout.addWidget(button)
+
+    def refresh(self) -> None:
+        """Shows the latest timings and counters."""
+        self.report.setPlainText(RECORDER.report())
+
+    def reset(self) -> None:
+        """Clears the recorded timings and counters."""
+        RECORDER.reset()
+        self.refresh()
+
+    def export(self, exporter: Callable[[Path], None], file_filter: str) -> None:
+        """Asks for a file and writes the recorded data to it.
+
+        Args:
+            exporter: The function writing the data to a path.
+            file_filter: The file type filter of the save dialog.
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "Export", "", file_filter)
+        if path:
+            exporter(Path(path))
+
+    def showEvent(self, event: QShowEvent) -> None:
+        """PySide method: Refreshes the report whenever the tab is shown.
+
+        Args:
+            event: The show event.
+        """
+        self.refresh()
+        super(PerfTab, self).showEvent(event)
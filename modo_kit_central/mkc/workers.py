@@ -0,0 +1,65 @@
+from typing import Any, Callable, Set
+
+try:
+    from PySide6.QtCore import QObject, QRunnable, Signal
+except ImportError:
+    # Fallback to PySide2 if PySide6 is not available
+    from PySide2.QtCore import QObject, QRunnable, Signal
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by a Worker, delivered on the thread that created the worker."""
+    finished = Signal(object)
+    failed = Signal(str)
+    # Received and total amount of work, for functions that report their progress.
+    progress = Signal(int, int)
+    # Emitted last, after finished or failed.
+    done = Signal()
+
+    def __init__(self, worker: 'Worker') -> None:
+        """Initialization of the worker signals.
+
+        Args:
+            worker: The worker emitting the signals.
+        """
+        super(WorkerSignals, self).__init__()
+        self.worker = worker
+        self.done.connect(self.release)
+
+    def release(self) -> None:
+        """Stops keeping the worker alive once its result was delivered."""
+        Worker.active.discard(self.worker)
+
+
+class Worker(QRunnable):
+    """Runnable to call a function on a QThreadPool thread."""
+    # Workers that haven't delivered their result yet. Keeps their signals alive when the caller
+    # doesn't hold on to the worker, otherwise results sent to plain functions are lost.
+    active: Set['Worker'] = set()
+
+    def __init__(self, func: Callable, *args: Any, **kwargs: Any) -> None:
+        """Initialization of the worker.
+
+        Args:
+            func: The function to call on the worker thread.
+            *args: Positional arguments for the function.
+            **kwargs: Keyword arguments for the function.
+        """
+        super(Worker, self).__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        # Created on the calling thread so connected slots run there.
+        self.signals = WorkerSignals(self)
+        Worker.active.add(self)
+
+    def run(self) -> None:
+        """Qt Override: Calls the function and emits its result."""
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
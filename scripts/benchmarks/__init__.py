@@ -0,0 +1,28 @@
+import sys
+from time import perf_counter
+from typing import Callable
+
+from scripts.prefs import Paths
+
+
+def link_kit() -> None:
+    """Links the mkc library to the sys path so benchmarks can import it."""
+    kit_path = str(Paths.KIT)
+    if kit_path not in sys.path:
+        sys.path.append(kit_path)
+
+
+def time_call(func: Callable, repeat: int) -> float:
+    """Times the average duration of a function call.
+
+    Args:
+        func: The function to call without arguments.
+        repeat: The number of times to call the function.
+
+    Returns:
+        The average duration of a single call in microseconds.
+    """
+    start = perf_counter()
+    for _ in range(repeat):
+        func()
+    return (perf_counter() - start) / repeat * 1e6
@@ -0,0 +1,103 @@
+# Compares the per-call latency of the persistent connection against connecting per call, and of typing a search
+# with and without the search cache.
+import sqlite3
+from typing import List
+
+from scripts.benchmarks import link_kit, time_call
+
+link_kit()
+
+from mkc.database import CONNECTION, SEARCH_CACHE, build_match, search_kits, get_kits  # noqa: E402
+from mkc.prefs import Paths, QueryData  # noqa: E402
+
+QUERIES = ["python", "mesh op", "modo, kits", ""]
+
+
+def connect_per_call_search(search_text: str) -> List[int]:
+    """Searches the kits by opening a new connection, the way mkc.database used to.
+
+    Args:
+        search_text: The text to search for.
+
+    Returns:
+        kit_ids: The ids of all matching kits.
+    """
+    match = build_match(search_text)
+
+    with sqlite3.connect(Paths.DATABASE) as connection:
+        cursor = connection.cursor()
+        if match:
+            cursor.execute(QueryData.SearchKits, [match])
+        else:
+            cursor.execute(QueryData.SelectKitIds)
+        return [kit[0] for kit in cursor.fetchall()]
+
+
+def connect_per_call_kits() -> List[tuple]:
+    """Gets all kits by opening a new connection, the way mkc.database used to.
+
+    Returns:
+        kits: A list of all kits in the database.
+    """
+    with sqlite3.connect(Paths.DATABASE) as connection:
+        cursor = connection.cursor()
+        cursor.execute(QueryData.SelectKits)
+        return cursor.fetchall()
+
+
+def uncached_search(search_text: str) -> List[int]:
+    """Searches the kits with the persistent connection, without using cached results.
+
+    Args:
+        search_text: The text to search for.
+
+    Returns:
+        kit_ids: The ids of all matching kits.
+    """
+    SEARCH_CACHE.clear()
+    return search_kits(search_text)
+
+
+def type_search(search_text: str, cached: bool) -> None:
+    """Searches every prefix of the text, then every prefix again while deleting it, like a user typing.
+
+    Args:
+        search_text: The text to type.
+        cached: Keep the cached results while typing, False to search the database for every keystroke.
+    """
+    SEARCH_CACHE.clear()
+    prefixes = [search_text[:end] for end in range(1, len(search_text) + 1)]
+    for prefix in prefixes + prefixes[::-1]:
+        search_kits(prefix) if cached else uncached_search(prefix)
+
+
+def run(repeat: int = 2000) -> None:
+    """Prints the average latency of both connection strategies.
+
+    Args:
+        repeat: The number of calls to average over.
+    """
+    print(f"{'call':<28}{'per-call (us)':>16}{'persistent (us)':>18}{'speedup':>10}")
+
+    cases = [(f"search_kits({query!r})", query) for query in QUERIES]
+    for label, query in cases:
+        legacy = time_call(lambda: connect_per_call_search(query), repeat)
+        current = time_call(lambda: uncached_search(query), repeat)
+        print(f"{label:<28}{legacy:>16.1f}{current:>18.1f}{legacy / current:>9.1f}x")
+
+    legacy = time_call(connect_per_call_kits, repeat)
+    current = time_call(get_kits, repeat)
+    print(f"{'get_kits()':<28}{legacy:>16.1f}{current:>18.1f}{legacy / current:>9.1f}x")
+
+    print(f"\n{'typing':<28}{'uncached (us)':>16}{'cached (us)':>18}{'speedup':>10}")
+    # Typing nothing has no keystrokes to time.
+    for query in filter(None, QUERIES):
+        uncached = time_call(lambda: type_search(query, False), repeat // 20)
+        cached = time_call(lambda: type_search(query, True), repeat // 20)
+        print(f"{query!r:<28}{uncached:>16.1f}{cached:>18.1f}{uncached / cached:>9.1f}x")
+
+    CONNECTION.close()
+
+
+if __name__ == '__main__':
+    run()
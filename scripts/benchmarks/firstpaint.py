@@ -0,0 +1,142 @@
+# Times how long the launcher takes until the kit list first paints, for a cold start, a prewarmed window,
+# a reused window and a reused window that was trimmed while hidden.
+import json
+import subprocess
+import sys
+from time import perf_counter
+from typing import Callable, Dict
+
+from scripts.benchmarks import link_kit
+
+link_kit()
+
+from PySide6.QtCore import QEvent, QObject  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+
+class FirstPaint(QObject):
+    """Event filter that records when the viewport of the kit list is painted."""
+
+    def __init__(self) -> None:
+        """Initialization of the event filter."""
+        super(FirstPaint, self).__init__()
+        self.painted = False
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        """Qt Override: Flags the first paint of the kit list.
+
+        Args:
+            watched: The object receiving the event.
+            event: The event.
+
+        Returns:
+            False, so the event is always delivered.
+        """
+        parent = watched.parent() if event.type() == QEvent.Paint else None
+        if parent is not None and parent.objectName() == "KitList":
+            self.painted = True
+        return False
+
+
+def time_to_paint(app: QApplication, action: Callable[[], None], timeout: float = 10.0) -> float:
+    """Runs the action and processes events until the kit list is painted.
+
+    Args:
+        app: The application.
+        action: The function that shows the window.
+        timeout: Seconds to wait for the paint.
+
+    Returns:
+        The milliseconds from calling the action to the first paint of the kit list.
+    """
+    first_paint = FirstPaint()
+    app.installEventFilter(first_paint)
+    start = perf_counter()
+    action()
+    while not first_paint.painted and perf_counter() - start < timeout:
+        app.processEvents()
+    elapsed = (perf_counter() - start) * 1e3
+    app.removeEventFilter(first_paint)
+    return elapsed
+
+
+def idle(app: QApplication, seconds: float) -> None:
+    """Processes events for a while, like an idle application.
+
+    Args:
+        app: The application.
+        seconds: The time to process events for.
+    """
+    start = perf_counter()
+    while perf_counter() - start < seconds:
+        app.processEvents()
+
+
+def run_scenario(scenario: str) -> Dict[str, float]:
+    """Times the first paint of one scenario in this process.
+
+    Args:
+        scenario: "cold" to build the window on the first launch, "prewarm" to build it hidden first.
+
+    Returns:
+        times: The milliseconds to the first paint, by launch.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    # Closing the window must not quit, it is shown again.
+    app.setQuitOnLastWindowClosed(False)
+    times = {}
+
+    if scenario == "prewarm":
+        from mkc.launcher import build_hidden_window, show_window
+        build_hidden_window()
+        # The user clicks some time after the window was prewarmed, let the images finish loading.
+        idle(app, 0.5)
+        times["prewarm"] = time_to_paint(app, show_window)
+        return times
+
+    def cold_launch() -> None:
+        # A cold launch also pays for importing the window and its widgets.
+        from mkc.launcher import show_window
+        show_window()
+
+    times["cold"] = time_to_paint(app, cold_launch)
+
+    from mkc.launcher import show_window
+    from mkc.prefs import DATA
+    DATA.mkc_window.close()
+    idle(app, 0.5)
+    times["reuse"] = time_to_paint(app, show_window)
+
+    DATA.mkc_window.close()
+    DATA.mkc_window.trim()
+    idle(app, 0.5)
+    times["trimmed"] = time_to_paint(app, show_window)
+    return times
+
+
+def run(runs: int = 3) -> None:
+    """Runs every scenario in new processes and prints the fastest time of each launch.
+
+    Args:
+        runs: The number of processes per scenario.
+    """
+    best: Dict[str, float] = {}
+    for scenario in ("cold", "prewarm"):
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, "-m", "scripts.benchmarks.firstpaint", scenario],
+                capture_output=True, text=True, check=True
+            )
+            for launch, elapsed in json.loads(result.stdout.splitlines()[-1]).items():
+                best[launch] = min(elapsed, best.get(launch, elapsed))
+
+    print(f"{'launch':<10}{'first paint (ms)':>18}")
+    for launch, elapsed in best.items():
+        print(f"{launch:<10}{elapsed:>18.1f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print(json.dumps(run_scenario(sys.argv[1])))
+    else:
+        run()
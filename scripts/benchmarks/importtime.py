@@ -0,0 +1,106 @@
+# Profiles what importing the kit costs when Modo registers its commands, and fails when it exceeds the budget.
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from typing import Dict, List, Tuple
+
+from scripts.prefs import Paths
+
+# Modules lxserv/mkc_commands.py imports at registration, mkc.command and lxserv itself also need Modo's lx module.
+REGISTRATION_MODULES = ["mkc", "mkc.prefs"]
+# Packages that must only be imported once the window or a command is first requested.
+DEFERRED_MODULES = ("PySide6", "PySide2", "sqlite3", "mkc.gui", "mkc.widgets", "mkc.database", "mkc.utils")
+# Total import time allowed for the registration modules, in milliseconds.
+BUDGET_MS = 25.0
+
+
+def import_times(statement: str) -> List[Tuple[str, int, int]]:
+    """Runs a statement in a new interpreter with `-X importtime`.
+
+    Args:
+        statement: The python code to run.
+
+    Returns:
+        imports: The name, indentation level and cumulative microseconds of every imported module, in import order.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(Paths.KIT), os.environ.get("PYTHONPATH", "")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], env=env, capture_output=True, text=True, check=True
+    )
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:  self [us] | cumulative | imported package", nested imports are indented.
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        name = package.strip()
+        imports.append((name, (len(package) - len(package.lstrip()) - 1) // 2, int(cumulative)))
+    return imports
+
+
+def profile(modules: List[str], runs: int) -> Tuple[float, Dict[str, int]]:
+    """Profiles importing the modules, leaving out the modules every interpreter imports on startup.
+
+    Args:
+        modules: The modules to import.
+        runs: The number of interpreters to start, the fastest run is kept.
+
+    Returns:
+        total_ms: The import time of the modules in milliseconds.
+        cumulative: The cumulative microseconds of every module they imported, from the fastest run.
+    """
+    startup = {name for name, _, _ in import_times("pass")}
+    statement = "; ".join(f"import {module}" for module in modules)
+
+    best_total = None
+    best_imports: Dict[str, int] = {}
+    for _ in range(runs):
+        imports = [item for item in import_times(statement) if item[0] not in startup]
+        # Nested imports are already part of the cumulative time of the top level ones.
+        total = sum(cumulative for _, level, cumulative in imports if level == 0) / 1e3
+        if best_total is None or total < best_total:
+            best_total = total
+            best_imports = {name: cumulative for name, _, cumulative in imports}
+
+    return best_total, best_imports
+
+
+def run(modules: List[str], budget: float, runs: int, top: int) -> bool:
+    """Prints the import profile of the modules and checks it against the budget.
+
+    Args:
+        modules: The modules to import.
+        budget: The allowed import time in milliseconds.
+        runs: The number of interpreters to start, the fastest run is kept.
+        top: The number of slowest modules to print.
+
+    Returns:
+        True if the imports are within budget and no deferred module was imported.
+    """
+    total, imports = profile(modules, runs)
+
+    print(f"{'module':<40}{'cumulative (ms)':>16}")
+    for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<40}{cumulative / 1e3:>16.2f}")
+    print(f"\nImporting {', '.join(modules)}: {total:.2f} ms (budget {budget:.2f} ms)")
+
+    deferred = sorted(name for name in imports if name.split(".")[0] in DEFERRED_MODULES or name in DEFERRED_MODULES)
+    if deferred:
+        print(f"Imported modules that should be deferred: {', '.join(deferred)}")
+    if total > budget:
+        print("Import time is over budget.")
+
+    return total <= budget and not deferred
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Profiles the import time of the kit with -X importtime.")
+    parser.add_argument("modules", nargs="*", default=REGISTRATION_MODULES, help="Modules to import.")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Allowed import time in milliseconds.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs, the fastest one is kept.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules to print.")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.modules, args.budget, args.runs, args.top) else 1)
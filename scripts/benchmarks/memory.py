@@ -0,0 +1,140 @@
+# Compares the memory and load time per kit of the kit records against the plain dataclasses they replaced,
+# on a synthetic catalog.
+import sqlite3
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+
+from scripts.benchmarks import link_kit
+from scripts.benchmarks.synthetic import write_catalog
+from scripts.database import build_database
+
+link_kit()
+
+from mkc.prefs import KitData, QueryData  # noqa: E402
+
+
+@dataclass
+class LegacyKitData:
+    """The kit dataclass the way mkc.prefs used to define it."""
+    id: int
+    name: str
+    author: str
+    version: str
+    description: str
+    url: str
+    help: str
+    installable: bool
+    search: List[str]
+    download: Optional[str] = None
+    sha256: Optional[str] = None
+    modo_min: Optional[int] = None
+    modo_max: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        """Convert the search string to a list."""
+        self.search = self.search.split(",") if self.search else []
+
+
+def load_legacy(connection: sqlite3.Connection) -> list:
+    """Loads every kit the way mkc.database used to.
+
+    Args:
+        connection: The connection to the database.
+
+    Returns:
+        kits: The legacy kit dataclasses.
+    """
+    return [LegacyKitData(*kit) for kit in connection.execute(QueryData.SelectKits).fetchall()]
+
+
+def load_rows(connection: sqlite3.Connection) -> list:
+    """Loads every kit as plain rows, the lower bound for any record type.
+
+    Args:
+        connection: The connection to the database.
+
+    Returns:
+        kits: The rows of the kits.
+    """
+    return connection.execute(QueryData.SelectKits).fetchall()
+
+
+def load_records(connection: sqlite3.Connection) -> list:
+    """Loads every kit with the row factory of the kit records.
+
+    Args:
+        connection: The connection to the database.
+
+    Returns:
+        kits: The kit records.
+    """
+    cursor = connection.cursor()
+    cursor.row_factory = KitData.from_row
+    return cursor.execute(QueryData.SelectKits).fetchall()
+
+
+def measure(
+        load: Callable[[sqlite3.Connection], list], connection: sqlite3.Connection, repeat: int = 20
+) -> Tuple[float, float]:
+    """Measures the memory the loaded kits hold on to and how long loading them takes.
+
+    Args:
+        load: The function loading all kits.
+        connection: The connection to the database.
+        repeat: The number of loads to time, the fastest is kept since other processes only slow a load down.
+
+    Returns:
+        bytes_per_kit: The memory held by the kits, divided by their number.
+        load_ms: The fastest of a few loads in milliseconds.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kits = load(connection)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    bytes_per_kit = held / len(kits)
+    del kits
+
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        load(connection)
+        times.append((perf_counter() - start) * 1e3)
+    return bytes_per_kit, min(times)
+
+
+def run(kits: int = 10000) -> None:
+    """Prints the memory and load time per kit of each record type.
+
+    Args:
+        kits: The number of kits in the synthetic catalog.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        kit_data, author_data = write_catalog(Path(folder), kits)
+        database = Path(folder) / "kits.db"
+        # The builder prints a summary, keep the benchmark output readable.
+        with redirect_stdout(StringIO()):
+            build_database(True, database, kit_data, author_data)
+
+        connection = sqlite3.connect(database)
+        print(f"{kits} kits")
+        print(f"{'records':<16}{'bytes per kit':>16}{'load (ms)':>12}{'vs legacy':>12}")
+        legacy_ms = None
+        for label, load in (("legacy", load_legacy), ("rows", load_rows), ("KitData", load_records)):
+            bytes_per_kit, load_ms = measure(load, connection)
+            legacy_ms = legacy_ms or load_ms
+            print(f"{label:<16}{bytes_per_kit:>16.0f}{load_ms:>12.1f}{load_ms / legacy_ms:>11.2f}x")
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Measures the memory per kit of the kit records.")
+    parser.add_argument("--kits", type=int, default=10000, help="Number of kits in the synthetic catalog.")
+    run(parser.parse_args().kits)
@@ -0,0 +1,83 @@
+# Records how many stylesheets are parsed and how long it takes every time the window is opened.
+import sys
+from os import environ
+from time import perf_counter
+from typing import Callable
+
+from scripts.benchmarks import link_kit
+
+link_kit()
+# Use the full repo stylesheet, like running the UI locally.
+environ['MKC_LOCAL'] = 'True'
+
+from PySide6.QtWidgets import QApplication, QWidget  # noqa: E402
+
+from mkc.gui import KitCentralWindow  # noqa: E402
+from mkc.prefs import DATA  # noqa: E402
+from mkc.widgets import KitWidget  # noqa: E402
+
+
+class StyleSheetCounter:
+    """Counts every non-empty stylesheet set on a widget or the application."""
+
+    def __init__(self) -> None:
+        """Initialization of the counter."""
+        self.parses = 0
+
+    def wrap(self, set_style_sheet: Callable) -> Callable:
+        """Wraps a setStyleSheet method to count its calls.
+
+        Args:
+            set_style_sheet: The original setStyleSheet method.
+
+        Returns:
+            The counting setStyleSheet method.
+        """
+        def counted(widget, style_sheet: str) -> None:
+            if style_sheet:
+                self.parses += 1
+            set_style_sheet(widget, style_sheet)
+
+        return counted
+
+    def install(self) -> None:
+        """Replaces the setStyleSheet methods with counting ones."""
+        QWidget.setStyleSheet = self.wrap(QWidget.setStyleSheet)
+        QApplication.setStyleSheet = self.wrap(QApplication.setStyleSheet)
+
+
+def run(opens: int = 5) -> None:
+    """Opens the window several times and prints the stylesheet parses and time per open.
+
+    Args:
+        opens: The number of times to open the window.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    counter = StyleSheetCounter()
+    counter.install()
+
+    print(f"{'open':<6}{'parses':>8}{'window (ms)':>14}{'author tab (ms)':>18}")
+    for index in range(opens):
+        counter.parses = 0
+        start = perf_counter()
+        DATA.mkc_window = window = KitCentralWindow()
+        app.processEvents()
+        window_time = (perf_counter() - start) * 1e3
+
+        # Open the first author tab, it holds one fold container per kit.
+        start = perf_counter()
+        kit_index = window.tab_kits.kit_model.index(0)
+        window.tab_kits.kit_view.toggle(kit_index)
+        kit_widget: KitWidget = window.tab_kits.kit_view.indexWidget(kit_index)
+        kit_widget.open_author(None)
+        app.processEvents()
+        author_time = (perf_counter() - start) * 1e3
+
+        print(f"{index + 1:<6}{counter.parses:>8}{window_time:>14.1f}{author_time:>18.1f}")
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+
+
+if __name__ == '__main__':
+    run()
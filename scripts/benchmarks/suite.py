@@ -0,0 +1,238 @@
+# Times building, loading and searching synthetic catalogs of several sizes and writes the results as json,
+# so runs on different commits can be compared. Runs headless with QT_QPA_PLATFORM=offscreen.
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from scripts.benchmarks import link_kit
+from scripts.benchmarks.synthetic import write_catalog
+from scripts.database import build_database
+from scripts.prefs import Paths
+
+link_kit()
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PySide6  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from mkc import prefs  # noqa: E402
+from mkc.database import CONNECTION, SEARCH_CACHE, get_kits, get_author_page, search_kits  # noqa: E402
+from mkc.widgets import AuthorTab, KitsTab  # noqa: E402
+
+SIZES = [1000, 10000]
+QUERIES = ["mesh", "uv, bake", "python", "procedural meshop", "zzz", ""]
+
+
+def measure(func: Callable, repeat: int) -> Dict[str, float]:
+    """Times a function call.
+
+    Args:
+        func: The function to call without arguments.
+        repeat: The number of times to call the function.
+
+    Returns:
+        timing: The mean and fastest duration in milliseconds and the number of calls.
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        times.append((perf_counter() - start) * 1e3)
+    return {"mean_ms": sum(times) / len(times), "min_ms": min(times), "repeat": repeat}
+
+
+def peak_memory(func: Callable) -> float:
+    """Measures the peak of the memory Python allocates during a function call, Qt allocations are not counted.
+
+    Args:
+        func: The function to call without arguments.
+
+    Returns:
+        The peak in KiB.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def git_commit() -> str:
+    """Gets the commit the benchmarks run on.
+
+    Returns:
+        The short hash of HEAD or "unknown" outside of a git checkout.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Paths.ROOT, capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_size(app: QApplication, kits: int, folder: Path, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Runs every benchmark on a synthetic catalog.
+
+    Args:
+        app: The application.
+        kits: The number of kits in the catalog.
+        folder: The folder to write the catalog and database to.
+        repeat: The number of calls for the fast benchmarks, slow ones use fewer.
+
+    Returns:
+        results: The timing of every benchmark, by name.
+    """
+    kit_data, author_data = write_catalog(folder, kits)
+    database = folder / "kits.db"
+    results = {}
+
+    # The builder prints a summary, keep the benchmark output readable.
+    with redirect_stdout(StringIO()):
+        results["build_database"] = measure(lambda: build_database(True, database, kit_data, author_data), 1)
+    prefs.Paths.DATABASE = database
+
+    results["get_kits"] = measure(get_kits, repeat)
+
+    def search(query: str) -> None:
+        # Time the database search, not the cached results of the previous call.
+        SEARCH_CACHE.clear()
+        search_kits(query)
+
+    for query in QUERIES:
+        results[f"search_kits({query!r})"] = measure(lambda: search(query), repeat)
+
+    def build_tab() -> None:
+        tab = KitsTab()
+        app.processEvents()
+        tab.deleteLater()
+
+    results["KitsTab"] = measure(build_tab, max(1, repeat // 20))
+    # The tab only reads its first page, so its memory shouldn't grow with the catalog.
+    results["KitsTab"]["peak_kib"] = peak_memory(build_tab)
+
+    tab = KitsTab()
+
+    def search_tab(query: str) -> None:
+        # The search bar searches on a worker thread, search on this one so the whole search is timed.
+        tab.search_bar.apply_results(search_kits(query))
+
+    # Named after the search bar's former synchronous search, so runs on older commits still compare.
+    for query in QUERIES:
+        results[f"KitSearchBar.search({query!r})"] = measure(lambda: search_tab(query), repeat)
+
+    def type_searches() -> None:
+        SEARCH_CACHE.clear()
+        for query in QUERIES:
+            for end in range(1, len(query) + 1):
+                search_tab(query[:end])
+
+    results["KitSearchBar.typing"] = measure(type_searches, max(1, repeat // 20))
+    # Searches read no kits and the cache is bounded, so their memory shouldn't grow with the catalog either.
+    results["KitSearchBar.typing"]["peak_kib"] = peak_memory(type_searches)
+    tab.deleteLater()
+
+    # Open the page of the author with the most kits.
+    counts: Dict[str, int] = {}
+    for kit in get_kits():
+        counts[kit.author] = counts.get(kit.author, 0) + 1
+    author = max(counts, key=counts.get)
+
+    def open_author() -> None:
+        author_tab = AuthorTab(*get_author_page(author))
+        app.processEvents()
+        author_tab.deleteLater()
+
+    results["AuthorTab"] = measure(open_author, max(1, repeat // 20))
+    results["AuthorTab"]["kits"] = counts[author]
+
+    app.processEvents()
+    CONNECTION.close()
+    return results
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Prints the change of every benchmark against a previous run.
+
+    Args:
+        results: The results of this run.
+        baseline: The results of the previous run.
+    """
+    print(f"\nCompared to {baseline['meta']['commit']}:")
+    for size, timings in results["results"].items():
+        for name, timing in timings.items():
+            previous = baseline["results"].get(size, {}).get(name)
+            if previous:
+                change = (timing["min_ms"] / previous["min_ms"] - 1) * 100 if previous["min_ms"] else 0
+                print(f"{size:>7} {name:<40}{previous['min_ms']:>12.3f}{timing['min_ms']:>12.3f}{change:>+9.1f}%")
+
+
+def run(sizes: List[int], repeat: int, output: Path, baseline: Path = None) -> dict:
+    """Runs the suite for every catalog size and writes the results.
+
+    Args:
+        sizes: The numbers of kits to generate catalogs with.
+        repeat: The number of calls for the fast benchmarks.
+        output: The json file to write the results to.
+        baseline: The json results of a previous run to compare against.
+
+    Returns:
+        results: The metadata of the run and the timings by catalog size.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "qt": PySide6.__version__,
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    database = prefs.Paths.DATABASE
+
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            for kits in sizes:
+                timings = run_size(app, kits, Path(folder) / str(kits), repeat)
+                results["results"][str(kits)] = timings
+                print(f"\n{kits} kits")
+                print(f"{'benchmark':<40}{'mean (ms)':>12}{'min (ms)':>12}")
+                for name, timing in timings.items():
+                    print(f"{name:<40}{timing['mean_ms']:>12.3f}{timing['min_ms']:>12.3f}")
+    finally:
+        prefs.Paths.DATABASE = database
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=1))
+    print(f"\nResults written to {output}")
+    if baseline:
+        compare(results, json.loads(baseline.read_text()))
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmarks synthetic catalogs and writes the results as json.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Catalog sizes, 1000 to 100000 kits.")
+    parser.add_argument("--repeat", type=int, default=100, help="Calls per fast benchmark.")
+    parser.add_argument("--output", type=Path, help="Json file to write, defaults to build/benchmarks/<commit>.json.")
+    parser.add_argument("--baseline", type=Path, help="Json results of a previous run to compare against.")
+    args = parser.parse_args()
+
+    output_path = args.output or Paths.ROOT / "build" / "benchmarks" / f"{git_commit()}.json"
+    run(args.sizes, args.repeat, output_path, args.baseline)
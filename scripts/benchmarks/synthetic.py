@@ -0,0 +1,179 @@
+# Generates kits.json and authors.json with any number of realistic kits, to benchmark large catalogs.
+import json
+import random
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from scripts.prefs import Paths
+
+PREFIXES = [
+    "Quick", "Smart", "Auto", "Batch", "Procedural", "Live", "Super", "Hyper", "Easy", "Fast", "Pro", "Clean", "Mega",
+    "Ultra", "Simple", "Power", "Micro", "Turbo",
+]
+SUBJECTS = [
+    "Mesh", "UV", "Bake", "Bevel", "Align", "Snap", "Retopo", "Curve", "Render", "Material", "Texture", "Light",
+    "Camera", "Rig", "Particle", "Hair", "Decal", "Boolean", "Scatter", "Export", "Import", "Pivot", "Edge", "Poly",
+    "Vertex", "Weight", "Morph", "Instance", "Replicator", "Sculpt", "Paint", "Loop", "Grid", "Symmetry", "Fillet",
+]
+NOUNS = ["Tools", "Kit", "Pack", "Toolkit", "Helper", "Utils", "Suite", "Manager", "Master", "Studio", "Box", "Lab"]
+TAGS = [
+    "modeling", "uv", "bake", "render", "python", "meshop", "procedural", "game", "export", "import", "animation",
+    "rigging", "shading", "texturing", "layout", "cleanup", "selection", "workflow", "pie menu", "hotkeys", "cad",
+    "retopology", "booleans", "particles", "lighting", "camera", "scene", "batch", "livelink", "unreal", "unity",
+    "substance", "sculpting", "painting", "topology", "normals", "pivot", "snapping", "instancing", "deformers",
+]
+SENTENCES = [
+    "A collection of {subject} tools that speed up everyday {tag} work in Modo.",
+    "Adds {count} new commands for {tag} and {tag2}.",
+    "{name} streamlines your {tag} workflow with one-click presets.",
+    "Includes pie menus, hotkeys and a custom form for {subject} editing.",
+    "Works with Modo {version} and newer.",
+    "Automates repetitive {tag} tasks so you can focus on the creative part.",
+    "Supports batch processing of whole scenes.",
+    "Free for personal and commercial use.",
+    "Exports straight to {engine} with the right scale and axis.",
+]
+FIRST_NAMES = [
+    "Shawn", "Franck", "Mario", "Richard", "William", "James", "Anna", "Lena", "Marco", "Yuki", "Oskar", "Ines",
+    "Pavel", "Chloe", "Tomas", "Sofia", "Kenji", "Maya", "Lucas", "Nora", "Ravi", "Elena", "Jonas", "Greta",
+]
+LAST_NAMES = [
+    "Frueh", "Elisabeth", "Baldi", "Yot", "Vaughan", "Novak", "Berg", "Rossi", "Tanaka", "Lind", "Moreau", "Silva",
+    "Kowalski", "Dubois", "Fischer", "Costa", "Sato", "Larsen", "Meyer", "Weber", "Horvat", "Bauer", "Olsen", "Klein",
+]
+ENGINES = ["Unreal", "Unity", "Godot", "Substance Painter", "Marmoset Toolbag"]
+
+
+def make_authors(count: int, rng: random.Random) -> Dict[str, dict]:
+    """Generates unique authors with handles, avatars and links.
+
+    Args:
+        count: The number of authors.
+        rng: The random generator.
+
+    Returns:
+        authors: The authors.json data.
+    """
+    authors = {}
+    while len(authors) < count:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name in authors:
+            name = f"{name} {len(authors)}"
+        handle = name.replace(" ", "")
+        authors[name] = {
+            "avatar": f"{handle.lower()}.png" if rng.random() < 0.5 else None,
+            "handle": handle,
+            "links": {
+                "Community": f"https://community.foundry.com/profile/{handle.lower()}",
+                "Gumroad": f"https://{handle.lower()}.gumroad.com/",
+            },
+        }
+    return authors
+
+
+def make_kit(name: str, author: str, rng: random.Random) -> dict:
+    """Generates a kit with the fields and the rough proportions of optional fields of the real kits.json.
+
+    Args:
+        name: The name of the kit.
+        author: The name of the author.
+        rng: The random generator.
+
+    Returns:
+        kit: The kit data.
+    """
+    slug = name.lower().replace(" ", "-")
+    tags = rng.sample(TAGS, rng.randint(3, 6))
+    values = {
+        "name": name, "subject": rng.choice(SUBJECTS).lower(), "tag": tags[0], "tag2": tags[1],
+        "count": rng.randint(3, 60), "version": rng.choice([12, 13, 14, 15, 16, 17]), "engine": rng.choice(ENGINES),
+    }
+    sentences = rng.sample(SENTENCES, rng.randint(1, 4))
+    kit = {
+        "author": author,
+        "version": f"{rng.randint(1, 5)}.{rng.randint(0, 9)}",
+        "description": " ".join(sentence.format(**values) for sentence in sentences),
+        "url": f"https://{author.split()[0].lower()}.gumroad.com/l/{slug}",
+        "help": f"https://community.foundry.com/discuss/topic/{rng.randint(100000, 199999)}",
+        "search": tags,
+    }
+    if rng.random() < 0.1:
+        kit["installable"] = True
+        kit["download"] = f"https://example.com/kits/{slug}.lpk"
+        kit["sha256"] = f"{rng.getrandbits(256):064x}"
+    if rng.random() < 0.2:
+        kit["modo_min"] = rng.choice([1200, 1300, 1400, 1500])
+        kit["modo_max"] = kit["modo_min"] + rng.choice([100, 200, 300])
+    if rng.random() < 0.05:
+        kit["add_ons"] = {
+            f"{rng.choice(PREFIXES)} {rng.choice(SUBJECTS)} Preset": {
+                "url": f"https://example.com/add-ons/{slug}-{index}",
+                "description": rng.choice(SENTENCES).format(**values),
+            }
+            for index in range(rng.randint(1, 3))
+        }
+    return kit
+
+
+def make_catalog(kits: int, seed: int = 0) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """Generates a catalog, the same count and seed always give the same catalog.
+
+    Authors get a long tail of kits like the real catalog, a few authors publish most of them.
+
+    Args:
+        kits: The number of kits.
+        seed: The random seed.
+
+    Returns:
+        kits_data: The kits.json data.
+        authors_data: The authors.json data.
+    """
+    rng = random.Random(seed)
+    authors_data = make_authors(max(1, kits // 4), rng)
+    authors: List[str] = list(authors_data)
+    # Zipf weights give a few prolific authors and many with a single kit.
+    weights = [1 / rank for rank in range(1, len(authors) + 1)]
+
+    kits_data = {}
+    for author in rng.choices(authors, weights, k=kits):
+        name = f"{rng.choice(PREFIXES)} {rng.choice(SUBJECTS)} {rng.choice(NOUNS)}"
+        if name in kits_data:
+            name = f"{name} {len(kits_data)}"
+        kits_data[name] = make_kit(name, author, rng)
+
+    return kits_data, authors_data
+
+
+def write_catalog(output: Path, kits: int, seed: int = 0) -> Tuple[Path, Path]:
+    """Writes a generated kits.json and authors.json.
+
+    Args:
+        output: The folder to write to.
+        kits: The number of kits.
+        seed: The random seed.
+
+    Returns:
+        kit_data: The kits json file.
+        author_data: The authors json file.
+    """
+    kits_data, authors_data = make_catalog(kits, seed)
+    output.mkdir(parents=True, exist_ok=True)
+    kit_data = output / "kits.json"
+    author_data = output / "authors.json"
+    kit_data.write_text(json.dumps(kits_data, indent=2))
+    author_data.write_text(json.dumps(authors_data, indent=2))
+    return kit_data, author_data
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Generates kits.json and authors.json with synthetic kits.")
+    parser.add_argument("kits", type=int, help="Number of kits, e.g. 1000 to 100000.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--output", type=Path, default=Paths.ROOT / "build" / "synthetic", help="Folder to write the json files to."
+    )
+    args = parser.parse_args()
+
+    for path in write_catalog(args.output, args.kits, args.seed):
+        print(path)
@@ -1,15 +1,59 @@
+from argparse import ArgumentParser
+from contextlib import contextmanager
 from pathlib import Path
 from shutil import rmtree
-from zipfile import ZipFile, ZIP_DEFLATED
+from time import perf_counter
+from typing import Dict, Iterator, Optional
 
-from .utils import Paths, make_index, get_pyproject, get_version, readable_size
+from .images import stage_kit
+from .lpk import BlobCache, LpkEntry, compress_entries, write_lpk
+from .utils import (
+    Paths, KitFile, MANIFEST_NAME, hash_file, scan_kit, make_index, make_manifest, get_pyproject, get_version,
+    readable_size
+)
 
+# Folder inside the build directory that is kept between builds.
+CACHE_FOLDER = ".cache"
 
-def package_kit(project_data: dict) -> Path:
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Records how long a build stage takes.
+
+    Args:
+        timings: The stage durations in seconds, by stage name.
+        stage: The name of the stage.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + perf_counter() - start
+
+
+def clean_build_dir(build_dir: Path) -> None:
+    """Removes the previous build output, keeping the cache.
+
+    Args:
+        build_dir: The build directory.
+    """
+    build_dir.mkdir(parents=True, exist_ok=True)
+    for path in build_dir.iterdir():
+        if path.name == CACHE_FOLDER:
+            continue
+        if path.is_dir():
+            rmtree(path)
+        else:
+            path.unlink()
+
+
+def package_kit(project_data: dict, pack_images: bool = False, jobs: Optional[int] = None) -> Path:
     """Packages the kit into an LPK file.
 
     Args:
         project_data: The data from the pyproject.toml file.
+        pack_images: If the avatars and banners should be packed into the images database.
+        jobs: The number of processes to compress with, defaults to the number of CPUs.
 
     Returns:
         lpk_path: The path to the LPK file.
@@ -23,14 +67,15 @@ def package_kit(project_data: dict) -> Path:
     # Get the license file
     license_file = Paths.REPO_ROOT / "LICENSE"
 
-    # Get all files in the kit directory while ignoring .pyc files
-    kit_files = [f for f in kit_dir.glob("**/*") if f.is_file() and not f.suffix == ".pyc"]
+    timings: Dict[str, float] = {}
 
-    # Clear the build directory
-    if build_dir.exists():
-        rmtree(build_dir)
-    # Remake the build directory
-    build_dir.mkdir(parents=True, exist_ok=True)
+    # Clear the previous build, the compressed blobs are kept for the next one.
+    with timed(timings, "clean"):
+        clean_build_dir(build_dir)
+
+    # Stage the runtime files with their images optimized and package the staged kit.
+    with timed(timings, "stage"):
+        kit_dir = stage_kit(kit_dir, build_dir / "stage", pack=pack_images)
 
     # Format the lpk file name with the version number from the VERSION file
     version = get_version(project_data)
@@ -40,30 +85,61 @@ def package_kit(project_data: dict) -> Path:
     # Message to display to the users
     user_message = f"Successfully installed {kit_name}: v{version}"
 
-    # Build the LPK file.
-    with ZipFile(lpk_path, mode='w', compression=ZIP_DEFLATED) as lpk:
-        # Add the license
-        lpk.write(license_file, "license")
+    # Walk and hash the kit files once, in a fixed order so the same files always give the same LPK.
+    with timed(timings, "hash"):
+        kit_files = scan_kit(kit_dir)
+        # Write the manifest into the kit, so the installed kit knows the hash of its files.
+        manifest_data = make_manifest(files=kit_files, version=version)
+        manifest_path = kit_dir / MANIFEST_NAME
+        manifest_path.write_text(manifest_data)
+        (build_dir / MANIFEST_NAME).write_text(manifest_data)
+        kit_files = sorted(
+            kit_files + [KitFile(manifest_path, MANIFEST_NAME, manifest_path.stat().st_size, hash_file(manifest_path))],
+            key=lambda file: file.name
+        )
         # Generate the index.xml file data
         index_data = make_index(folder=kit_dir, files=kit_files, message=user_message)
-        # Write the index.xml file
-        lpk.writestr("index.xml", index_data)
 
-        # Write all file into the lpk
+    # Read every entry, the index first.
+    with timed(timings, "read"):
+        entries = [
+            LpkEntry("index.xml", index_data.encode('utf-8')),
+            LpkEntry("license", license_file.read_bytes()),
+        ]
         for file in kit_files:
-            print(f"Adding: {file.relative_to(kit_dir)}")
-            lpk.write(file, file.relative_to(kit_dir).as_posix())
+            print(f"Adding: {file.name}")
+            entries.append(LpkEntry(file.name, file.path.read_bytes(), digest=file.sha256))
+
+    # Compress the entries that aren't cached yet.
+    cache = BlobCache(build_dir / CACHE_FOLDER)
+    with timed(timings, "compress"):
+        compress_entries(entries, cache, jobs=jobs)
+
+    # Build the LPK file.
+    with timed(timings, "write"):
+        write_lpk(lpk_path, entries)
+    # Only once the LPK is written, so a failed build keeps the blobs of the previous one.
+    pruned = readable_size(cache.prune(), decimal=2)
 
     # Get the size of the LPK file, in MB
     package_size = readable_size(lpk_path.stat().st_size, decimal=2)
 
     print(f"\nLPK package built: {lpk_name}")
     print(f"Package Size: {package_size}")
+    print(f"Compression cache: {cache.hits} hits, {cache.misses} misses, {pruned} of unused blobs pruned")
+    for stage, duration in timings.items():
+        print(f"{stage:<10}{duration * 1e3:>10.1f} ms")
+    print(f"{'total':<10}{sum(timings.values()) * 1e3:>10.1f} ms")
     return lpk_path
 
 
 if __name__ == '__main__':
+    parser = ArgumentParser(description="Packages the kit into an LPK file.")
+    parser.add_argument("--pack-images", action="store_true", help="Store avatars and banners in images.db.")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of processes to compress with.")
+    args = parser.parse_args()
+
     # Get the project details
     project = get_pyproject()
 
-    package_kit(project)
+    package_kit(project, pack_images=args.pack_images, jobs=args.jobs)
@@ -0,0 +1,123 @@
+# Publishes the kits database for catalog sync, with a row delta from a previously published catalog.
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+from shutil import copyfile
+from sqlite3 import connect
+from typing import Dict, List
+
+from scripts.prefs import Paths
+
+# Tables synced by row, the search index is rebuilt from them by the client.
+SYNCED_TABLES = ("authors", "kits", "add_ons")
+
+
+def read_rows(database: Path, table: str) -> Dict[int, dict]:
+    """Reads every row of a table.
+
+    Args:
+        database: The database file.
+        table: The name of the table.
+
+    Returns:
+        rows: The rows as column dictionaries, by id.
+    """
+    connection = connect(database)
+    try:
+        cursor = connection.execute(f"SELECT * FROM {table}")
+        columns = [column[0] for column in cursor.description]
+        return {row[0]: dict(zip(columns, row)) for row in cursor}
+    finally:
+        connection.close()
+
+
+def catalog_version(database: Path) -> int:
+    """Gets the catalog version of a database.
+
+    Args:
+        database: The database file.
+
+    Returns:
+        The user_version of the database.
+    """
+    connection = connect(database)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def table_schemas(database: Path) -> Dict[str, str]:
+    """Gets the create statements of the tables in a database.
+
+    Args:
+        database: The database file.
+
+    Returns:
+        schemas: The create statement of every table, by name.
+    """
+    connection = connect(database)
+    try:
+        return dict(connection.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall())
+    finally:
+        connection.close()
+
+
+def make_delta(old_database: Path, new_database: Path) -> dict:
+    """Builds the row delta between two versions of the kits database.
+
+    Rows are matched by id and compared by every column, not only the hash the builder stores for every record,
+    since the builder also changes the author of a kit when its author is removed or added back.
+
+    Args:
+        old_database: The previously published database.
+        new_database: The database to publish.
+
+    Returns:
+        delta: The changed rows and removed ids of every synced table, with both catalog versions.
+    """
+    delta = {"from_version": catalog_version(old_database), "version": catalog_version(new_database)}
+
+    for table in SYNCED_TABLES:
+        old_rows = read_rows(old_database, table)
+        new_rows = read_rows(new_database, table)
+        changed: List[dict] = [
+            row for row_id, row in new_rows.items()
+            if old_rows.get(row_id) != row
+        ]
+        delta[table] = changed
+        delta[f"removed_{table}"] = sorted(row_id for row_id in old_rows if row_id not in new_rows)
+
+    return delta
+
+
+def publish_catalog(old_databases: List[Path], output: Path) -> None:
+    """Copies the kits database into the output folder with a delta from each previously published database.
+
+    Args:
+        old_databases: The previously published databases to write deltas from.
+        output: The folder to publish to.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    copyfile(Paths.KIT_DATABASE, output / "kits.db")
+    print(f"Catalog version: {catalog_version(Paths.KIT_DATABASE)}")
+
+    schemas = table_schemas(Paths.KIT_DATABASE)
+    for old_database in old_databases:
+        # Rows can't be applied to a database with other tables, clients on that version download the full catalog.
+        if table_schemas(old_database) != schemas:
+            print(f"{old_database}: schema changed, no delta published.")
+            continue
+        delta = make_delta(old_database, Paths.KIT_DATABASE)
+        delta_path = output / f"kits-delta-{delta['from_version']}.json"
+        delta_path.write_text(json.dumps(delta))
+        print(f"{delta_path.name}: {len(delta['kits'])} kits, {len(delta['authors'])} authors changed")
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Publishes kits.db with row deltas for catalog sync.")
+    parser.add_argument("previous", nargs="*", type=Path, help="Previously published kits.db files.")
+    parser.add_argument("--output", type=Path, default=Paths.ROOT / "build" / "catalog", help="Folder to publish to.")
+    args = parser.parse_args()
+
+    publish_catalog(args.previous, args.output)
@@ -0,0 +1,297 @@
+# Checks catalog sync, kit updates and kit installs end to end against a local http server, and exits with an
+# error if any of them fails.
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager, redirect_stdout
+from functools import partial
+from hashlib import sha256
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Iterator, List
+from zipfile import ZipFile
+
+from scripts.benchmarks import link_kit
+from scripts.catalog import make_delta
+from scripts.database import build_database
+from scripts.prefs import Paths
+from scripts.utils import make_manifest, scan_kit
+
+link_kit()
+
+from mkc import prefs  # noqa: E402
+from mkc.database import CONNECTION, get_author_page  # noqa: E402
+from mkc.install import InstallError, install_kit  # noqa: E402
+from mkc.sync import apply_pending, catalog_version, pending_path, sync_catalog  # noqa: E402
+from mkc.update import update_kit  # noqa: E402
+
+
+class CheckError(Exception):
+    """Raised when a check fails."""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Serves a folder without logging every request."""
+
+    def log_message(self, *args) -> None:
+        """Overrides: Drops the request log."""
+
+
+@contextmanager
+def serve(folder: Path) -> Iterator[str]:
+    """Serves a folder over http on a free local port.
+
+    Args:
+        folder: The folder to serve.
+
+    Returns:
+        url: The url of the folder.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(folder)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def expect(condition: bool, message: str) -> None:
+    """Fails the check if the condition is false.
+
+    Args:
+        condition: The condition that must hold.
+        message: What went wrong.
+    """
+    if not condition:
+        raise CheckError(message)
+
+
+def build_catalogs(folder: Path) -> str:
+    """Builds a catalog from the repository data and a newer one without its first author.
+
+    Args:
+        folder: The folder to build in.
+
+    Returns:
+        author: The name of the author the newer catalog removed.
+    """
+    kit_data, author_data = folder / "kits.json", folder / "authors.json"
+    shutil.copyfile(Paths.KIT_DATA, kit_data)
+    shutil.copyfile(Paths.AUTHOR_DATA, author_data)
+    # The builder prints a summary, keep the check output readable.
+    with redirect_stdout(StringIO()):
+        build_database(True, folder / "old.db", kit_data, author_data)
+        shutil.copyfile(folder / "old.db", folder / "new.db")
+        authors = json.loads(author_data.read_text())
+        author = next(iter(authors))
+        del authors[author]
+        author_data.write_text(json.dumps(authors))
+        build_database(False, folder / "new.db", kit_data, author_data)
+    return author
+
+
+def use_database(database: Path) -> None:
+    """Points the kit at a database and its sync files.
+
+    Args:
+        database: The kits database to use.
+    """
+    prefs.Paths.DATABASE = database
+    prefs.Paths.CATALOG_STATE = database.with_name("kits_sync.json")
+    prefs.Paths.CATALOG_PENDING = database.with_name("kits.db.pending")
+    CONNECTION.close()
+
+
+def check_sync(folder: Path) -> None:
+    """Syncs an old catalog by delta and by full download.
+
+    Args:
+        folder: The folder to work in.
+    """
+    author = build_catalogs(folder)
+    published = folder / "catalog"
+    published.mkdir()
+    shutil.copyfile(folder / "new.db", published / "kits.db")
+    delta_path = published / prefs.Catalog.DELTA.format(version=catalog_version(folder / "old.db"))
+    delta_path.write_text(json.dumps(make_delta(folder / "old.db", folder / "new.db")))
+    new_version = catalog_version(folder / "new.db")
+
+    client_dir = folder / "client"
+    client_dir.mkdir()
+    database = client_dir / "kits.db"
+    use_database(database)
+    with serve(published) as url:
+        shutil.copyfile(folder / "old.db", database)
+        result = sync_catalog(url)
+        expect(result.method == "delta" and result.version == new_version, f"Delta sync gave {result}")
+        expect(get_author_page(author) is None, "The removed author still has a page")
+        with sqlite3.connect(database) as connection:
+            dangling = connection.execute(prefs.QueryData.CountDanglingKits).fetchone()[0]
+        expect(not dangling, f"{dangling} kits reference the removed author")
+        expect(not sync_catalog(url).changed, "A current catalog was replaced")
+
+        # Without a delta for the installed version the whole catalog is downloaded.
+        delta_path.unlink()
+        shutil.copyfile(folder / "old.db", database)
+        prefs.Paths.CATALOG_STATE.unlink(missing_ok=True)
+        result = sync_catalog(url)
+        expect(result.method == "full" and result.version == new_version, f"Full sync gave {result}")
+    CONNECTION.close()
+
+
+@contextmanager
+def locked(database: Path) -> Iterator[None]:
+    """Fails every replace of a database like Windows does while the database is open.
+
+    Args:
+        database: The database that can't be replaced.
+    """
+    replace = os.replace
+
+    def locked_replace(source, target) -> None:
+        if Path(target) == database:
+            raise PermissionError(f"{database} is open")
+        replace(source, target)
+
+    os.replace = locked_replace
+    try:
+        yield
+    finally:
+        os.replace = replace
+
+
+def check_pending(folder: Path) -> None:
+    """Syncs while the database is open and swaps the pending catalog in on the next start.
+
+    Args:
+        folder: The folder to work in, with the catalogs of check_sync.
+    """
+    database = folder / "client" / "kits.db"
+    use_database(database)
+    shutil.copyfile(folder / "old.db", database)
+    prefs.Paths.CATALOG_STATE.unlink(missing_ok=True)
+    new_version = catalog_version(folder / "new.db")
+    with serve(folder / "catalog") as url, locked(database):
+        result = sync_catalog(url)
+        expect(result.pending and not result.changed, f"Sync of an open database gave {result}")
+        expect(catalog_version(database) != new_version, "The open database was replaced")
+        # A window built while the database is still open leaves the catalog pending.
+        expect(not apply_pending(), "The pending catalog replaced the open database")
+    # The next window swaps it in before connecting.
+    expect(apply_pending(), "The pending catalog wasn't applied on the next start")
+    expect(catalog_version(database) == new_version, "The pending catalog isn't the installed one")
+    expect(not pending_path(database).exists(), "The pending catalog was left behind")
+    CONNECTION.close()
+
+
+def write_kit(kit_root: Path, files: dict, version: str) -> None:
+    """Writes a kit folder with its manifest.
+
+    Args:
+        kit_root: The kit folder.
+        files: The contents of the kit files, by relative path, databases are copied from a path.
+        version: The version of the kit.
+    """
+    for name, content in files.items():
+        path = kit_root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, Path):
+            shutil.copyfile(content, path)
+        else:
+            path.write_text(content)
+    (kit_root / prefs.Update.MANIFEST).write_text(make_manifest(scan_kit(kit_root), version))
+
+
+def check_update(folder: Path) -> None:
+    """Updates a kit that synced a newer catalog than its release ships, and one whose release ships a newer one.
+
+    Args:
+        folder: The folder to work in, with the catalogs of check_sync.
+    """
+    release, kit_root = folder / "release", folder / "kit"
+    write_kit(release, {"mkc/a.py": "new", "mkc/b.py": "same", prefs.Update.DATABASE: folder / "old.db"}, "2")
+    # The installed kit synced the newer catalog after its release.
+    installed = {"mkc/a.py": "old", "mkc/b.py": "same", "mkc/gone.py": "old", prefs.Update.DATABASE: folder / "new.db"}
+    write_kit(kit_root, installed, "1")
+
+    with serve(release) as url:
+        result = update_kit(url, kit_root, folder / "stage")
+        expect(result.updated == ["mkc/a.py"], f"Updated {result.updated} instead of only the changed file")
+        expect(result.removed == ["mkc/gone.py"], f"Removed {result.removed} instead of the deleted file")
+        expect((kit_root / "mkc/a.py").read_text() == "new", "The changed file wasn't replaced")
+        expect(
+            catalog_version(kit_root / prefs.Update.DATABASE) == catalog_version(folder / "new.db"),
+            "The synced catalog was replaced by the older catalog of the release"
+        )
+        expect(not update_kit(url, kit_root, folder / "stage").changed, "An updated kit was updated again")
+
+    # A release with a newer catalog leaves it pending, the running kit has the database open.
+    release, kit_root = folder / "release_new", folder / "kit_old"
+    write_kit(release, {prefs.Update.DATABASE: folder / "new.db"}, "2")
+    write_kit(kit_root, {prefs.Update.DATABASE: folder / "old.db"}, "1")
+    database = kit_root / prefs.Update.DATABASE
+    with serve(release) as url, locked(database):
+        result = update_kit(url, kit_root, folder / "stage_new")
+    expect(result.updated == [prefs.Update.DATABASE], f"Updated {result.updated} instead of the catalog")
+    expect(catalog_version(database) == catalog_version(folder / "old.db"), "The open database was replaced")
+    expect(apply_pending(database), "The catalog of the release wasn't applied on the next start")
+    expect(catalog_version(database) == catalog_version(folder / "new.db"), "The release catalog isn't installed")
+
+
+def check_install(folder: Path) -> None:
+    """Installs a kit from a zip and refuses one that doesn't match its sha256.
+
+    Args:
+        folder: The folder to work in.
+    """
+    published = folder / "kits"
+    published.mkdir()
+    archive = published / "demo.zip"
+    with ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("demo_kit/index.cfg", "<configuration/>")
+    digest = sha256(archive.read_bytes()).hexdigest()
+    kits_dir = folder / "installed"
+
+    with serve(published) as url:
+        installed = install_kit(url + archive.name, digest, kits_dir)
+        expect(installed == [kits_dir / "demo_kit"], f"Installed {installed}")
+        expect((kits_dir / "demo_kit" / "index.cfg").is_file(), "The kit files weren't extracted")
+        try:
+            install_kit(url + archive.name, "0" * 64, kits_dir)
+        except InstallError:
+            pass
+        else:
+            raise CheckError("A download that doesn't match its sha256 was installed")
+        expect(sorted(path.name for path in kits_dir.iterdir()) == ["demo_kit"], "The failed install left files")
+
+
+def run(checks: List[Callable[[Path], None]]) -> bool:
+    """Runs the checks in one temporary folder, in order.
+
+    Args:
+        checks: The checks to run.
+
+    Returns:
+        True if every check passed.
+    """
+    passed = True
+    with tempfile.TemporaryDirectory() as folder:
+        for check in checks:
+            try:
+                check(Path(folder))
+                print(f"{check.__name__:<16}ok")
+            except Exception as error:
+                print(f"{check.__name__:<16}FAILED: {error}")
+                passed = False
+    return passed
+
+
+if __name__ == '__main__':
+    sys.exit(0 if run([check_sync, check_pending, check_update, check_install]) else 1)
@@ -0,0 +1,86 @@
+# Checks that typing a search gives the same kits in the same order as searching it at once, on a synthetic
+# catalog, and exits with an error if any search differs.
+import sys
+import tempfile
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from typing import List
+
+from scripts.benchmarks import link_kit
+from scripts.benchmarks.synthetic import NOUNS, PREFIXES, SUBJECTS, TAGS, write_catalog
+from scripts.database import build_database
+
+link_kit()
+
+from mkc import prefs  # noqa: E402
+from mkc.database import CONNECTION, SEARCH_CACHE, search_kits  # noqa: E402
+
+# Single words of the catalog and searches of several terms, every prefix of them is typed.
+QUERIES = [word.lower() for word in PREFIXES + SUBJECTS + NOUNS + TAGS] + [
+    "uv, bake", "mesh, python", "procedural mesh", "quick uv tools", "retopo, cleanup, game",
+]
+
+
+def type_search(search_text: str) -> List[str]:
+    """Types a search one character at a time and compares every prefix with a fresh search.
+
+    Args:
+        search_text: The text to type.
+
+    Returns:
+        errors: What differs for every prefix whose results differ.
+    """
+    errors = []
+    SEARCH_CACHE.clear()
+    typed = {}
+    for end in range(1, len(search_text) + 1):
+        typed[search_text[:end]] = list(search_kits(search_text[:end]))
+    for prefix, kit_ids in typed.items():
+        SEARCH_CACHE.clear()
+        fresh = list(search_kits(prefix))
+        if set(kit_ids) != set(fresh):
+            errors.append(f"{prefix!r} typed matches {len(kit_ids)} kits, searched {len(fresh)}")
+        elif kit_ids != fresh:
+            errors.append(f"{prefix!r} typed ranks {kit_ids[:5]}..., searched {fresh[:5]}...")
+    return errors
+
+
+def run(kits: int) -> bool:
+    """Types every query on a synthetic catalog.
+
+    Args:
+        kits: The number of kits in the catalog.
+
+    Returns:
+        True if every typed search matched its fresh search.
+    """
+    database = prefs.Paths.DATABASE
+    errors = []
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            kit_data, author_data = write_catalog(Path(folder), kits)
+            prefs.Paths.DATABASE = Path(folder) / "kits.db"
+            # The builder prints a summary, keep the check output readable.
+            with redirect_stdout(StringIO()):
+                build_database(True, prefs.Paths.DATABASE, kit_data, author_data)
+            for query in QUERIES:
+                errors += type_search(query)
+            CONNECTION.close()
+    finally:
+        prefs.Paths.DATABASE = database
+
+    for error in errors:
+        print(error)
+    print(f"{len(QUERIES)} searches typed on {kits} kits, {len(errors)} prefixes differ")
+    return not errors
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Checks typed searches against fresh searches.")
+    parser.add_argument(
+        "--kits", type=int, default=1000, help="Kits in the synthetic catalog, smaller catalogs narrow more searches."
+    )
+    args = parser.parse_args()
+    sys.exit(0 if run(args.kits) else 1)
@@ -1,6 +1,10 @@
 # Creates a database for loading kit info
 import json
-from sqlite3 import Cursor, connect
+from argparse import ArgumentParser
+from hashlib import sha256
+from pathlib import Path
+from sqlite3 import Connection, Cursor, connect
+from typing import Dict, List, Tuple
 
 from scripts.prefs import Paths
 from scripts.utils import readable_size
@@ -20,77 +24,238 @@ def load_queries() -> dict[str, str]:
     return queries
 
 
-def populate_kits(cursor: Cursor) -> None:
-    """Populates the kits table with data from `kits.json`.
+QUERY_DATA = load_queries()
+
+
+def record_hash(record: dict) -> str:
+    """Hashes a kit or author record from the json data.
+
+    Args:
+        record: The record to hash.
+
+    Returns:
+        The hex digest of the record, which only changes when the record does.
+    """
+    return sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+def diff_records(cursor: Cursor, query: str, rows: Dict[str, tuple]) -> Tuple[List[tuple], List[tuple]]:
+    """Compares the rows built from the json data against the hashes stored in the database.
+
+    Args:
+        cursor: The database cursor.
+        query: The name of the query selecting the name and hash of every stored record.
+        rows: The rows to store by record name, with the record hash as the last value.
+
+    Returns:
+        changed: The rows that are new or changed.
+        removed: The names of the records that are no longer in the json data.
+    """
+    stored = dict(cursor.execute(QUERY_DATA[query]).fetchall())
+    changed = [row for name, row in rows.items() if stored.get(name) != row[-1]]
+    removed = [(name,) for name in stored if name not in rows]
+
+    return changed, removed
+
+
+def populate_kits(cursor: Cursor, kit_data: Path = Paths.KIT_DATA) -> Tuple[int, int]:
+    """Upserts the kits that changed in `kits.json` and removes the ones that are gone.
 
     Args:
          cursor: The database cursor.
+         kit_data: The kits json file.
+
+    Returns:
+        The number of changed and removed kits.
     """
-    kits_data = json.loads(Paths.KIT_DATA.read_text())
-
-    for kit_name, kit_info in kits_data.items():
-        cursor.execute(
-            QUERY_DATA['insert_kit'],
-            (
-                kit_name,
-                kit_info.get('author'),
-                kit_info.get('version'),
-                kit_info.get('description'),
-                kit_info.get('url'),
-                kit_info.get('help'),
-                kit_info.get('installable', None),
-                ",".join(kit_info.get("search"))
-            )
+    kits_data = json.loads(kit_data.read_text())
+    rows = {
+        kit_name: (
+            kit_name,
+            kit_info.get('author'),
+            kit_info.get('version'),
+            kit_info.get('description'),
+            kit_info.get('url'),
+            kit_info.get('help'),
+            kit_info.get('installable', None),
+            kit_info.get('modo_min'),
+            kit_info.get('modo_max'),
+            ",".join(kit_info.get("search")),
+            kit_info.get('download'),
+            kit_info.get('sha256'),
+            record_hash(kit_info)
         )
+        for kit_name, kit_info in kits_data.items()
+    }
+    changed, removed = diff_records(cursor, 'select_kit_hashes', rows)
+    # Kits without an author, e.g. because it was removed, are linked again once their author is back.
+    authors = {name for name, _ in cursor.execute(QUERY_DATA['select_author_hashes'])}
+    unlinked = {name for name, in cursor.execute(QUERY_DATA['select_unlinked_kit_names'])}
+    changed_set = {row[0] for row in changed}
+    changed += [
+        row for name, row in rows.items() if name in unlinked and row[1] in authors and name not in changed_set
+    ]
+    changed_names = [(row[0],) for row in changed]
+    # The add-ons of the changed kits, they are rewritten with their kit since the kit hash covers them.
+    add_ons = [
+        (kit_name, add_on_name, add_on_info.get('url'), add_on_info.get('description'), record_hash(add_on_info))
+        for kit_name, in changed_names
+        for add_on_name, add_on_info in kits_data[kit_name].get('add_ons', {}).items()
+    ]
 
+    # Drop the stale search index entries and add-ons before their kits change.
+    cursor.executemany(QUERY_DATA['delete_kits_fts'], changed_names + removed)
+    cursor.executemany(QUERY_DATA['delete_add_ons'], changed_names + removed)
+    cursor.executemany(QUERY_DATA['delete_kit'], removed)
+    cursor.executemany(QUERY_DATA['insert_kit'], changed)
+    cursor.executemany(QUERY_DATA['insert_add_on'], add_ons)
+    # Index the kits last so the index holds the text of their add-ons.
+    cursor.executemany(QUERY_DATA['insert_kits_fts'], changed_names)
 
-def populate_authors(cursor: Cursor) -> None:
-    """Populates the authors table with data from `authors.json`.
+    return len(changed), len(removed)
+
+
+def populate_authors(cursor: Cursor, author_data: Path = Paths.AUTHOR_DATA) -> Tuple[int, int]:
+    """Upserts the authors that changed in `authors.json` and removes the ones that are gone.
 
     Args:
         cursor: The database cursor.
+        author_data: The authors json file.
+
+    Returns:
+        The number of changed and removed authors.
     """
-    authors_data = json.loads(Paths.AUTHOR_DATA.read_text())
-
-    for author_name, author_info in authors_data.items():
-        cursor.execute(
-            QUERY_DATA['insert_author'],
-            (
-                author_name,
-                author_info.get('avatar'),
-                author_info.get('handle'),
-                json.dumps(author_info.get('links'))
-            )
+    authors_data = json.loads(author_data.read_text())
+    rows = {
+        author_name: (
+            author_name,
+            author_info.get('avatar'),
+            author_info.get('handle'),
+            json.dumps(author_info.get('links')),
+            record_hash(author_info)
         )
+        for author_name, author_info in authors_data.items()
+    }
+    changed, removed = diff_records(cursor, 'select_author_hashes', rows)
+    # The kits of removed authors are kept without an author and reindexed without the author's name.
+    kit_names = [kit for author in removed for kit in cursor.execute(QUERY_DATA['select_author_kit_names'], author)]
 
+    cursor.executemany(QUERY_DATA['delete_kits_fts'], kit_names)
+    cursor.executemany(QUERY_DATA['unlink_author_kits'], removed)
+    cursor.executemany(QUERY_DATA['delete_author'], removed)
+    cursor.executemany(QUERY_DATA['insert_author'], changed)
+    cursor.executemany(QUERY_DATA['insert_kits_fts'], kit_names)
 
-def build_database() -> None:
-    """Builds the database for all kits in `kits.json`."""
-    # Delete the database if it exists.
-    if Paths.KIT_DATABASE.exists():
-        Paths.KIT_DATABASE.unlink()
-
-    # Create database with the kits' data.
-    with connect(Paths.KIT_DATABASE) as connection:
-        # Initialize the database.
-        cursor = connection.cursor()
+    return len(changed), len(removed)
+
+
+def table_columns(connection: Connection, table: str) -> List[tuple]:
+    """Gets the column definitions of a table.
+
+    Args:
+        connection: The database connection.
+        table: The name of the table.
+
+    Returns:
+        columns: The name, type, constraints and default of every column.
+    """
+    return [column[1:] for column in connection.execute(f"PRAGMA table_info({table})")]
+
+
+def is_current_schema(connection: Connection) -> bool:
+    """Checks if an existing database can be updated incrementally.
+
+    Args:
+        connection: The database connection.
+
+    Returns:
+        True if the kits, authors, add-ons and search index tables match the table queries.
+    """
+    expected = connect(":memory:")
+    expected.execute(QUERY_DATA['table_authors'])
+    expected.execute(QUERY_DATA['table_kits'])
+    expected.execute(QUERY_DATA['table_add_ons'])
+    expected.execute(QUERY_DATA['table_kits_fts'])
+    tables = ("kits", "authors", "add_ons", "kits_fts")
+
+    try:
+        return all(table_columns(connection, table) == table_columns(expected, table) for table in tables)
+    finally:
+        expected.close()
+
+
+def build_database(
+        full: bool = False, database: Path = Paths.KIT_DATABASE, kit_data: Path = Paths.KIT_DATA,
+        author_data: Path = Paths.AUTHOR_DATA
+) -> None:
+    """Builds the database for all kits in `kits.json`, only writing the records that changed.
+
+    Args:
+        full: Delete the database and rebuild it from scratch.
+        database: The database file to build.
+        kit_data: The kits json file.
+        author_data: The authors json file.
+    """
+    # Catalog version of the existing database, a rebuild continues from it so clients still see a newer catalog.
+    version = 0
+    if database.exists():
+        connection = connect(database)
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if not full:
+            full = not is_current_schema(connection)
+            if full:
+                print("Database schema is out of date, rebuilding.")
+        connection.close()
+
+    # Delete the database if a full rebuild is needed.
+    if full and database.exists():
+        database.unlink()
+    new_database = not database.exists()
+
+    # Transactions are handled manually so the whole update is applied at once.
+    connection = connect(database, isolation_level=None)
+    cursor = connection.cursor()
+    if new_database:
+        # Small pages keep the packaged database small, must be set before any table exists.
         cursor.execute("PRAGMA page_size = 1024")
-        cursor.execute("VACUUM")
-        # Create the table for the kits.
-        cursor.execute(QUERY_DATA['table_kits'])
-        # Create the table for the authors.
+
+    cursor.execute("BEGIN")
+    try:
+        # Create the tables for the authors, the kits, their add-ons and the kit search index.
         cursor.execute(QUERY_DATA['table_authors'])
-        # Populate the kits table.
-        populate_kits(cursor)
-        # Populate the authors table.
-        populate_authors(cursor)
+        cursor.execute(QUERY_DATA['table_kits'])
+        cursor.execute(QUERY_DATA['index_kits_author'])
+        cursor.execute(QUERY_DATA['table_add_ons'])
+        cursor.execute(QUERY_DATA['table_kits_fts'])
+        # Update the tables with the records that changed, authors first so kits can reference them.
+        authors_changed, authors_removed = populate_authors(cursor, author_data)
+        kits_changed, kits_removed = populate_kits(cursor, kit_data)
+        # Bump the catalog version so clients can tell the database changed.
+        changed = bool(kits_changed or kits_removed or authors_changed or authors_removed)
+        if changed:
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+
+    # Refresh the query planner statistics, only when rows changed so an unchanged database isn't rewritten.
+    if changed or new_database:
+        cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA optimize")
+    connection.close()
 
+    print(f"Kits: {kits_changed} changed, {kits_removed} removed")
+    print(f"Authors: {authors_changed} changed, {authors_removed} removed")
     # Print the size of the files to ensure nothing goofy is happening.
-    print(".json:", readable_size(Paths.KIT_DATA.stat().st_size + Paths.AUTHOR_DATA.stat().st_size))
-    print(".db:", readable_size(Paths.KIT_DATABASE.stat().st_size))
+    print(".json:", readable_size(kit_data.stat().st_size + author_data.stat().st_size))
+    print(".db:", readable_size(database.stat().st_size))
 
 
 if __name__ == '__main__':
     """Builds the database for all kits in `kits.json`."""
-    QUERY_DATA = load_queries()
-    build_database()
+    parser = ArgumentParser(description="Builds the kits database from kits.json and authors.json.")
+    parser.add_argument("--full", action="store_true", help="Rebuild the database from scratch.")
+    args = parser.parse_args()
+
+    build_database(full=args.full)
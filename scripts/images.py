@@ -0,0 +1,173 @@
+# Build stage to optimize the kit images for the size they are displayed at.
+from pathlib import Path
+from shutil import copy2
+from sqlite3 import connect
+from struct import unpack
+from typing import List, Tuple
+
+from scripts.database import load_queries
+from scripts.utils import readable_size
+
+# Height the author avatars are displayed at.
+AVATAR_HEIGHT = 100
+# Width the banners are displayed at, the width of the window.
+BANNER_WIDTH = 512
+# File types that are only used to author the resources and never loaded at runtime.
+SOURCE_SUFFIXES = {".psd"}
+# Resource folders that can be packed into the database, with the width and height to scale them to.
+PACKABLE_IMAGES = {
+    "avatars": (0, AVATAR_HEIGHT),
+    "images/banners": (BANNER_WIDTH, 0),
+}
+
+
+def is_runtime_file(file: Path) -> bool:
+    """Checks if a kit file is needed at runtime.
+
+    Args:
+        file: The file to check.
+
+    Returns:
+        True if the file should be packaged.
+    """
+    return file.is_file() and file.suffix not in {".pyc", *SOURCE_SUFFIXES}
+
+
+def optimize_image(image_path: Path, width: int = 0, height: int = 0) -> Tuple[int, int]:
+    """Scales an image down to its display size and recompresses it losslessly in place.
+
+    Args:
+        image_path: The PNG image to optimize.
+        width: The display width, 0 to keep the aspect ratio.
+        height: The display height, 0 to keep the aspect ratio.
+
+    Returns:
+        The size of the image in bytes before and after optimizing.
+    """
+    # Qt is only needed for this stage, so packaging still works where PySide6 is not installed.
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QImage
+
+    original_size = image_path.stat().st_size
+    image = QImage(image_path.as_posix())
+    if image.isNull():
+        return original_size, original_size
+
+    # Only ever scale down, a larger image would just waste space.
+    scaled = False
+    if width and image.width() > width:
+        image = image.scaledToWidth(width, Qt.SmoothTransformation)
+        scaled = True
+    elif height and image.height() > height:
+        image = image.scaledToHeight(height, Qt.SmoothTransformation)
+        scaled = True
+
+    # Quality 0 is the maximum zlib compression for PNG files.
+    optimized_path = image_path.with_suffix(".opt.png")
+    image.save(optimized_path.as_posix(), "PNG", 0)
+    optimized_size = optimized_path.stat().st_size
+
+    # Keep the original when it was not scaled and already compresses better.
+    if scaled or optimized_size < original_size:
+        optimized_path.replace(image_path)
+    else:
+        optimized_path.unlink()
+        optimized_size = original_size
+
+    return original_size, optimized_size
+
+
+def optimize_images(resources: Path) -> None:
+    """Optimizes all PNG images in the staged kit resources.
+
+    Args:
+        resources: The resources folder of the staged kit.
+    """
+    try:
+        import PySide6.QtGui  # noqa: F401
+    except ImportError:
+        print("Images not optimized: PySide6 is not installed")
+        return
+
+    before = after = 0
+
+    for image_path in sorted(resources.glob("**/*.png")):
+        relative = image_path.relative_to(resources).parent.as_posix()
+        width, height = PACKABLE_IMAGES.get(relative, (0, 0))
+        original_size, optimized_size = optimize_image(image_path, width, height)
+        before += original_size
+        after += optimized_size
+
+    print(f"Images optimized: {readable_size(before)} -> {readable_size(after)}")
+
+
+def png_size(data: bytes) -> Tuple[int, int]:
+    """Reads the size of a PNG image from its header.
+
+    Args:
+        data: The PNG file data.
+
+    Returns:
+        The width and height of the image.
+    """
+    # The IHDR chunk always comes first, its width and height follow the signature and the chunk header.
+    return unpack(">II", data[16:24])
+
+
+def pack_images(resources: Path, database: Path) -> List[Path]:
+    """Stores the avatars and banners as BLOBs in the staged images database and removes the image files.
+
+    The images get their own database, the kits database is replaced by catalog syncs that don't carry them.
+
+    Args:
+        resources: The resources folder of the staged kit.
+        database: The staged images database.
+
+    Returns:
+        packed: The image files that were packed.
+    """
+    queries = load_queries()
+    packed = [image for folder in PACKABLE_IMAGES for image in sorted((resources / folder).glob("*.png"))]
+    rows = []
+    for image in packed:
+        data = image.read_bytes()
+        rows.append((image.relative_to(resources).as_posix(), *png_size(data), data))
+
+    with connect(database) as connection:
+        cursor = connection.cursor()
+        cursor.execute(queries['table_images'])
+        cursor.executemany(queries['insert_image'], rows)
+    connection.close()
+
+    for image in packed:
+        image.unlink()
+
+    print(f"Images packed into {database.name}: {len(packed)}")
+    return packed
+
+
+def stage_kit(kit_dir: Path, stage_dir: Path, pack: bool = False) -> Path:
+    """Copies the runtime files of the kit into the stage folder and optimizes its images.
+
+    Args:
+        kit_dir: The kit folder in the repository.
+        stage_dir: The folder to stage the kit in.
+        pack: If the avatars and banners should be packed into the images database.
+
+    Returns:
+        stage_kit_dir: The staged kit folder, ready to package.
+    """
+    stage_kit_dir = stage_dir / kit_dir.name
+
+    for file in kit_dir.glob("**/*"):
+        if is_runtime_file(file) and "__pycache__" not in file.parts:
+            target = stage_kit_dir / file.relative_to(kit_dir)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            copy2(file, target)
+
+    resources = stage_kit_dir / "resources"
+    optimize_images(resources)
+    if pack:
+        pack_images(resources, resources / "images.db")
+
+    return stage_kit_dir
@@ -0,0 +1,214 @@
+# Writes reproducible LPK files, compressing entries in parallel and caching them between builds.
+import shutil
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# File types that are already compressed, deflating them again only costs time.
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".psd", ".zip", ".lpk"}
+# Deflate level used for every compressed entry, part of the cache key.
+COMPRESS_LEVEL = 9
+# Zip methods.
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+# Every entry gets the earliest zip timestamp, 1980-01-01 00:00:00, so builds don't depend on file times.
+DOS_TIME = 0
+DOS_DATE = (1 << 5) | 1
+# Entries are made on unix with zip 2.0, so the permissions below are read.
+VERSION_MADE_BY = (3 << 8) | 20
+# Regular file with rw-r--r-- permissions.
+EXTERNAL_ATTR = 0o100644 << 16
+# Zip format limits without the zip64 extensions.
+ZIP_MAX_SIZE = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+
+
+@dataclass
+class LpkEntry:
+    """A file to write into the LPK."""
+    name: str
+    data: bytes
+    digest: str = ""
+    crc: int = 0
+    method: int = ZIP_STORED
+    blob: bytes = b""
+
+    def __post_init__(self) -> None:
+        """Hashes the entry data, unless already hashed, and picks the compression method from the file type."""
+        self.digest = self.digest or sha256(self.data).hexdigest()
+        self.crc = zlib.crc32(self.data)
+        self.method = ZIP_STORED if Path(self.name).suffix.lower() in STORED_SUFFIXES else ZIP_DEFLATED
+
+
+def deflate(data: bytes, level: int = COMPRESS_LEVEL) -> bytes:
+    """Compresses data to a raw deflate stream, the format zip entries store.
+
+    Args:
+        data: The data to compress.
+        level: The zlib compression level.
+
+    Returns:
+        The compressed data without zlib header or checksum.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class BlobCache:
+    """Compressed entry data stored by content hash, shared between builds.
+
+    Only the blobs of the last build are kept, a build prunes the blobs it didn't use once its LPK is written.
+    """
+
+    def __init__(self, folder: Path) -> None:
+        """Initialization of the cache.
+
+        Args:
+            folder: The folder to store the compressed blobs in.
+        """
+        self.folder = folder / f"deflate-{COMPRESS_LEVEL}"
+        self.hits = 0
+        self.misses = 0
+        # Digests of the blobs this build got or put, every other blob is pruned.
+        self.used: Set[str] = set()
+
+    def path(self, digest: str) -> Path:
+        """Gets the path of a cached blob.
+
+        Args:
+            digest: The sha256 of the uncompressed data.
+
+        Returns:
+            The path the blob is cached at.
+        """
+        return self.folder / digest[:2] / digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Gets a cached blob.
+
+        Args:
+            digest: The sha256 of the uncompressed data.
+
+        Returns:
+            The compressed data or None on a cache miss.
+        """
+        path = self.path(digest)
+        if not path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.add(digest)
+        return path.read_bytes()
+
+    def put(self, digest: str, blob: bytes) -> None:
+        """Caches a blob, writing it to a temporary file first so a cancelled build never leaves a partial blob.
+
+        Args:
+            digest: The sha256 of the uncompressed data.
+            blob: The compressed data.
+        """
+        path = self.path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(blob)
+        temp_path.replace(path)
+        self.used.add(digest)
+
+    def prune(self) -> int:
+        """Removes the blobs this build didn't use, blobs left behind by cancelled builds and the blobs of other
+        compression levels.
+
+        Returns:
+            removed: The number of bytes removed.
+        """
+        removed = 0
+        for folder in self.folder.parent.glob("deflate-*"):
+            if folder != self.folder and folder.is_dir():
+                removed += sum(path.stat().st_size for path in folder.rglob("*") if path.is_file())
+                shutil.rmtree(folder)
+        if not self.folder.is_dir():
+            return removed
+
+        for shard in self.folder.iterdir():
+            for path in shard.iterdir():
+                if path.name not in self.used:
+                    removed += path.stat().st_size
+                    path.unlink()
+            if not any(shard.iterdir()):
+                shard.rmdir()
+        return removed
+
+
+def compress_entries(entries: List[LpkEntry], cache: BlobCache, jobs: Optional[int] = None) -> None:
+    """Fills the compressed data of every entry, from the cache or compressed on a process pool.
+
+    Args:
+        entries: The entries to compress.
+        cache: The cache of compressed blobs.
+        jobs: The number of processes to compress with, defaults to the number of CPUs.
+    """
+    missing: Dict[str, List[LpkEntry]] = {}
+    for entry in entries:
+        if entry.method == ZIP_STORED:
+            entry.blob = entry.data
+            continue
+        blob = cache.get(entry.digest)
+        if blob is None:
+            # Identical files are only compressed once.
+            missing.setdefault(entry.digest, []).append(entry)
+        else:
+            entry.blob = blob
+
+    if not missing:
+        return
+
+    digests = list(missing)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        blobs = pool.map(deflate, [missing[digest][0].data for digest in digests])
+        for digest, blob in zip(digests, blobs):
+            cache.put(digest, blob)
+            for entry in missing[digest]:
+                entry.blob = blob
+
+
+def write_lpk(lpk_path: Path, entries: List[LpkEntry]) -> None:
+    """Writes compressed entries into a zip file with fixed timestamps, in the order they are given.
+
+    Args:
+        lpk_path: The LPK file to write.
+        entries: The entries to write, with their compressed data filled.
+    """
+    if len(entries) > ZIP_MAX_ENTRIES:
+        raise ValueError(f"Too many files for an LPK: {len(entries)}")
+
+    central_directory = []
+    with lpk_path.open('wb') as lpk:
+        for entry in entries:
+            if len(entry.data) > ZIP_MAX_SIZE:
+                raise ValueError(f"File is too large for an LPK: {entry.name}")
+            offset = lpk.tell()
+            name = entry.name.encode('utf-8')
+            # Flag the name as UTF-8 only when it needs to be.
+            flags = 0 if name.isascii() else 0x800
+            fields = (20, flags, entry.method, DOS_TIME, DOS_DATE, entry.crc, len(entry.blob), len(entry.data))
+            lpk.write(struct.pack("<IHHHHHIIIHH", 0x04034B50, *fields, len(name), 0))
+            lpk.write(name)
+            lpk.write(entry.blob)
+            central_directory.append(
+                struct.pack("<IH", 0x02014B50, VERSION_MADE_BY)
+                + struct.pack("<HHHHHIIIHHHHHII", *fields, len(name), 0, 0, 0, 0, EXTERNAL_ATTR, offset)
+                + name
+            )
+
+        directory_offset = lpk.tell()
+        directory = b"".join(central_directory)
+        lpk.write(directory)
+        if lpk.tell() > ZIP_MAX_SIZE:
+            raise ValueError(f"LPK is too large: {lpk_path.name}")
+        lpk.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(entries), len(entries), len(directory), directory_offset, 0
+        ))
@@ -0,0 +1,2 @@
+-- Desc: Remove all add-ons of a kit
+DELETE FROM add_ons WHERE kit_id IN (SELECT id FROM kits WHERE name = ?);
@@ -0,0 +1,2 @@
+-- Desc: Remove an author from the database
+DELETE FROM authors WHERE name = ?;
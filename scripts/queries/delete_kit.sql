@@ -0,0 +1,2 @@
+-- Desc: Remove a kit from the database
+DELETE FROM kits WHERE name = ?;
@@ -0,0 +1,2 @@
+-- Desc: Remove a kit from the full-text search table
+DELETE FROM kits_fts WHERE rowid IN (SELECT id FROM kits WHERE name = ?);
@@ -0,0 +1,2 @@
+-- Index the author of each kit so an author's kits can be joined without a scan
+CREATE INDEX IF NOT EXISTS kits_author_id ON kits (author_id);
@@ -0,0 +1,4 @@
+-- Desc: Insert an add-on of a kit
+INSERT INTO add_ons (
+    kit_id, name, url, description, hash
+) VALUES ((SELECT id FROM kits WHERE name = ?), ?, ?, ?, ?);
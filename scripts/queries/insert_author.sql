@@ -1,4 +1,9 @@
--- Desc: Insert a new kit into the database
+-- Desc: Insert a new author into the database or update it if it already exists
 INSERT INTO authors (
-    name, avatar, handle, links
-) VALUES (?, ?, ?, ?);
+    name, avatar, handle, links, hash
+) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    avatar = excluded.avatar,
+    handle = excluded.handle,
+    links = excluded.links,
+    hash = excluded.hash;
@@ -0,0 +1,4 @@
+-- Desc: Insert a packed image into the database
+INSERT OR REPLACE INTO images (
+    name, width, height, data
+) VALUES (?, ?, ?, ?);
@@ -1,4 +1,17 @@
--- Desc: Insert a new kit into the database
+-- Desc: Insert a new kit into the database or update it if it already exists
 INSERT INTO kits (
-    name, author, version, description, url, help, installable, search
-) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+    name, author_id, version, description, url, help, installable, modo_min, modo_max, search, download, sha256, hash
+) VALUES (?, (SELECT id FROM authors WHERE name = ?), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    author_id = excluded.author_id,
+    version = excluded.version,
+    description = excluded.description,
+    url = excluded.url,
+    help = excluded.help,
+    installable = excluded.installable,
+    modo_min = excluded.modo_min,
+    modo_max = excluded.modo_max,
+    search = excluded.search,
+    download = excluded.download,
+    sha256 = excluded.sha256,
+    hash = excluded.hash;
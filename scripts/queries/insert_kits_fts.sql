@@ -0,0 +1,9 @@
+-- Desc: Index a kit and the text of its add-ons into the full-text search table
+INSERT INTO kits_fts (
+    rowid, name, author, description, search, add_ons
+) SELECT kits.id, kits.name, authors.name, kits.description, kits.search, (
+    SELECT group_concat(add_ons.name || ' ' || coalesce(add_ons.description, ''), ' ')
+    FROM add_ons WHERE add_ons.kit_id = kits.id
+)
+FROM kits LEFT JOIN authors ON authors.id = kits.author_id
+WHERE kits.name = ?;
@@ -0,0 +1,2 @@
+-- Desc: Get the names of the kits of an author
+SELECT kits.name FROM kits JOIN authors ON authors.id = kits.author_id WHERE authors.name = ?;
@@ -0,0 +1,2 @@
+-- Desc: Get the hash of every kit in the database
+SELECT name, hash FROM kits;
@@ -0,0 +1,2 @@
+-- Desc: Get the names of the kits that don't reference an author
+SELECT name FROM kits WHERE author_id IS NULL;
@@ -0,0 +1,10 @@
+-- Create the add-ons table, the unique kit_id and name pair also indexes the add-ons by their kit
+CREATE TABLE IF NOT EXISTS add_ons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kit_id INTEGER NOT NULL REFERENCES kits (id),
+    name TEXT NOT NULL,
+    url TEXT,
+    description TEXT,
+    hash TEXT NOT NULL,
+    UNIQUE (kit_id, name)
+);
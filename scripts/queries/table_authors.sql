@@ -1,8 +1,9 @@
--- Create the authors table
+-- Create the authors table, the unique name is indexed for exact author lookups
 CREATE TABLE IF NOT EXISTS authors (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
+    name TEXT NOT NULL UNIQUE,
     avatar TEXT,
     handle TEXT,
-    links TEXT
+    links TEXT,
+    hash TEXT NOT NULL
 );
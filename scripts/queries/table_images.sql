@@ -0,0 +1,7 @@
+-- Create the table for images packed into images.db at build time, with their size to lay them out unloaded
+CREATE TABLE IF NOT EXISTS images (
+    name TEXT PRIMARY KEY,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
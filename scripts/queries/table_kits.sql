@@ -1,12 +1,17 @@
 -- Create the kits table
 CREATE TABLE IF NOT EXISTS kits (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    author TEXT,
+    name TEXT NOT NULL UNIQUE,
+    author_id INTEGER REFERENCES authors (id),
     version TEXT,
     description TEXT,
     url TEXT,
     help TEXT,
     installable BOOLEAN,
-    search TEXT
+    modo_min INTEGER,
+    modo_max INTEGER,
+    search TEXT,
+    download TEXT,
+    sha256 TEXT,
+    hash TEXT NOT NULL
 );
@@ -0,0 +1,9 @@
+-- Create the full-text search index for the kits table
+CREATE VIRTUAL TABLE IF NOT EXISTS kits_fts USING fts5(
+    name,
+    author,
+    description,
+    search,
+    add_ons,
+    tokenize = "unicode61 remove_diacritics 2"
+);
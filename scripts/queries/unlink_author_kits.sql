@@ -0,0 +1,2 @@
+-- Desc: Remove an author from their kits before the author is deleted, so no kit references a missing author
+UPDATE kits SET author_id = NULL WHERE author_id IN (SELECT id FROM authors WHERE name = ?);
@@ -1,15 +1,63 @@
+import json
+from dataclasses import dataclass
+from functools import partial
+from hashlib import sha256
 from typing import List
 from pathlib import Path
 
 import toml
 
+# Name of the manifest of the kit files, written into the kit folder and next to the LPK.
+MANIFEST_NAME = "manifest.json"
+
 
 class Paths:
     """Class to store the paths used in the project."""
     REPO_ROOT = Path(__file__).parent.parent.absolute()
 
 
-def make_index(folder: Path, files: List[Path], message: str, restart="No") -> str:
+@dataclass
+class KitFile:
+    """A file in the kit folder with the size and hash the manifest records."""
+    path: Path
+    name: str
+    size: int
+    sha256: str
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hashes a file in chunks so large files are never fully loaded.
+
+    Args:
+        path: The file to hash.
+        chunk_size: The number of bytes to read at a time.
+
+    Returns:
+        The sha256 hex digest of the file.
+    """
+    digest = sha256()
+    with path.open('rb') as file:
+        for chunk in iter(partial(file.read, chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_kit(folder: Path) -> List[KitFile]:
+    """Walks the kit folder once, hashing every file, in a fixed order.
+
+    Args:
+        folder: The kit folder.
+
+    Returns:
+        files: The files in the kit folder, sorted by their relative path.
+    """
+    files = []
+    for path in sorted(f for f in folder.glob("**/*") if f.is_file()):
+        files.append(KitFile(path, path.relative_to(folder).as_posix(), path.stat().st_size, hash_file(path)))
+    return files
+
+
+def make_index(folder: Path, files: List[KitFile], message: str, restart="No") -> str:
     """Method to generate the body of an index.xml for packaging example files.
 
     Args:
@@ -22,25 +70,39 @@ def make_index(folder: Path, files: List[Path], message: str, restart="No") -> s
         xml: the generated index.xml template as a string.
     """
     # Header
-    xml = "<?xml version=\"1.0\" encoding=\"utf-8\"?>"
+    lines = ["<?xml version=\"1.0\" encoding=\"utf-8\"?>"]
     # Modo 10+
-    xml += "\n<package version=\"1000\">"
+    lines.append("<package version=\"1000\">")
     # No need to restart
     restart = "YES" if restart else "NO"
-    xml += f'\n\t<kit name="{folder.name}" restart="{restart}">'
-    # For each file add target
+    lines.append(f'\t<kit name="{folder.name}" restart="{restart}">')
+    # For each file add target. Modo requires that paths in the index use forward slash
     for file in files:
-        # Path including the kit directory
-        full_path = file.relative_to(folder.parent)
-        # Path without kit directory. Modo requires that paths in the index use forward slash
-        rel_path = file.relative_to(folder)
-        xml += f'\n\t\t<source target="{full_path.as_posix()}">{rel_path.as_posix()}</source>'
+        # Path including the kit directory, and the path without it.
+        lines.append(f'\t\t<source target="{folder.name}/{file.name}">{file.name}</source>')
     # Add license file
-    xml += f'\n\t\t<source target="{folder.name}\\LICENSE">LICENSE</source>'
+    lines.append(f'\t\t<source target="{folder.name}\\LICENSE">LICENSE</source>')
     # Add user facing message
-    xml += f'\n\t</kit>\n\t<message button="Help">{message}</message>\n</package>'
+    lines.append(f'\t</kit>\n\t<message button="Help">{message}</message>\n</package>')
     # Return Text
-    return xml
+    return "\n".join(lines)
+
+
+def make_manifest(files: List[KitFile], version: str) -> str:
+    """Generates the manifest of the kit files, used to only download the files that changed.
+
+    Args:
+        files: List of files in the kit folder.
+        version: The version of the kit.
+
+    Returns:
+        manifest: The manifest as json, with the size and sha256 of every file by its relative path.
+    """
+    manifest = {
+        "version": version,
+        "files": {file.name: {"size": file.size, "sha256": file.sha256} for file in files},
+    }
+    return json.dumps(manifest, indent=1)
 
 
 def get_pyproject() -> dict: